@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class AccountConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'account'
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel
+        from account.database import configure_sqlite
+        from account.metrics import install_query_observer, metrics
+        connection_created.connect(configure_sqlite, dispatch_uid="account.configure_sqlite")
+        if metrics.enabled:
+            connection_created.connect(
+                install_query_observer, dispatch_uid="account.install_query_observer")
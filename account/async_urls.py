@@ -0,0 +1,26 @@
+"""
+Module that holds account app URLs served by the async views.
+"""
+from django.urls import path
+from .async_views import (AsyncUserRegistrationView, AsyncUserLoginView,
+                          AsyncUserPasswordChangeView, AsyncSendPasswordResetEmailView,
+                          AsyncUserPasswordResetView)
+from .views import (UserImportView, UserExportView, UserTokenRefreshView,
+                    UserLogoutView, JWKSView, MetricsView)
+
+urlpatterns = [
+    path("register/", AsyncUserRegistrationView.as_view(), name="register"),
+    path("login/", AsyncUserLoginView.as_view(), name="login"),
+    path("password-change/", AsyncUserPasswordChangeView.as_view(),
+         name="password_change"),
+    path("send-reset-password-email/", AsyncSendPasswordResetEmailView.as_view(),
+         name="send_reset_password_email"),
+    path("reset-password/<uid>/<token>/",
+         AsyncUserPasswordResetView.as_view(), name="reset_password"),
+    path("token/refresh/", UserTokenRefreshView.as_view(), name="token_refresh"),
+    path("logout/", UserLogoutView.as_view(), name="logout"),
+    path("jwks/", JWKSView.as_view(), name="jwks"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+    path("import/", UserImportView.as_view(), name="import_users"),
+    path("export/", UserExportView.as_view(), name="export_users"),
+]
@@ -0,0 +1,323 @@
+"""
+Account async views module.
+...
+Async-native counterparts of the views in account.views for ASGI deployments,
+routed by account.async_urls. They use the async ORM, the hashing service pool
+and the mail queue so no request blocks the event loop on a thread hop.
+"""
+import json
+import math
+from django.db import IntegrityError
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import serializers, status
+from rest_framework.exceptions import APIException, ParseError
+from account.authentication import StatelessJWTAuthentication
+from account.backends import aauthenticate
+from account.last_login import last_logins
+from account.models import User
+from account.revocation import revocation_store
+from account.reset import (
+    RESET_TOKEN_FIELDS, RESET_EMAIL_MESSAGE, aconsume_reset_token, acreate_reset_token,
+    areset_password, reset_email_data)
+from account.serializers import (
+    DUPLICATE_EMAIL_MESSAGE, UserRegistrationSerializer, UserLoginSerializer,
+    is_duplicate_email)
+from account.throttling import (
+    LoginIPThrottle, LoginEmailThrottle, PasswordResetIPThrottle,
+    PasswordResetEmailThrottle)
+from account.utils import Util
+from .renderers import UserRenderer
+from .views import get_tokens_for_user
+
+
+class PasswordPairSerializer(serializers.Serializer):
+    """
+    Serializes a new password and its confirmation.
+    ...
+    Methods:
+        validate(attrs):
+            Validates if password and password2 fields are a match.
+    """
+    # pylint: disable=abstract-method
+    password = serializers.CharField(
+        max_length=255, style={"input_type": "password"}, write_only=True
+    )
+    password2 = serializers.CharField(
+        max_length=255, style={"input_type": "password"}, write_only=True
+    )
+
+    def validate(self, attrs):
+        if attrs.get("password") != attrs.get("password2"):
+            raise serializers.ValidationError(
+                "Passwords do not match!")
+        return attrs
+
+
+class ResetEmailSerializer(serializers.Serializer):
+    """
+    Serializes the email a reset link is requested for.
+    """
+    # pylint: disable=abstract-method
+    email = serializers.EmailField(max_length=255)
+
+
+class AsyncAPIView(View):
+    """
+    Base class of the async account views.
+    ...
+    Methods:
+        as_view(**initkwargs):
+            Returns the CSRF exempt view function.
+
+        dispatch(request, *args, **kwargs):
+            Renders malformed request bodies as 400 responses.
+
+        parse(request):
+            Returns the request data.
+
+        render(data, status_code):
+            Returns a response rendered by UserRenderer.
+
+        errors(errors):
+            Returns the errors envelope.
+
+        throttled(request, data):
+            Returns a 429 response when a throttle rejects the request.
+    """
+    throttle_classes = ()
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # csrf_exempt() would wrap the coroutine in a sync function on Django 4.2.
+        view.csrf_exempt = True
+        return view
+
+    # Async to await the handler and catch its ParseError. Only the view
+    # function calls dispatch and returns its result, a coroutine either way
+    # for these views, so the sync signature of View.dispatch isn't relied on.
+    async def dispatch(self, request, *args, **kwargs):  # pylint: disable=invalid-overridden-method
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except ParseError as exc:
+            return self.render({"detail": exc.detail}, exc.status_code)
+
+    @staticmethod
+    def parse(request):
+        """
+        Returns the JSON or form encoded request data.
+        Raises ParseError, like the DRF JSONParser, if the JSON is malformed.
+        """
+        if request.content_type == "application/json":
+            try:
+                return json.loads(request.body or b"{}")
+            except ValueError as exc:
+                raise ParseError(f"JSON parse error - {exc}") from exc
+        return request.POST
+
+    @staticmethod
+    def render(data, status_code):
+        """
+        Returns a response rendered by UserRenderer.
+        """
+        response = HttpResponse(content_type="application/json", status=status_code)
+        response.content = UserRenderer().render(
+            data, renderer_context={"response": response})
+        return response
+
+    @staticmethod
+    def errors(errors):
+        """
+        Returns the errors envelope used by UserRenderer.
+        """
+        return {"errors": errors}
+
+    def throttled(self, request, data):
+        """
+        Runs the throttle classes like APIView.check_throttles and returns a
+        429 response when any rejects the request, None otherwise.
+        """
+        request.data = data
+        waits = []
+        for throttle in (throttle_class() for throttle_class in self.throttle_classes):
+            if not throttle.allow_request(request, self):
+                waits.append(throttle.wait())
+
+        if not waits:
+            return None
+
+        wait = max((wait for wait in waits if wait is not None), default=None)
+        response = self.render(
+            {"detail": "Request was throttled."}, status.HTTP_429_TOO_MANY_REQUESTS)
+        if wait is not None:
+            response["Retry-After"] = str(math.ceil(wait))
+        return response
+
+
+class AsyncUserRegistrationView(AsyncAPIView):
+    """
+    Async user registration class with a post method.
+    ...
+    Methods:
+        post(request):
+            POST method for user registration.
+    """
+
+    async def post(self, request):
+        """
+        POST method for user registration.
+        """
+        serializer = UserRegistrationSerializer(data=self.parse(request))
+        if not serializer.is_valid():
+            return self.render(serializer.errors, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        # The INSERT is the only write, a transaction of its own.
+        try:
+            user = await User.objects.acreate_user(**serializer.validated_data)
+        except IntegrityError as exc:
+            if not is_duplicate_email(exc):
+                raise
+            return self.render(
+                self.errors({"email": [DUPLICATE_EMAIL_MESSAGE]}),
+                status.HTTP_422_UNPROCESSABLE_ENTITY)
+        token = get_tokens_for_user(user)
+        return self.render({"token": token, "message": "Registered!"},
+                           status.HTTP_201_CREATED)
+
+
+class AsyncUserLoginView(AsyncAPIView):
+    """
+    Async user login class with a post method.
+    ...
+    Methods:
+        post(request):
+            POST method for user Login.
+    """
+    throttle_classes = (LoginIPThrottle, LoginEmailThrottle)
+
+    async def post(self, request):
+        """
+        POST method for user Login.
+        """
+        data = self.parse(request)
+        throttled = self.throttled(request, data)
+        if throttled is not None:
+            return throttled
+
+        serializer = UserLoginSerializer(data=data)
+        if not serializer.is_valid():
+            return self.render(serializer.errors, status.HTTP_401_UNAUTHORIZED)
+
+        user = await aauthenticate(
+            email=serializer.data.get("email"),
+            password=serializer.data.get("password"))
+
+        if user is None:
+            return self.render(
+                self.errors({"non_field_errors": ["Invalid Email or Password!"]}),
+                status.HTTP_401_UNAUTHORIZED)
+
+        await last_logins.arecord(user)
+        token = get_tokens_for_user(user)
+        return self.render({"token": token, "message": "Logged in!"}, status.HTTP_200_OK)
+
+
+class AsyncUserPasswordChangeView(AsyncAPIView):
+    """
+    Async user password change class with a post method.
+    ...
+    Methods:
+        post(request):
+            POST method for password change.
+    """
+
+    async def post(self, request):
+        """
+        POST method for user password change.
+        """
+        await revocation_store.arefresh_if_due()
+        try:
+            authenticated = await StatelessJWTAuthentication().aauthenticate(request)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+            return self.render(detail, exc.status_code)
+
+        if authenticated is None:
+            return self.render(
+                {"detail": "Authentication credentials were not provided."},
+                status.HTTP_401_UNAUTHORIZED)
+
+        serializer = PasswordPairSerializer(data=self.parse(request))
+        if not serializer.is_valid():
+            return self.render(serializer.errors, status.HTTP_401_UNAUTHORIZED)
+
+        user_id = authenticated[0].pk
+        await areset_password(user_id, serializer.validated_data["password"])
+        user = await User.objects.aget(pk=user_id)
+        token = get_tokens_for_user(user)
+        return self.render({"token": token, "message": "Password was changed successfully."},
+                           status.HTTP_200_OK)
+
+
+class AsyncSendPasswordResetEmailView(AsyncAPIView):
+    """
+    Async password reset email sender class with a post method.
+    ...
+    Methods:
+        post(request):
+            POST method for password reset email.
+    """
+    throttle_classes = (PasswordResetIPThrottle, PasswordResetEmailThrottle)
+
+    async def post(self, request):
+        """
+        POST method for password reset email.
+        """
+        data = self.parse(request)
+        throttled = self.throttled(request, data)
+        if throttled is not None:
+            return throttled
+
+        serializer = ResetEmailSerializer(data=data)
+        if not serializer.is_valid():
+            return self.render(self.errors(serializer.errors), status.HTTP_200_OK)
+
+        try:
+            user = await User.objects.only(*RESET_TOKEN_FIELDS).aget_by_email(
+                serializer.validated_data["email"])
+        except User.DoesNotExist:
+            return self.render(
+                self.errors({"non_field_errors": [RESET_EMAIL_MESSAGE]}),
+                status.HTTP_200_OK)
+
+        Util.send_email(reset_email_data(user, await acreate_reset_token(user)))
+        return self.render({"message": RESET_EMAIL_MESSAGE}, status.HTTP_200_OK)
+
+
+class AsyncUserPasswordResetView(AsyncAPIView):
+    """
+    Async password reset class with a post method.
+    ...
+    Methods:
+        post(request, uid, token):
+            POST method for password change through reset link.
+    """
+
+    async def post(self, request, uid, token):
+        """
+        POST method for password reset.
+        """
+        serializer = PasswordPairSerializer(data=self.parse(request))
+        if not serializer.is_valid():
+            return self.render(serializer.errors, status.HTTP_401_UNAUTHORIZED)
+
+        user_id = await aconsume_reset_token(uid, token)
+        if user_id is None:
+            return self.render(
+                self.errors({"non_field_errors": ["Token has expired."]}),
+                status.HTTP_401_UNAUTHORIZED)
+        await areset_password(user_id, serializer.validated_data["password"])
+
+        return self.render({"message": "Password has been successfully reset."},
+                           status.HTTP_200_OK)
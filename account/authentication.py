@@ -0,0 +1,100 @@
+"""
+Account authentication module.
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from account.cache import password_versions, token_cache
+from account.revocation import revocation_store
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    JWT authentication that builds the user from the token claims.
+    ...
+    No database query is made to authenticate a request, the returned
+    ClaimsUser only fetches the User row when a view needs it, and revoked
+    tokens are looked up in the in-memory revocation store. Validated tokens
+    are cached until they expire so a reused token is only verified once.
+
+    Tokens issued before a password change are rejected by comparing their
+    password version claim with the current one, a single cache lookup.
+
+    Methods:
+        get_validated_token(raw_token):
+            Returns the cached or validated token unless it was revoked.
+
+        get_user(validated_token):
+            Returns a ClaimsUser built from the validated token.
+
+        aauthenticate(request):
+            Async version of authenticate.
+
+        get_claims_user(validated_token):
+            Returns the ClaimsUser of the token unless the user is inactive.
+
+        check_password_version(user, current_version):
+            Rejects tokens issued before the last password change.
+    """
+
+    def get_validated_token(self, raw_token):
+        validated_token = token_cache.get(raw_token)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            token_cache.set(raw_token, validated_token)
+
+        if revocation_store.is_revoked(validated_token.get(api_settings.JTI_CLAIM)):
+            raise InvalidToken({
+                "detail": _("Token is revoked"),
+                "code": "token_not_valid",
+            })
+
+        return validated_token
+
+    def get_user(self, validated_token):
+        user = self.get_claims_user(validated_token)
+        self.check_password_version(user, password_versions.get(user.id))
+        return user
+
+    async def aauthenticate(self, request):
+        """
+        Async version of authenticate, reading the password version with the
+        async cache and ORM.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        user = self.get_claims_user(validated_token)
+        self.check_password_version(user, await password_versions.aget(user.id))
+        return user, validated_token
+
+    def get_claims_user(self, validated_token):
+        """
+        Returns the ClaimsUser of the token, unless the user is inactive.
+        """
+        user = super().get_user(validated_token)
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return user
+
+    @staticmethod
+    def check_password_version(user, current_version):
+        """
+        Rejects tokens issued before the last password change of the user, or
+        for a deleted or deactivated user.
+        """
+        if current_version is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if user.password_version < current_version:
+            raise AuthenticationFailed(
+                _("Token was issued before a password change"), code="password_changed")
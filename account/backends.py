@@ -0,0 +1,78 @@
+"""
+Authentication backends module.
+"""
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from account.cache import user_cache
+from account.metrics import timed
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    Model backend that looks users up through the user cache.
+    ...
+    Methods:
+        authenticate(request, username, password, **kwargs):
+            Authenticates the user with the given credentials.
+
+        aauthenticate(request, username, password, **kwargs):
+            Async version of authenticate using the async ORM.
+
+        get_user(user_id):
+            Returns the user with the given id.
+    """
+
+    @timed("authenticate")
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user_model = get_user_model()
+        if username is None:
+            username = kwargs.get(user_model.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = user_cache.get_by_email(username)
+        except user_model.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user.
+            user_model().set_password(password)
+            return None
+
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    @timed("authenticate")
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        """
+        Async version of authenticate, looking the user up with the async ORM.
+        """
+        user_model = get_user_model()
+        if username is None:
+            username = kwargs.get(user_model.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = await user_model.objects.aget_by_email(username)
+        except user_model.DoesNotExist:
+            await user_model().aset_password(password)
+            return None
+
+        if await user.acheck_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        try:
+            user = user_cache.get_by_id(user_id)
+        except get_user_model().DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
+
+
+async def aauthenticate(request=None, **credentials):
+    """
+    Async counterpart of django.contrib.auth.authenticate for CachedModelBackend.
+    """
+    return await CachedModelBackend().aauthenticate(request, **credentials)
@@ -0,0 +1,539 @@
+"""
+Benchmarks module.
+...
+Each benchmark is registered with the benchmark decorator and is run through
+the `manage.py benchmark <name>` command, inside a transaction that is rolled
+back afterwards unless it is registered with atomic=False.
+"""
+import asyncio
+import itertools
+import json
+import time
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.hashers import get_hashers
+from django.core.cache import cache
+from django.db import connection
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import include, path, reverse
+from rest_framework import serializers
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication, JWTStatelessUserAuthentication)
+from account.authentication import StatelessJWTAuthentication
+from account.cache import password_versions, token_cache
+from account.database import journal_mode
+from account.last_login import LAST_LOGIN_MODES, LastLoginRecorder
+from account.metrics import metrics, observe_query, timed
+from account.models import User, email_lookup
+from account.renderers import UserRenderer, json_dumps, orjson, orjson_dumps
+from account.serializers import UserRegistrationSerializer
+from account.signing import (
+    KEY_ALGORITHMS, KeyRingTokenBackend, SigningKey, generate_private_key)
+from account.throttling import throttle_stats
+from account.tokens import UserAccessToken
+from account.views import get_tokens_for_user
+
+BENCHMARKS = {}
+
+BENCHMARK_PASSWORD = "Vq7#pRm2!wZ9"
+
+# Longest a single password hash may take on one core.
+HASH_BUDGET_MS = 250.0
+
+
+def benchmark(name, atomic=True):
+    """
+    Registers the decorated function as a benchmark under the given name.
+    Benchmarks using several threads see no uncommitted data, they register
+    with atomic=False and clean up after themselves.
+    """
+    def decorator(func):
+        func.atomic = atomic
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def measure(label, func, iterations):
+    """
+    Calls func the given number of times and returns a result row with the
+    label, operations per second and database queries per operation.
+    """
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - start
+
+    return {
+        "label": label,
+        "ops": iterations / elapsed,
+        "queries": len(queries) / iterations,
+    }
+
+
+def measure_concurrent(label, func, iterations, concurrency):
+    """
+    Calls func the given number of times from concurrency threads and returns
+    a result row, queries are not counted across threads.
+    """
+    with ThreadPoolExecutor(concurrency) as executor:
+        start = time.perf_counter()
+        list(executor.map(lambda _: func(), range(iterations)))
+        elapsed = time.perf_counter() - start
+
+    return {"label": label, "ops": iterations / elapsed, "queries": None}
+
+
+async def measure_async(label, func, iterations, concurrency):
+    """
+    Awaits func the given number of times, at most concurrency at once, and
+    returns a result row.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited():
+        async with semaphore:
+            await func()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(limited() for _ in range(iterations)))
+    elapsed = time.perf_counter() - start
+
+    return {"label": label, "ops": iterations / elapsed, "queries": None}
+
+
+def without_throttling():
+    """
+    Returns an override_settings disabling the throttle rates.
+    """
+    rest_framework = dict(settings.REST_FRAMEWORK)
+    rest_framework["DEFAULT_THROTTLE_RATES"] = dict.fromkeys(
+        rest_framework.get("DEFAULT_THROTTLE_RATES", {}))
+    return override_settings(REST_FRAMEWORK=rest_framework)
+
+
+def create_benchmark_user(email="benchmark@example.com"):
+    """
+    Creates the user the benchmarks authenticate as.
+    """
+    return User.objects.create_user(
+        email=email,
+        name="Benchmark",
+        terms_conditions=True,
+        password=BENCHMARK_PASSWORD,
+    )
+
+
+class ProbeView(APIView):
+    """
+    Minimal authenticated view used to measure the authentication overhead.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """
+        Returns the authenticated user id.
+        """
+        return Response({"id": request.user.pk})
+
+
+@benchmark("auth")
+def bench_auth(iterations, concurrency=1):
+    """
+    Compares requests/sec of an authenticated view using the database backed
+    JWTAuthentication and the claims based StatelessJWTAuthentication.
+    """
+    user = create_benchmark_user()
+    access = get_tokens_for_user(user)["access"]
+    factory = APIRequestFactory()
+
+    results = []
+    for auth_class in (JWTAuthentication, StatelessJWTAuthentication):
+        view = ProbeView.as_view(authentication_classes=[auth_class])
+
+        def request(view=view):
+            response = view(factory.get(
+                "/probe/", HTTP_AUTHORIZATION="Bearer " + access))
+            assert response.status_code == 200, response.data
+
+        results.append(measure(auth_class.__name__, request, iterations))
+    return results
+
+
+@benchmark("token_version")
+def bench_token_version(iterations, concurrency=1):
+    """
+    Measures the per request cost of rejecting tokens issued before a
+    password change: claims only authentication, StatelessJWTAuthentication
+    with the password version cached, and with the cache cleared before each
+    request.
+    """
+    user = create_benchmark_user()
+    access = get_tokens_for_user(user)["access"]
+    factory = APIRequestFactory()
+
+    def authenticate(auth_class, cold=False):
+        request = factory.get("/probe/", HTTP_AUTHORIZATION="Bearer " + access)
+        if cold:
+            password_versions.invalidate(user.pk)
+        assert auth_class().authenticate(Request(request)) is not None
+
+    return [
+        measure("claims only", lambda: authenticate(JWTStatelessUserAuthentication),
+                iterations),
+        measure("password version, cached",
+                lambda: authenticate(StatelessJWTAuthentication), iterations),
+        measure("password version, cold cache",
+                lambda: authenticate(StatelessJWTAuthentication, cold=True), iterations),
+    ]
+
+
+@benchmark("token_cache")
+def bench_token_cache(iterations, concurrency=1):
+    """
+    Compares StatelessJWTAuthentication of a reused access token verified on
+    every request and served from the validated token cache.
+    """
+    user = create_benchmark_user()
+    access = get_tokens_for_user(user)["access"]
+    request = Request(APIRequestFactory().get(
+        "/probe/", HTTP_AUTHORIZATION="Bearer " + access))
+    authentication = StatelessJWTAuthentication()
+
+    def authenticate(clear):
+        if clear:
+            token_cache.clear()
+        assert authentication.authenticate(request) is not None
+
+    return [
+        measure("token verified per request", lambda: authenticate(True), iterations),
+        measure("token cache hit", lambda: authenticate(False), iterations),
+    ]
+
+
+@benchmark("hashers")
+def bench_hashers(iterations, concurrency=1):
+    """
+    Measures hashes/sec on one core of each configured password hasher and
+    whether a hash fits HASH_BUDGET_MS. Hashing is slow by design, so each
+    hasher runs a hundredth of the iterations.
+    """
+    iterations = max(iterations // 100, 1)
+
+    results = []
+    for hasher in get_hashers():
+        try:
+            salt = hasher.salt()
+            result = measure(hasher.algorithm, lambda hasher=hasher, salt=salt: hasher.encode(
+                BENCHMARK_PASSWORD, salt), iterations)
+        except (ImportError, ValueError):
+            results.append({"label": f"{hasher.algorithm}, unavailable",
+                            "ops": None, "queries": None})
+            continue
+
+        latency_ms = 1000 / result["ops"]
+        verdict = "ok" if latency_ms <= HASH_BUDGET_MS else "over budget"
+        result["label"] += f", {latency_ms:.0f} ms/hash, {verdict}"
+        results.append(result)
+    return results
+
+
+@benchmark("signing")
+def bench_signing(iterations, concurrency=1):
+    """
+    Compares get_tokens_for_user signing and access token verification
+    throughput with HS256 and with RS256, ES256 and EdDSA keys.
+    """
+    user = create_benchmark_user()
+    backends = {"HS256": TokenBackend("HS256", settings.SECRET_KEY)}
+    for algorithm in KEY_ALGORITHMS:
+        key = SigningKey(algorithm.lower(), generate_private_key(algorithm))
+        backends[algorithm] = KeyRingTokenBackend([key], key.kid)
+
+    results = []
+    for algorithm, backend in backends.items():
+        with mock.patch("account.tokens.token_backend", backend):
+            access = get_tokens_for_user(user)["access"]
+            results.append(measure(f"{algorithm} get_tokens_for_user",
+                                   lambda: get_tokens_for_user(user), iterations))
+            results.append(measure(f"{algorithm} verify access token",
+                                   lambda access=access: UserAccessToken(access),
+                                   iterations))
+    return results
+
+
+urlpatterns = [
+    path("sync/", include("account.urls")),
+    path("async/", include(("account.async_urls", "async"))),
+]
+
+
+@benchmark("views", atomic=False)
+def bench_views(iterations, concurrency=1):
+    """
+    Compares login throughput of the sync views under the WSGI handler,
+    driven from concurrency threads, and of the async views under the ASGI
+    handler, with concurrency requests in flight on one event loop.
+    """
+    user = create_benchmark_user()
+    credentials = {"email": user.email, "password": BENCHMARK_PASSWORD}
+
+    def sync_login(client=Client()):
+        response = client.post("/sync/login/", credentials)
+        assert response.status_code == 200, response.content
+
+    async def async_login(client=AsyncClient()):
+        response = await client.post("/async/login/", credentials)
+        assert response.status_code == 200, response.content
+
+    try:
+        with override_settings(ROOT_URLCONF=__name__, ALLOWED_HOSTS=["testserver"]), \
+                without_throttling():
+            return [
+                measure_concurrent("sync views under WSGI", sync_login,
+                                   iterations, concurrency),
+                asyncio.run(measure_async("async views under ASGI", async_login,
+                                          iterations, concurrency)),
+            ]
+    finally:
+        user.delete()
+
+
+@benchmark("database", atomic=False)
+def bench_database(iterations, concurrency=1):
+    """
+    Measures register and login throughput from concurrency threads, each
+    with its own connection, against the configured DB_PROFILE. Run it once
+    per profile, e.g. with DB_PROFILE=postgres, to compare them.
+    """
+    user = create_benchmark_user()
+    credentials = {"email": user.email, "password": BENCHMARK_PASSWORD}
+    counter = itertools.count()
+    profile = journal_mode(connection)
+
+    def register(client=Client()):
+        response = client.post(reverse("register"), {
+            "name": "Benchmark",
+            "email": f"benchmark-db-{next(counter)}@example.com",
+            "password": BENCHMARK_PASSWORD,
+            "password2": BENCHMARK_PASSWORD,
+            "terms_conditions": "True",
+        })
+        assert response.status_code == 201, response.content
+
+    def login(client=Client()):
+        response = client.post(reverse("login"), credentials)
+        assert response.status_code == 200, response.content
+
+    try:
+        with override_settings(ALLOWED_HOSTS=["testserver"]), without_throttling():
+            return [
+                measure_concurrent(f"register ({profile})", register,
+                                   iterations, concurrency),
+                measure_concurrent(f"login ({profile})", login,
+                                   iterations, concurrency),
+            ]
+    finally:
+        User.objects.filter(email__startswith="benchmark-db-").delete()
+        user.delete()
+
+
+@benchmark("last_login")
+def bench_last_login(iterations, concurrency=1):
+    """
+    Compares recording the logins of ten users in each last login mode, with
+    the buffer flushed at the end, and reports the coalesced writes.
+    """
+    users = [create_benchmark_user(f"benchmark-{i}@example.com") for i in range(10)]
+
+    results = []
+    for mode in LAST_LOGIN_MODES:
+        recorder = LastLoginRecorder(mode=mode)
+        logins = itertools.cycle(users)
+        result = measure(mode, lambda recorder=recorder, logins=logins: recorder.record(
+            next(logins)), iterations)
+        recorder.flush()
+        result["label"] += f" ({recorder.stats()['coalesced']} coalesced)"
+        results.append(result)
+    return results
+
+
+@benchmark("metrics")
+def bench_metrics(iterations, concurrency=1):
+    """
+    Measures the instrumentation overhead: a timed function against the
+    bare one with metrics disabled, and the JWKS view, which runs no query
+    nor password hash, with metrics disabled and enabled.
+    """
+    def noop():
+        return None
+
+    timed_noop = timed("noop")(noop)
+    url = reverse("jwks")
+
+    def view(client):
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+
+    enabled = metrics.enabled
+    try:
+        metrics.enabled = False
+        results = [
+            measure("bare function", noop, iterations * 100),
+            measure("timed function, disabled", timed_noop, iterations * 100),
+        ]
+        with override_settings(ALLOWED_HOSTS=["testserver"]):
+            client = Client()
+            results.append(measure("view, metrics disabled", lambda: view(client), iterations))
+
+            metrics.enabled = True
+            connection.execute_wrappers.append(observe_query)
+            client = Client()
+            results.append(measure("view, metrics enabled", lambda: view(client), iterations))
+    finally:
+        metrics.enabled = enabled
+        if observe_query in connection.execute_wrappers:
+            connection.execute_wrappers.remove(observe_query)
+        metrics.clear()
+    return results
+
+
+class PrecheckRegistrationSerializer(UserRegistrationSerializer):
+    """
+    Registration serializer looking the email up before the INSERT, as the
+    UniqueValidator did, for comparison.
+    """
+
+    def validate_email(self, value):
+        """
+        Rejects an email already taken, found with a SELECT.
+        """
+        if User.objects.filter(email_lookup(value)).exists():
+            raise serializers.ValidationError("user with this Email already exists.")
+        return value
+
+
+@benchmark("register")
+def bench_register(iterations, concurrency=1):
+    """
+    Compares registrations/sec of the constraint backed pipeline and of one
+    looking the email up first, then measures the rejected registrations:
+    a taken email, which costs a hash and a failed INSERT, and a weak
+    password, rejected before hashing.
+    """
+    counter = itertools.count()
+    taken = create_benchmark_user().email
+
+    def register(serializer_class, email=None, password=BENCHMARK_PASSWORD, created=True):
+        serializer = serializer_class(data={
+            "name": "Benchmark",
+            "email": email or f"benchmark-register-{next(counter)}@example.com",
+            "password": password,
+            "password2": password,
+            "terms_conditions": True,
+        })
+        try:
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        except serializers.ValidationError:
+            assert not created
+        else:
+            assert created
+
+    return [
+        measure("new email, pre-check SELECT",
+                lambda: register(PrecheckRegistrationSerializer), iterations),
+        measure("new email, unique constraint",
+                lambda: register(UserRegistrationSerializer), iterations),
+        measure("taken email", lambda: register(
+            UserRegistrationSerializer, taken, created=False), iterations),
+        measure("weak password", lambda: register(
+            UserRegistrationSerializer, password="12345678", created=False), iterations),
+    ]
+
+
+@benchmark("throttle")
+def bench_throttle(iterations, concurrency=1):
+    """
+    Compares failed logins paying a password hash each with failed logins
+    rejected by the login throttles, and reports the hashes avoided.
+    """
+    user = create_benchmark_user()
+    credentials = {"email": user.email, "password": "wrong"}
+    client = Client()
+    url = reverse("login")
+
+    def login(expected):
+        response = client.post(url, credentials)
+        assert response.status_code == expected, response.content
+
+    with override_settings(ALLOWED_HOSTS=["testserver"]):
+        with without_throttling():
+            unthrottled = measure("unthrottled failed login",
+                                  lambda: login(401), iterations)
+
+        cache.clear()
+        # Exhaust the window so every measured request is rejected.
+        while client.post(url, credentials).status_code != 429:
+            pass
+        throttle_stats.clear()
+        throttled = measure("throttled failed login", lambda: login(429), iterations)
+
+    cache.clear()
+    throttled["label"] += f" ({throttle_stats.stats().get('hashes_avoided', 0)} hashes avoided)"
+    return [unthrottled, throttled]
+
+
+def legacy_render(data):
+    """
+    The former UserRenderer.render, scanning str(data) for ErrorDetail.
+    """
+    if "ErrorDetail" in str(data):
+        return json.dumps({"errors": data})
+    return json.dumps(data)
+
+
+@benchmark("renderer")
+def bench_renderer(iterations, concurrency=1):
+    """
+    Compares the former str(data) scanning renderer with UserRenderer using
+    the stdlib and orjson encoders, on a small and a large payload. The orjson
+    encoder is skipped when orjson is not installed.
+    """
+    payloads = {
+        "small": {"token": {"refresh": "r" * 200, "access": "a" * 200},
+                  "message": "Logged in!"},
+        "large": {f"field{index}": [ErrorDetail("This field is required.", "required")]
+                  for index in range(2000)},
+    }
+    response = Response(status=422)
+    context = {"response": response}
+    encoders = (json_dumps,) if orjson is None else (json_dumps, orjson_dumps)
+
+    results = []
+    for size, data in payloads.items():
+        response.status_code = 200 if size == "small" else 422
+        results.append(measure(f"legacy renderer, {size}",
+                               lambda data=data: legacy_render(data), iterations))
+        for dumps in encoders:
+            renderer = UserRenderer()
+            renderer.dumps = dumps
+            results.append(measure(
+                f"UserRenderer {dumps.__name__}, {size}",
+                lambda data=data, renderer=renderer: renderer.render(
+                    data, renderer_context=context),
+                iterations))
+    if orjson is None:
+        results.append({"label": "UserRenderer orjson_dumps, not installed",
+                        "ops": None, "queries": None})
+    return results
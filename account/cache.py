@@ -0,0 +1,538 @@
+"""
+User cache module.
+"""
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+
+DEFAULT_USER_CACHE = {
+    "MAXSIZE": 1024,
+    "CACHE_ALIAS": None,
+    "TIMEOUT": 300,
+    "LOCAL_TIMEOUT": 5,
+}
+
+DEFAULT_TOKEN_CACHE = {
+    "MAXSIZE": 4096,
+}
+
+DEFAULT_PASSWORD_VERSIONS = {
+    "CACHE_ALIAS": None,
+    "TIMEOUT": 86400,
+    "LOCAL_TIMEOUT": 5,
+}
+
+
+class UserCache:
+    """
+    Per-process LRU of users, optionally backed by a shared Django cache.
+    ...
+    Users are cached by id, emails only point to an id so a single entry has
+    to be invalidated when a user changes. Invalidating only reaches this
+    process and the shared cache, so local entries expire after local_timeout
+    seconds: a user changed by another process, its password hash or
+    is_active flag, is read again within that delay.
+
+    Methods:
+        get_by_id(user_id):
+            Returns the user with the given id.
+
+        get_by_email(email):
+            Returns the user with the given email.
+
+        invalidate(user):
+            Drops the cached entries of the given user.
+
+        clear():
+            Drops every cached entry and resets the counters.
+
+        stats():
+            Returns the hit/miss counters and the LRU size.
+    """
+
+    timer = time.monotonic
+
+    def __init__(self, maxsize=1024, cache_alias=None, timeout=300, local_timeout=5):
+        self.maxsize = maxsize
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.local_timeout = local_timeout
+        self._users = OrderedDict()
+        self._emails = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        """
+        Returns the shared Django cache, if one is configured.
+        """
+        if self.cache_alias is None:
+            return None
+        return caches[self.cache_alias]
+
+    @staticmethod
+    def id_key(user_id):
+        """
+        Returns the shared cache key of a user id.
+        """
+        return f"account:user:id:{user_id}"
+
+    @staticmethod
+    def email_key(email):
+        """
+        Returns the shared cache key of an email.
+        """
+        digest = hashlib.sha1(email.lower().encode("utf-8")).hexdigest()
+        return f"account:user:email:{digest}"
+
+    def get_by_id(self, user_id):
+        """
+        Returns the user with the given id.
+        Raises User.DoesNotExist if there is no such user.
+        """
+        user = self._get_cached(user_id)
+        if user is not None:
+            return user
+
+        with self._lock:
+            self.misses += 1
+        user = get_user_model().objects.get(pk=user_id)
+        self.set(user)
+        return user
+
+    def get_by_email(self, email):
+        """
+        Returns the user with the given email, whatever its case.
+        Raises User.DoesNotExist if there is no such user.
+        """
+        with self._lock:
+            user_id = self._emails.get(email.lower())
+        if user_id is None and self.shared is not None:
+            user_id = self.shared.get(self.email_key(email))
+
+        if user_id is not None:
+            user = self._get_cached(user_id)
+            if user is not None and user.email.lower() == email.lower():
+                return user
+
+        with self._lock:
+            self.misses += 1
+        user = get_user_model().objects.get_by_email(email)
+        self.set(user)
+        return user
+
+    def set(self, user):
+        """
+        Stores a copy of the given user.
+        """
+        user = copy.copy(user)
+        with self._lock:
+            self._store(user)
+
+        if self.shared is not None:
+            self.shared.set_many({
+                self.id_key(user.pk): user,
+                self.email_key(user.email): user.pk,
+            }, self.timeout)
+
+    def invalidate(self, user):
+        """
+        Drops the cached entries of the given user.
+        """
+        with self._lock:
+            cached = self._users.pop(user.pk, None)
+            if cached is not None:
+                self._emails.pop(cached[0].email.lower(), None)
+            self._emails.pop(user.email.lower(), None)
+
+        if self.shared is not None:
+            self.shared.delete_many([
+                self.id_key(user.pk), self.email_key(user.email)])
+
+    def clear(self):
+        """
+        Drops every entry of the local LRU and resets the counters.
+        """
+        with self._lock:
+            self._users.clear()
+            self._emails.clear()
+            self.hits = self.shared_hits = self.misses = 0
+
+    def stats(self):
+        """
+        Returns the hit/miss counters and the LRU size.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "size": len(self._users),
+                "maxsize": self.maxsize,
+            }
+
+    def _get_cached(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                user, expires = entry
+                if expires > self.timer():
+                    self._users.move_to_end(user_id)
+                    self.hits += 1
+                    return copy.copy(user)
+                del self._users[user_id]
+                if self._emails.get(user.email.lower()) == user_id:
+                    del self._emails[user.email.lower()]
+
+        if self.shared is None:
+            return None
+
+        user = self.shared.get(self.id_key(user_id))
+        if user is None:
+            return None
+
+        with self._lock:
+            self.shared_hits += 1
+            self._store(copy.copy(user))
+        return user
+
+    def _store(self, user):
+        self._users[user.pk] = (user, self.timer() + self.local_timeout)
+        self._users.move_to_end(user.pk)
+        self._emails[user.email.lower()] = user.pk
+
+        while len(self._users) > self.maxsize:
+            _, (evicted, _) = self._users.popitem(last=False)
+            if self._emails.get(evicted.email.lower()) == evicted.pk:
+                del self._emails[evicted.email.lower()]
+
+
+class PasswordVersionCache:
+    """
+    Map of user ids to their current password version.
+    ...
+    Tokens carry the password version of their user when issued, a token
+    whose version is older than the current one was issued before a password
+    change. Versions are read from the database on a miss only, and written
+    when a user is saved, so checking a token costs a single lookup.
+
+    Without a cache alias the versions are kept per process for local_timeout
+    seconds only, so a password change made by another process rejects the
+    older tokens here within that delay. A cache alias must name a cache
+    shared by every process, such as Redis or memcached, its entries are then
+    kept for timeout seconds.
+
+    Inactive users have no version, like deleted ones, so deactivating a user
+    rejects its tokens as a password change does.
+
+    Methods:
+        get(user_id):
+            Returns the current password version of the user.
+
+        aget(user_id):
+            Async version of get.
+
+        set(user_id, version):
+            Stores the current password version of the user.
+
+        invalidate(user_id):
+            Drops the password version of the user.
+
+        invalidate_many(user_ids):
+            Drops the password versions of the users.
+
+        clear():
+            Drops every local entry and resets the counters.
+
+        stats():
+            Returns the hit/miss counters.
+    """
+    timer = time.monotonic
+
+    def __init__(self, cache_alias=None, timeout=86400, local_timeout=5):
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.local_timeout = local_timeout
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        """
+        Returns the shared Django cache holding the versions, if one is
+        configured.
+        """
+        if self.cache_alias is None:
+            return None
+        return caches[self.cache_alias]
+
+    @staticmethod
+    def key(user_id):
+        """
+        Returns the cache key of the user password version.
+        """
+        return f"account:user:pwv:{user_id}"
+
+    def get(self, user_id):
+        """
+        Returns the current password version of the user, None if there is
+        no such active user.
+        """
+        version = self._cached(user_id)
+        if self._counted(version) is not None:
+            return version
+
+        version = get_user_model().objects.filter(pk=user_id, is_active=True).values_list(
+            "password_version", flat=True).first()
+        if version is not None:
+            self._add(user_id, version)
+        return version
+
+    async def aget(self, user_id):
+        """
+        Async version of get.
+        """
+        if self.cache is None:
+            version = self._cached(user_id)
+        else:
+            version = await self.cache.aget(self.key(user_id))
+        if self._counted(version) is not None:
+            return version
+
+        version = await get_user_model().objects.filter(
+            pk=user_id, is_active=True).values_list(
+            "password_version", flat=True).afirst()
+        if version is not None:
+            if self.cache is None:
+                self._add(user_id, version)
+            else:
+                await self.cache.aadd(self.key(user_id), version, self.timeout)
+        return version
+
+    def set(self, user_id, version):
+        """
+        Stores the current password version of the user.
+        """
+        if self.cache is None:
+            with self._lock:
+                self._versions[user_id] = (version, self.timer() + self.local_timeout)
+        else:
+            self.cache.set(self.key(user_id), version, self.timeout)
+
+    def invalidate(self, user_id):
+        """
+        Drops the password version of the user, read again on the next get.
+        """
+        self.invalidate_many([user_id])
+
+    def invalidate_many(self, user_ids):
+        """
+        Drops the password versions of the users with one cache call.
+        """
+        if self.cache is None:
+            with self._lock:
+                for user_id in user_ids:
+                    self._versions.pop(user_id, None)
+        else:
+            self.cache.delete_many([self.key(user_id) for user_id in user_ids])
+
+    def clear(self):
+        """
+        Drops every local entry and resets the counters.
+        """
+        with self._lock:
+            self._versions.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        """
+        Returns the hit/miss counters.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def _cached(self, user_id):
+        if self.cache is not None:
+            return self.cache.get(self.key(user_id))
+
+        with self._lock:
+            entry = self._versions.get(user_id)
+            if entry is None:
+                return None
+            version, expires = entry
+            if expires <= self.timer():
+                del self._versions[user_id]
+                return None
+            return version
+
+    def _add(self, user_id, version):
+        # add() so a version stored by a concurrent save is not overwritten
+        # with the one just read.
+        if self.cache is not None:
+            self.cache.add(self.key(user_id), version, self.timeout)
+            return
+        with self._lock:
+            self._versions.setdefault(user_id, (version, self.timer() + self.local_timeout))
+
+    def _counted(self, version):
+        with self._lock:
+            if version is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return version
+
+
+class TokenCache:
+    """
+    Per-process LRU of validated tokens keyed by the digest of the raw token.
+    ...
+    A hit skips decoding and verifying the signature of a token that was
+    already validated, entries expire with the exp claim of their token.
+    A maxsize of 0 disables the cache.
+
+    Methods:
+        get(raw_token):
+            Returns the validated token, None on a miss.
+
+        set(raw_token, validated_token):
+            Stores the validated token until it expires.
+
+        clear():
+            Drops every entry and resets the counters.
+
+        stats():
+            Returns the hit/miss/eviction counters and the LRU size.
+    """
+    timer = time.time
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    @staticmethod
+    def digest(raw_token):
+        """
+        Returns the key of the raw token.
+        """
+        if isinstance(raw_token, str):
+            raw_token = raw_token.encode("utf-8")
+        return hashlib.sha256(raw_token).digest()
+
+    def get(self, raw_token):
+        """
+        Returns the validated token of the raw token if it is cached and has
+        not expired, None otherwise.
+        """
+        if not self.maxsize:
+            return None
+
+        key = self.digest(raw_token)
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            validated_token, exp = entry
+            if exp <= self.timer():
+                del self._tokens[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._tokens.move_to_end(key)
+            self.hits += 1
+            return validated_token
+
+    def set(self, raw_token, validated_token):
+        """
+        Stores the validated token until its exp claim.
+        """
+        if not self.maxsize:
+            return
+
+        key = self.digest(raw_token)
+        with self._lock:
+            self._tokens[key] = (validated_token, validated_token["exp"])
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.maxsize:
+                self._tokens.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """
+        Drops every entry and resets the counters.
+        """
+        with self._lock:
+            self._tokens.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        """
+        Returns the hit/miss/eviction/expiration counters and the LRU size.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "size": len(self._tokens),
+                "maxsize": self.maxsize,
+            }
+
+
+def build_user_cache():
+    """
+    Builds the user cache from the ACCOUNT_USER_CACHE setting.
+    """
+    options = {**DEFAULT_USER_CACHE, **getattr(settings, "ACCOUNT_USER_CACHE", {})}
+    return UserCache(
+        maxsize=options["MAXSIZE"],
+        cache_alias=options["CACHE_ALIAS"],
+        timeout=options["TIMEOUT"],
+        local_timeout=options["LOCAL_TIMEOUT"],
+    )
+
+
+user_cache = build_user_cache()
+
+
+def build_token_cache():
+    """
+    Builds the validated token cache from the ACCOUNT_TOKEN_CACHE setting.
+    """
+    options = {**DEFAULT_TOKEN_CACHE, **getattr(settings, "ACCOUNT_TOKEN_CACHE", {})}
+    return TokenCache(maxsize=options["MAXSIZE"])
+
+
+token_cache = build_token_cache()
+
+
+def build_password_versions():
+    """
+    Builds the password version cache from the ACCOUNT_PASSWORD_VERSIONS setting.
+    """
+    options = {**DEFAULT_PASSWORD_VERSIONS,
+               **getattr(settings, "ACCOUNT_PASSWORD_VERSIONS", {})}
+    return PasswordVersionCache(
+        cache_alias=options["CACHE_ALIAS"],
+        timeout=options["TIMEOUT"],
+        local_timeout=options["LOCAL_TIMEOUT"],
+    )
+
+
+password_versions = build_password_versions()
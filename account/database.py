@@ -0,0 +1,51 @@
+"""
+Database connection tuning module.
+...
+SQLite serializes writers on a database lock, and with the default rollback
+journal readers block on it too, so concurrent logins, which all write
+last_login, queue behind each other. Every new SQLite connection is therefore
+switched to the journal mode and synchronous level of the ACCOUNT_SQLITE
+setting, WAL and NORMAL by default, letting readers proceed during a write.
+Writers still wait for each other, up to the busy timeout set by the
+database OPTIONS. Connections to other databases are left untouched.
+"""
+from django.conf import settings
+
+DEFAULT_SQLITE = {
+    "JOURNAL_MODE": "WAL",
+    "SYNCHRONOUS": "NORMAL",
+}
+
+
+def sqlite_pragmas():
+    """
+    Returns the PRAGMA statements run on every new SQLite connection.
+    """
+    options = {**DEFAULT_SQLITE, **getattr(settings, "ACCOUNT_SQLITE", {})}
+    return [
+        f"PRAGMA journal_mode={options['JOURNAL_MODE']}",
+        f"PRAGMA synchronous={options['SYNCHRONOUS']}",
+    ]
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    connection_created receiver applying the SQLite pragmas.
+    """
+    # pylint: disable=unused-argument
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+
+
+def journal_mode(connection):
+    """
+    Returns the database vendor and, for SQLite, its journal mode.
+    """
+    if connection.vendor != "sqlite":
+        return connection.vendor
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA journal_mode")
+        return f"sqlite {cursor.fetchone()[0]}"
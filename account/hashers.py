@@ -0,0 +1,113 @@
+"""
+Password hashers module.
+...
+The hashers read their cost parameters from the ACCOUNT_PASSWORD_HASHING
+setting. Changing a parameter makes must_update() true for existing hashes, so
+they are transparently rehashed the next time the user logs in.
+"""
+from django.conf import settings
+from django.contrib.auth import hashers
+
+DEFAULT_PASSWORD_HASHING = {
+    "PBKDF2_ITERATIONS": hashers.PBKDF2PasswordHasher.iterations,
+    "ARGON2_TIME_COST": hashers.Argon2PasswordHasher.time_cost,
+    "ARGON2_MEMORY_COST": hashers.Argon2PasswordHasher.memory_cost,
+    "ARGON2_PARALLELISM": hashers.Argon2PasswordHasher.parallelism,
+    "BCRYPT_ROUNDS": hashers.BCryptSHA256PasswordHasher.rounds,
+    "SCRYPT_WORK_FACTOR": hashers.ScryptPasswordHasher.work_factor,
+    "SCRYPT_BLOCK_SIZE": hashers.ScryptPasswordHasher.block_size,
+    "SCRYPT_PARALLELISM": hashers.ScryptPasswordHasher.parallelism,
+}
+
+
+def hashing_option(name):
+    """
+    Returns a cost parameter from the ACCOUNT_PASSWORD_HASHING setting.
+    """
+    options = getattr(settings, "ACCOUNT_PASSWORD_HASHING", {})
+    return options.get(name, DEFAULT_PASSWORD_HASHING[name])
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    PBKDF2 hasher with a configurable number of iterations.
+    """
+
+    @property
+    def iterations(self):
+        """
+        Returns the configured number of iterations.
+        """
+        return hashing_option("PBKDF2_ITERATIONS")
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """
+    Argon2 hasher with configurable time, memory and parallelism costs.
+    Requires the argon2-cffi package.
+    """
+
+    @property
+    def time_cost(self):
+        """
+        Returns the configured number of passes.
+        """
+        return hashing_option("ARGON2_TIME_COST")
+
+    @property
+    def memory_cost(self):
+        """
+        Returns the configured memory cost in KiB.
+        """
+        return hashing_option("ARGON2_MEMORY_COST")
+
+    @property
+    def parallelism(self):
+        """
+        Returns the configured number of lanes.
+        """
+        return hashing_option("ARGON2_PARALLELISM")
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """
+    BCrypt hasher with a configurable log2 number of rounds.
+    Requires the bcrypt package.
+    """
+
+    @property
+    def rounds(self):
+        """
+        Returns the configured log2 number of rounds.
+        """
+        return hashing_option("BCRYPT_ROUNDS")
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """
+    Scrypt hasher with configurable work factor, block size and parallelism.
+    """
+    # Upper bound for hashlib.scrypt, OpenSSL refuses anything above 32 MiB
+    # by default, which rules out work factors above 2 ** 14.
+    maxmem = 2 ** 30
+
+    @property
+    def work_factor(self):
+        """
+        Returns the configured CPU/memory cost.
+        """
+        return hashing_option("SCRYPT_WORK_FACTOR")
+
+    @property
+    def block_size(self):
+        """
+        Returns the configured block size.
+        """
+        return hashing_option("SCRYPT_BLOCK_SIZE")
+
+    @property
+    def parallelism(self):
+        """
+        Returns the configured parallelism.
+        """
+        return hashing_option("SCRYPT_PARALLELISM")
@@ -0,0 +1,190 @@
+"""
+Password hashing service module.
+...
+Hashing runs on a bounded executor instead of the request thread, so at most
+max_workers hashes use the CPU at once while the remaining request workers
+stay responsive. Hashers releasing the GIL run on a thread pool, the others on
+a process pool.
+"""
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, get_hasher, make_password
+
+DEFAULT_HASHING_POOL = {
+    "ENABLED": True,
+    "MAX_WORKERS": None,
+}
+
+# Algorithms whose hashing runs in C code that releases the GIL.
+GIL_RELEASING_ALGORITHMS = {
+    "pbkdf2_sha256", "pbkdf2_sha1", "argon2", "bcrypt_sha256", "bcrypt", "scrypt",
+}
+
+
+def hash_password(raw_password):
+    """
+    Returns the hash of the raw password with the preferred hasher.
+    """
+    return make_password(raw_password)
+
+
+def verify_password(raw_password, encoded):
+    """
+    Returns whether the raw password matches the hash and whether the hash
+    must be upgraded to the preferred hasher or cost.
+    """
+    updates = []
+    is_correct = check_password(raw_password, encoded, setter=updates.append)
+    return is_correct, bool(updates)
+
+
+def setup_worker(settings_module):
+    """
+    Configures Django in a spawned process pool worker.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", settings_module)
+    django.setup()
+
+
+class HashingService:
+    """
+    Runs password hashing on a bounded thread or process pool.
+    ...
+    Methods:
+        make_password(raw_password):
+            Returns the hash of the raw password.
+
+        verify_password(raw_password, encoded):
+            Returns whether the password is correct and must be rehashed.
+
+        make_passwords(raw_passwords):
+            Returns the hashes of the raw passwords, hashed in parallel.
+
+        amake_password(raw_password):
+            Async version of make_password.
+
+        averify_password(raw_password, encoded):
+            Async version of verify_password.
+
+        stats():
+            Returns the queue depth and completion counters.
+    """
+
+    def __init__(self, max_workers=None, enabled=True):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.enabled = enabled
+        self._thread_pool = None
+        self._process_pool = None
+        self._lock = threading.Lock()
+        self._pending = set()
+        self.submitted = 0
+        self.peak_queue_depth = 0
+
+    def make_password(self, raw_password):
+        """
+        Returns the hash of the raw password.
+        """
+        if not self.enabled:
+            return hash_password(raw_password)
+        return self._submit(hash_password, raw_password).result()
+
+    def make_passwords(self, raw_passwords):
+        """
+        Returns the hashes of the raw passwords, in order, submitting them all
+        at once so they are spread over every worker.
+        """
+        if not self.enabled:
+            return [hash_password(raw_password) for raw_password in raw_passwords]
+        futures = [self._submit(hash_password, raw_password)
+                   for raw_password in raw_passwords]
+        return [future.result() for future in futures]
+
+    def verify_password(self, raw_password, encoded):
+        """
+        Returns whether the raw password matches the hash and whether the hash
+        must be upgraded.
+        """
+        if not self.enabled:
+            return verify_password(raw_password, encoded)
+        return self._submit(verify_password, raw_password, encoded).result()
+
+    async def amake_password(self, raw_password):
+        """
+        Returns the hash of the raw password without blocking the event loop.
+        """
+        if not self.enabled:
+            return hash_password(raw_password)
+        return await asyncio.wrap_future(self._submit(hash_password, raw_password))
+
+    async def averify_password(self, raw_password, encoded):
+        """
+        Async version of verify_password.
+        """
+        if not self.enabled:
+            return verify_password(raw_password, encoded)
+        return await asyncio.wrap_future(
+            self._submit(verify_password, raw_password, encoded))
+
+    def stats(self):
+        """
+        Returns the number of hashes in flight, waiting for a worker, the
+        peak number waiting and the number completed.
+        """
+        with self._lock:
+            in_flight = sum(1 for future in self._pending if not future.done())
+            return {
+                "max_workers": self.max_workers,
+                "in_flight": in_flight,
+                "queue_depth": max(0, in_flight - self.max_workers),
+                "peak_queue_depth": self.peak_queue_depth,
+                "completed": self.submitted - in_flight,
+            }
+
+    def executor(self):
+        """
+        Returns the pool suited to the preferred hasher.
+        """
+        with self._lock:
+            if get_hasher().algorithm in GIL_RELEASING_ALGORITHMS:
+                if self._thread_pool is None:
+                    self._thread_pool = ThreadPoolExecutor(
+                        self.max_workers, thread_name_prefix="hashing")
+                return self._thread_pool
+
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    self.max_workers, initializer=setup_worker,
+                    initargs=(os.environ.get("DJANGO_SETTINGS_MODULE", ""),))
+            return self._process_pool
+
+    def _submit(self, func, *args):
+        future = self.executor().submit(func, *args)
+        with self._lock:
+            self._pending.add(future)
+            self.submitted += 1
+            self.peak_queue_depth = max(
+                self.peak_queue_depth, len(self._pending) - self.max_workers)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+
+def build_hashing_service():
+    """
+    Builds the hashing service from the ACCOUNT_HASHING_POOL setting.
+    """
+    options = {**DEFAULT_HASHING_POOL, **getattr(settings, "ACCOUNT_HASHING_POOL", {})}
+    return HashingService(
+        max_workers=options["MAX_WORKERS"],
+        enabled=options["ENABLED"],
+    )
+
+
+hashing_service = build_hashing_service()
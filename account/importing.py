@@ -0,0 +1,235 @@
+"""
+User import module.
+...
+Imports users in bulk from CSV or JSON lines, for migrations from other
+systems. Rows are validated a chunk at a time by a list serializer that looks
+up the existing emails of the whole chunk with one query, the passwords of a
+chunk are hashed in parallel on the hashing service pool and the users are
+written with bulk_create. Rows may carry a password already hashed by one of
+the configured hashers, which is stored as is.
+"""
+import csv
+import json
+import time
+from itertools import islice
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher
+from django.db import IntegrityError, transaction
+from rest_framework import serializers
+from account.hashing import hashing_service
+from account.models import User
+
+DEFAULT_IMPORT = {
+    "BATCH_SIZE": 500,
+}
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+
+def read_rows(stream, file_format):
+    """
+    Yields the rows of a CSV, with a header line, or a JSON lines text stream.
+    """
+    if file_format == "csv":
+        yield from csv.DictReader(stream)
+        return
+
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError:
+            # Reported as an invalid row by the serializer.
+            yield line
+
+
+def chunked(iterable, size):
+    """
+    Yields lists of at most size items of the iterable.
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class UserImportListSerializer(serializers.ListSerializer):
+    """
+    Validates and creates a chunk of imported users.
+    ...
+    Invalid rows don't fail the chunk, their errors are kept in row_errors by
+    index and the remaining rows are created.
+
+    Methods:
+        to_internal_value(data):
+            Returns the valid rows, not clashing with existing users.
+
+        create(validated_data):
+            Hashes the passwords in parallel and bulk creates the users.
+    """
+    # pylint: disable=abstract-method
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.row_errors = {}
+
+    def to_internal_value(self, data):
+        self.row_errors = {}
+        valid = []
+        for index, item in enumerate(data):
+            try:
+                valid.append((index, self.child.run_validation(item)))
+            except serializers.ValidationError as exc:
+                self.row_errors[index] = exc.detail
+
+        existing = {email.lower() for email in User.objects.filter_emails(
+            [attrs["email"] for _, attrs in valid]
+        ).values_list("email", flat=True)}
+
+        rows = []
+        for index, attrs in valid:
+            if attrs["email"].lower() in existing:
+                self.row_errors[index] = {
+                    "email": ["user with this Email already exists."]}
+                continue
+            existing.add(attrs["email"].lower())
+            rows.append(attrs)
+        return rows
+
+    def create(self, validated_data):
+        hashes = iter(hashing_service.make_passwords(
+            [attrs["password"] for attrs in validated_data if "password" in attrs]))
+
+        users = [
+            User(
+                email=attrs["email"],
+                name=attrs["name"],
+                terms_conditions=attrs["terms_conditions"],
+                is_admin=attrs["is_admin"],
+                password=next(hashes) if "password" in attrs else attrs["password_hash"],
+                # As set once by set_password on registration.
+                password_version=1,
+            )
+            for attrs in validated_data
+        ]
+        return User.objects.bulk_create(
+            users, batch_size=self.context.get("batch_size"))
+
+
+class UserImportSerializer(serializers.Serializer):
+    """
+    Serializes an imported user row.
+    ...
+    Methods:
+        validate_email(value):
+            Normalizes the email like UserManager.create_user.
+
+        validate_password_hash(value):
+            Validates that the hash belongs to a configured hasher.
+
+        validate(attrs):
+            Validates that exactly one of password and password_hash is given.
+    """
+    # pylint: disable=abstract-method
+    email = serializers.EmailField(max_length=255)
+    name = serializers.CharField(max_length=200)
+    terms_conditions = serializers.BooleanField()
+    is_admin = serializers.BooleanField(default=False)
+    password = serializers.CharField(
+        max_length=128, required=False, allow_blank=True, write_only=True)
+    password_hash = serializers.CharField(
+        max_length=128, required=False, allow_blank=True, write_only=True)
+
+    class Meta:
+        list_serializer_class = UserImportListSerializer
+
+    def validate_email(self, value):
+        """
+        Normalizes the email domain.
+        """
+        return User.objects.normalize_email(value)
+
+    def validate_password_hash(self, value):
+        """
+        Validates that the hash was made by one of the PASSWORD_HASHERS.
+        """
+        if value:
+            try:
+                identify_hasher(value)
+            except ValueError as exc:
+                raise serializers.ValidationError(
+                    "Unknown password hashing algorithm.") from exc
+        return value
+
+    def validate(self, attrs):
+        # Blank CSV cells stand for a missing value.
+        for field in ("password", "password_hash"):
+            if not attrs.get(field):
+                attrs.pop(field, None)
+
+        if ("password" in attrs) == ("password_hash" in attrs):
+            raise serializers.ValidationError(
+                "Either password or password_hash is required.")
+        return attrs
+
+
+class UserImporter:
+    """
+    Imports rows of user data a chunk at a time.
+    ...
+    Methods:
+        import_rows(rows):
+            Imports the rows and returns the import report.
+
+        import_chunk(rows):
+            Creates the valid users of a chunk and returns the row errors.
+    """
+
+    def __init__(self, batch_size=None):
+        options = {**DEFAULT_IMPORT, **getattr(settings, "ACCOUNT_IMPORT", {})}
+        self.batch_size = batch_size or options["BATCH_SIZE"]
+
+    def import_rows(self, rows):
+        """
+        Imports the rows, reporting the created and failed counts, the errors
+        by row number from 1, and the throughput.
+        """
+        report = {"created": 0, "failed": 0, "errors": []}
+        start = time.perf_counter()
+        row_number = 1
+
+        for chunk in chunked(rows, self.batch_size):
+            created, row_errors = self.import_chunk(chunk)
+            report["created"] += created
+            report["failed"] += len(row_errors)
+            report["errors"].extend(
+                {"row": row_number + index, "errors": errors}
+                for index, errors in sorted(row_errors.items()))
+            row_number += len(chunk)
+
+        report["seconds"] = time.perf_counter() - start
+        report["rows_per_sec"] = (row_number - 1) / report["seconds"] \
+            if report["seconds"] else 0.0
+        return report
+
+    def import_chunk(self, rows):
+        """
+        Creates the valid users of the rows and returns how many were created
+        and the row errors by index.
+        """
+        context = {"batch_size": self.batch_size}
+        # Built as many=True would, naming the class that keeps row_errors.
+        serializer = UserImportListSerializer(
+            child=UserImportSerializer(), data=rows, context=context)
+        serializer.is_valid(raise_exception=True)
+        try:
+            with transaction.atomic():
+                users = serializer.save()
+        except IntegrityError:
+            # An email was taken since the chunk was validated, validate again.
+            serializer = UserImportListSerializer(
+                child=UserImportSerializer(), data=rows, context=context)
+            serializer.is_valid(raise_exception=True)
+            with transaction.atomic():
+                users = serializer.save()
+        return len(users), serializer.row_errors
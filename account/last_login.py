@@ -0,0 +1,248 @@
+"""
+Last login module.
+...
+Logins record last_login through the recorder of the ACCOUNT_LAST_LOGIN
+setting, whose MODE is one of:
+
+    "always": one UPDATE per login.
+    "granularity": an UPDATE only when the stored value is older than
+        GRANULARITY seconds, checked in memory first and then by the UPDATE
+        itself, so repeated logins of a user write at most once per period.
+    "buffer": timestamps are kept in memory and written every FLUSH_INTERVAL
+        seconds with one bulk UPDATE by a background thread, and at exit,
+        losing at most that interval of logins if the process is killed.
+    "off": last_login is never written, the default.
+
+Logins that did not issue their own UPDATE are counted as coalesced.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from account.models import User
+
+DEFAULT_LAST_LOGIN = {
+    "MODE": "off",
+    "GRANULARITY": 3600,
+    "FLUSH_INTERVAL": 60,
+    "MAXSIZE": 4096,
+}
+
+LAST_LOGIN_MODES = ("always", "granularity", "buffer", "off")
+
+# Rows per UPDATE statement of a buffer flush.
+FLUSH_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+class LastLoginRecorder:
+    """
+    Records the last login of users, coalescing the writes.
+    ...
+    Methods:
+        record(user):
+            Records a login of the user.
+
+        arecord(user):
+            Async version of record.
+
+        flush():
+            Writes the buffered logins.
+
+        aflush():
+            Async version of flush.
+
+        stop():
+            Stops the background flushes.
+
+        clear():
+            Drops the buffered logins and resets the counters.
+
+        stats():
+            Returns the login, write and coalesced counters.
+    """
+
+    def __init__(self, mode="granularity", granularity=3600, flush_interval=60, maxsize=4096,
+                 background=False):
+        if mode not in LAST_LOGIN_MODES:
+            raise ValueError(f"Unknown last login mode {mode!r}.")
+        self.mode = mode
+        self.granularity = timedelta(seconds=granularity)
+        self.flush_interval = flush_interval
+        self.maxsize = maxsize
+        self.background = background
+        self._flusher = None
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._written = OrderedDict()
+        self._pending = {}
+        self._next_flush = time.monotonic() + flush_interval
+        self.logins = self.writes = 0
+
+    def record(self, user):
+        """
+        Records a login of the user now, writing it according to the mode.
+        """
+        now = self._login(user)
+        if self.mode == "always":
+            User.objects.filter(pk=user.pk).update(last_login=now)
+            self._wrote(1)
+        elif self.mode == "granularity":
+            if not self._recent(user, now):
+                self._stale(user, now).update(last_login=now)
+                self._wrote(1)
+                self._remember(user.pk, now)
+        elif self.mode == "buffer" and self._due():
+            self.flush()
+
+    async def arecord(self, user):
+        """
+        Async version of record, writing with the async ORM.
+        """
+        now = self._login(user)
+        if self.mode == "always":
+            await User.objects.filter(pk=user.pk).aupdate(last_login=now)
+            self._wrote(1)
+        elif self.mode == "granularity":
+            if not self._recent(user, now):
+                await self._stale(user, now).aupdate(last_login=now)
+                self._wrote(1)
+                self._remember(user.pk, now)
+        elif self.mode == "buffer" and self._due():
+            await self.aflush()
+
+    def flush(self):
+        """
+        Writes the buffered logins with one UPDATE per FLUSH_BATCH_SIZE users.
+        """
+        users = self._take_pending()
+        if users:
+            User.objects.bulk_update(users, ["last_login"], batch_size=FLUSH_BATCH_SIZE)
+            self._wrote(-(-len(users) // FLUSH_BATCH_SIZE))
+
+    async def aflush(self):
+        """
+        Async version of flush.
+        """
+        users = self._take_pending()
+        if users:
+            await User.objects.abulk_update(users, ["last_login"], batch_size=FLUSH_BATCH_SIZE)
+            self._wrote(-(-len(users) // FLUSH_BATCH_SIZE))
+
+    def stop(self):
+        """
+        Stops the background flushes, the pending logins are left buffered.
+        """
+        self._stopped.set()
+        if self._flusher is not None:
+            self._flusher.join()
+
+    def clear(self):
+        """
+        Drops the buffered and remembered logins and resets the counters.
+        """
+        with self._lock:
+            self._written.clear()
+            self._pending.clear()
+            self._next_flush = time.monotonic() + self.flush_interval
+            self.logins = self.writes = 0
+
+    def stats(self):
+        """
+        Returns the number of logins, of UPDATE statements they caused, of
+        logins coalesced into another write or skipped, and of pending ones.
+        """
+        with self._lock:
+            return {
+                "logins": self.logins,
+                "writes": self.writes,
+                "coalesced": self.logins - self.writes - len(self._pending),
+                "pending": len(self._pending),
+            }
+
+    def _login(self, user):
+        now = timezone.now()
+        user.last_login = now
+        with self._lock:
+            self.logins += 1
+            if self.mode == "buffer":
+                self._pending[user.pk] = now
+                if self.background:
+                    self._start_flusher()
+        return now
+
+    def _start_flusher(self):
+        # Started on the first buffered login, so in each forked worker.
+        if self._flusher is None or not self._flusher.is_alive():
+            self._flusher = threading.Thread(
+                target=self._flush_periodically, name="last-login-flush", daemon=True)
+            self._flusher.start()
+
+    def _flush_periodically(self):
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Could not write the buffered last logins.")
+            finally:
+                connection.close()
+
+    def _wrote(self, statements):
+        with self._lock:
+            self.writes += statements
+
+    def _recent(self, user, now):
+        with self._lock:
+            written = self._written.get(user.pk)
+        return written is not None and written > now - self.granularity
+
+    def _stale(self, user, now):
+        return User.objects.filter(pk=user.pk).filter(
+            Q(last_login__isnull=True) | Q(last_login__lte=now - self.granularity))
+
+    def _remember(self, user_id, now):
+        with self._lock:
+            self._written[user_id] = now
+            self._written.move_to_end(user_id)
+            while len(self._written) > self.maxsize:
+                self._written.popitem(last=False)
+
+    def _due(self):
+        with self._lock:
+            if time.monotonic() < self._next_flush:
+                return False
+            self._next_flush = time.monotonic() + self.flush_interval
+            return True
+
+    def _take_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return [User(pk=user_id, last_login=last_login)
+                for user_id, last_login in pending.items()]
+
+
+def build_last_login_recorder():
+    """
+    Builds the last login recorder from the ACCOUNT_LAST_LOGIN setting.
+    """
+    options = {**DEFAULT_LAST_LOGIN, **getattr(settings, "ACCOUNT_LAST_LOGIN", {})}
+    recorder = LastLoginRecorder(
+        mode=options["MODE"],
+        granularity=options["GRANULARITY"],
+        flush_interval=options["FLUSH_INTERVAL"],
+        maxsize=options["MAXSIZE"],
+        background=True,
+    )
+    if recorder.mode == "buffer":
+        atexit.register(recorder.flush)
+    return recorder
+
+
+last_logins = build_last_login_recorder()
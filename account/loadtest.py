@@ -0,0 +1,243 @@
+"""
+Load test module.
+...
+Drives the register, login, password change, reset email and password reset
+endpoints of a running server from concurrency threads over HTTP, and
+reports the throughput and latency percentiles of each. The users, and the
+reset tokens the reset links need, are created directly in the database the
+server uses, so the server must run locally against the same settings, with
+the throttle rates raised, e.g. THROTTLE_LOGIN_IP=1000000/min.
+
+Results are saved as a JSON baseline and later runs are compared with it:
+an endpoint regresses when its throughput drops, or its p95 latency grows,
+by more than the tolerance.
+"""
+import itertools
+import json
+import math
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from account.models import User
+from account.reset import create_reset_token
+
+LOADTEST_PASSWORD = "Vq7#pRm2!wZ9"
+
+ENDPOINTS = ("register", "login", "password_change", "send_reset_password_email",
+             "reset_password")
+
+
+def percentile(samples, q):
+    """
+    Returns the nearest-rank q-percentile, 0 < q <= 100, of the samples.
+    """
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def summarize(latencies, errors, elapsed):
+    """
+    Returns the result row of an endpoint, latencies in milliseconds.
+    """
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(latencies, 50) * 1000,
+        "p95": percentile(latencies, 95) * 1000,
+        "p99": percentile(latencies, 99) * 1000,
+    }
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Returns the regressions of the results against the baseline, one line
+    per endpoint whose throughput or p95 latency is worse than tolerance.
+    """
+    regressions = []
+    for endpoint, result in results.items():
+        base = baseline.get(endpoint)
+        if base is None:
+            continue
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(
+                f"{endpoint}: {result['rps']:.1f} req/s, baseline {base['rps']:.1f} req/s")
+        if result["p95"] > base["p95"] * (1 + tolerance):
+            regressions.append(
+                f"{endpoint}: p95 {result['p95']:.1f} ms, baseline {base['p95']:.1f} ms")
+    return regressions
+
+
+class LoadClient:
+    """
+    Minimal JSON HTTP client of the account API.
+    ...
+    Methods:
+        post(path, data, token):
+            Posts JSON data and returns the status and decoded body.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/") + "/"
+
+    def post(self, path, data, token=None):
+        """
+        Posts the data as JSON, with the access token if given, and returns
+        the status code and decoded body.
+        """
+        request = urllib.request.Request(
+            self.base_url + path, data=json.dumps(data).encode(), method="POST",
+            headers={"Content-Type": "application/json"})
+        if token is not None:
+            request.add_header("Authorization", "Bearer " + token)
+        try:
+            with urllib.request.urlopen(request, timeout=60) as response:
+                return response.status, json.loads(response.read() or b"{}")
+        except urllib.error.HTTPError as exc:
+            return exc.code, {}
+
+
+class LoadTest:
+    """
+    Load test of the account endpoints of a running server.
+    ...
+    Methods:
+        run(endpoints):
+            Runs the endpoints in turn and returns their result rows.
+    """
+
+    def __init__(self, base_url, iterations=200, concurrency=8):
+        if not iterations >= concurrency >= 1:
+            # Each thread sends at least one request, so every endpoint has
+            # latencies to report.
+            raise ValueError("iterations must be at least concurrency, at least 1.")
+        self.client = LoadClient(base_url)
+        self.iterations = iterations
+        self.concurrency = concurrency
+        self.prefix = f"loadtest-{uuid.uuid4().hex[:8]}-"
+        self.users = []
+
+    def run(self, endpoints=ENDPOINTS):
+        """
+        Creates one user per thread, runs each endpoint and deletes the
+        users again. Returns the result rows keyed by endpoint.
+        """
+        self.users = [User.objects.create_user(
+            email=f"{self.prefix}{index}@example.com", name="Load test",
+            terms_conditions=True, password=LOADTEST_PASSWORD)
+            for index in range(self.concurrency)]
+        try:
+            return {endpoint: self.run_endpoint(endpoint) for endpoint in endpoints}
+        finally:
+            User.objects.filter(email__startswith=self.prefix).delete()
+
+    def run_endpoint(self, endpoint):
+        """
+        Sends the iterations requests of the endpoint from the threads, each
+        thread sending its share in a row, and returns the result row. The
+        prepare function of a worker, if any, runs untimed before each request.
+        """
+        workers = [getattr(self, endpoint)(index) for index in range(self.concurrency)]
+        shares = [self.iterations // self.concurrency
+                  + (index < self.iterations % self.concurrency)
+                  for index in range(self.concurrency)]
+        latencies = []
+        errors = itertools.count()
+        lock = threading.Lock()
+
+        def work(worker, share):
+            prepare = getattr(worker, "prepare", None)
+            for _ in range(share):
+                if prepare is not None:
+                    prepare()
+                start = time.perf_counter()
+                ok = worker()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    if not ok:
+                        next(errors)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(self.concurrency) as executor:
+            list(executor.map(work, workers, shares))
+        return summarize(latencies, next(errors), time.perf_counter() - start)
+
+    def register(self, index):
+        """
+        Returns the worker registering new users.
+        """
+        counter = itertools.count()
+
+        def worker():
+            status, _ = self.client.post("register/", {
+                "email": f"{self.prefix}{index}-{next(counter)}@example.com",
+                "name": "Load test",
+                "password": LOADTEST_PASSWORD,
+                "password2": LOADTEST_PASSWORD,
+                "terms_conditions": True,
+            })
+            return status == 201
+        return worker
+
+    def login(self, index):
+        """
+        Returns the worker logging the thread user in.
+        """
+        credentials = {"email": self.users[index].email, "password": LOADTEST_PASSWORD}
+
+        def worker():
+            return self.client.post("login/", credentials)[0] == 200
+        return worker
+
+    def password_change(self, index):
+        """
+        Returns the worker changing the thread user password, with the
+        token returned by the previous change.
+        """
+        _, body = self.client.post("login/", {
+            "email": self.users[index].email, "password": LOADTEST_PASSWORD})
+        state = {"access": body.get("token", {}).get("access")}
+        passwords = {"password": LOADTEST_PASSWORD, "password2": LOADTEST_PASSWORD}
+
+        def worker():
+            status, body = self.client.post("password-change/", passwords, state["access"])
+            if status != 200:
+                return False
+            state["access"] = body["token"]["access"]
+            return True
+        return worker
+
+    def send_reset_password_email(self, index):
+        """
+        Returns the worker requesting reset emails for the thread user.
+        """
+        data = {"email": self.users[index].email}
+
+        def worker():
+            return self.client.post("send-reset-password-email/", data)[0] == 200
+        return worker
+
+    def reset_password(self, index):
+        """
+        Returns the worker resetting the thread user password, each request
+        with a new reset link, as a reset consumes every link of the user.
+        """
+        user = self.users[index]
+        uid = urlsafe_base64_encode(force_bytes(user.pk))
+        state = {}
+        passwords = {"password": LOADTEST_PASSWORD, "password2": LOADTEST_PASSWORD}
+
+        def prepare():
+            state["token"] = create_reset_token(user)
+
+        def worker():
+            path = f"reset-password/{uid}/{state['token']}/"
+            return self.client.post(path, passwords)[0] == 200
+        worker.prepare = prepare
+        return worker
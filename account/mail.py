@@ -0,0 +1,389 @@
+"""
+Outbound mail queue module.
+"""
+import atexit
+import logging
+import queue
+import smtplib
+import threading
+import time
+from collections import defaultdict
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends import smtp
+from account.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMAIL_QUEUE = {
+    "ENABLED": True,
+    "WORKERS": 1,
+    "BATCH_SIZE": 20,
+    "MAX_RETRIES": 3,
+    "BACKOFF": 2.0,
+    "SHUTDOWN_TIMEOUT": 10.0,
+}
+
+DEFAULT_SMTP_POOL = {
+    "MAXSIZE": 4,
+    "MAX_IDLE": 60.0,
+}
+
+# Errors meaning a pooled connection went stale and has to be reopened.
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError)
+
+
+class MailQueue:
+    """
+    In-process queue delivering emails from background worker threads.
+    ...
+    Workers take up to batch_size queued messages and send them over one
+    connection. A message that fails is retried after backoff * 2 ** attempt
+    seconds, up to max_retries times, then dropped and logged.
+
+    Methods:
+        enqueue(message):
+            Queues an EmailMessage for delivery.
+
+        flush(timeout):
+            Waits until every queued message is delivered or dropped.
+
+        stats():
+            Returns the queue counters.
+    """
+
+    def __init__(self, workers=1, batch_size=20, max_retries=3, backoff=2.0,
+                 shutdown_timeout=10.0):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.shutdown_timeout = shutdown_timeout
+        self._queue = queue.Queue()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self.enqueued = 0
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+
+    def enqueue(self, message):
+        """
+        Queues an EmailMessage for delivery and returns immediately.
+        """
+        with self._lock:
+            self._pending += 1
+            self.enqueued += 1
+            if not self._threads:
+                self._start()
+        self._queue.put((message, 0))
+
+    def flush(self, timeout=None):
+        """
+        Waits until every queued message is delivered or dropped.
+        Returns whether the queue was drained before the timeout.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+
+    def stats(self):
+        """
+        Returns the queue counters.
+        """
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "enqueued": self.enqueued,
+                "sent": self.sent,
+                "retried": self.retried,
+                "failed": self.failed,
+            }
+
+    def _start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"mail-queue-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        atexit.register(self.flush, self.shutdown_timeout)
+
+    def _work(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._send_batch(batch)
+
+    def _send_batch(self, batch):
+        try:
+            connection = get_connection()
+            connection.open()
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Could not open mail connection.")
+            for message, attempt in batch:
+                self._retry(message, attempt)
+            return
+
+        try:
+            for message, attempt in batch:
+                message.connection = connection
+                start = time.perf_counter()
+                try:
+                    connection.send_messages([message])
+                except Exception:  # pylint: disable=broad-except
+                    logger.exception("Could not send email to %s.", message.to)
+                    self._retry(message, attempt)
+                else:
+                    self._done(sent=True)
+                if metrics.enabled:
+                    metrics.phase("smtp", time.perf_counter() - start)
+        finally:
+            connection.close()
+
+    def _retry(self, message, attempt):
+        if attempt >= self.max_retries:
+            self._done(sent=False)
+            return
+
+        with self._lock:
+            self.retried += 1
+        timer = threading.Timer(
+            self.backoff * 2 ** attempt, self._queue.put, [(message, attempt + 1)])
+        timer.daemon = True
+        timer.start()
+
+    def _done(self, sent):
+        with self._idle:
+            self._pending -= 1
+            if sent:
+                self.sent += 1
+            else:
+                self.failed += 1
+            self._idle.notify_all()
+
+
+def build_mail_queue():
+    """
+    Builds the mail queue from the ACCOUNT_EMAIL_QUEUE setting.
+    """
+    options = {**DEFAULT_EMAIL_QUEUE, **getattr(settings, "ACCOUNT_EMAIL_QUEUE", {})}
+    return MailQueue(
+        workers=options["WORKERS"],
+        batch_size=options["BATCH_SIZE"],
+        max_retries=options["MAX_RETRIES"],
+        backoff=options["BACKOFF"],
+        shutdown_timeout=options["SHUTDOWN_TIMEOUT"],
+    )
+
+
+mail_queue = build_mail_queue()
+
+
+class SMTPConnectionPool:
+    """
+    Pool of open, authenticated SMTP connections shared by PooledSMTPBackend.
+    ...
+    Idle connections are kept per (host, port, username, use_tls, use_ssl)
+    for at most max_idle seconds.
+
+    Methods:
+        acquire(key):
+            Returns an idle connection for the key, or None.
+
+        release(key, connection):
+            Returns a connection to the pool.
+
+        clear():
+            Closes every idle connection.
+
+        record(counter):
+            Increments a connection counter.
+
+        stats():
+            Returns the pool counters.
+    """
+
+    def __init__(self, maxsize=4, max_idle=60.0):
+        self.maxsize = maxsize
+        self.max_idle = max_idle
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+        self.reconnects = 0
+        self.discarded = 0
+
+    def acquire(self, key):
+        """
+        Returns an idle connection for the key, or None if there is none.
+        """
+        stale = []
+        connection = None
+        with self._lock:
+            idle = self._idle[key]
+            while idle:
+                candidate, released_at = idle.pop()
+                if time.monotonic() - released_at > self.max_idle:
+                    stale.append(candidate)
+                    continue
+                connection = candidate
+                self.reused += 1
+                break
+
+        for candidate in stale:
+            self.quit(candidate)
+        return connection
+
+    def release(self, key, connection):
+        """
+        Returns a connection to the pool, closing it if the pool is full.
+        """
+        with self._lock:
+            idle = self._idle[key]
+            if len(idle) < self.maxsize:
+                idle.append((connection, time.monotonic()))
+                return
+        self.quit(connection)
+
+    def clear(self):
+        """
+        Closes every idle connection.
+        """
+        with self._lock:
+            idle = [conn for conns in self._idle.values() for conn, _ in conns]
+            self._idle.clear()
+        for connection in idle:
+            self.quit(connection)
+
+    def record(self, counter):
+        """
+        Increments the given counter, "created", "reconnects" or "discarded".
+        """
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        """
+        Returns the pool counters.
+        """
+        with self._lock:
+            return {
+                "created": self.created,
+                "reused": self.reused,
+                "reconnects": self.reconnects,
+                "discarded": self.discarded,
+                "idle": sum(len(conns) for conns in self._idle.values()),
+            }
+
+    @staticmethod
+    def quit(connection):
+        """
+        Closes a connection, ignoring errors from an already closed one.
+        """
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+
+
+class PooledSMTPBackend(smtp.EmailBackend):
+    """
+    SMTP email backend that reuses warm connections from smtp_pool.
+    ...
+    close() hands the connection back to the pool instead of quitting, and a
+    message failing on a stale connection is sent again on a new one. A
+    connection on which a send failed otherwise is closed, never pooled, and
+    the next message of the batch opens another. Refused recipients leave
+    the session usable, so it is kept.
+
+    Methods:
+        open():
+            Takes a connection from the pool, or opens a new one.
+
+        close():
+            Returns the connection to the pool.
+    """
+
+    @property
+    def pool_key(self):
+        """
+        Returns the key identifying interchangeable connections.
+        """
+        return (self.host, self.port, self.username, self.use_tls, self.use_ssl)
+
+    def open(self):
+        if self.connection:
+            return False
+
+        self.connection = smtp_pool.acquire(self.pool_key)
+        if self.connection is not None:
+            return True
+
+        opened = super().open()
+        if opened:
+            smtp_pool.record("created")
+        return opened
+
+    def close(self):
+        if self.connection is None:
+            return
+        smtp_pool.release(self.pool_key, self.connection)
+        self.connection = None
+
+    def _send(self, email_message):
+        fail_silently, self.fail_silently = self.fail_silently, False
+        try:
+            if self.connection is None:
+                # Discarded after the previous message of the batch failed.
+                self.open()
+            try:
+                return super()._send(email_message)
+            except RECONNECT_ERRORS:
+                self._reconnect()
+                return super()._send(email_message)
+        except smtplib.SMTPRecipientsRefused:
+            # The server reset the transaction, the session is still usable.
+            if fail_silently:
+                return False
+            raise
+        except Exception as exc:
+            # The session may be left mid-transaction, don't pool it.
+            self._discard()
+            if fail_silently and isinstance(exc, (smtplib.SMTPException, OSError)):
+                return False
+            raise
+        finally:
+            self.fail_silently = fail_silently
+
+    def _discard(self):
+        if self.connection is not None:
+            smtp_pool.quit(self.connection)
+            self.connection = None
+            smtp_pool.record("discarded")
+
+    def _reconnect(self):
+        smtp_pool.quit(self.connection)
+        self.connection = None
+        super().open()
+        smtp_pool.record("reconnects")
+
+
+def build_smtp_pool():
+    """
+    Builds the SMTP connection pool from the ACCOUNT_SMTP_POOL setting.
+    """
+    options = {**DEFAULT_SMTP_POOL, **getattr(settings, "ACCOUNT_SMTP_POOL", {})}
+    pool = SMTPConnectionPool(
+        maxsize=options["MAXSIZE"],
+        max_idle=options["MAX_IDLE"],
+    )
+    atexit.register(pool.clear)
+    return pool
+
+
+smtp_pool = build_smtp_pool()
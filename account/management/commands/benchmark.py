@@ -0,0 +1,39 @@
+"""
+Benchmark command module.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from account.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    """
+    Runs one of the registered account benchmarks.
+    ...
+    Methods:
+        handle(*args, **options):
+            Runs the benchmark and prints its results.
+    """
+    help = "Runs an account benchmark, rolling back any data it creates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("name", choices=sorted(BENCHMARKS))
+        parser.add_argument("--iterations", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=1)
+
+    def handle(self, *args, **options):
+        bench = BENCHMARKS[options["name"]]
+        if bench.atomic:
+            with transaction.atomic():
+                results = bench(options["iterations"], options["concurrency"])
+                transaction.set_rollback(True)
+        else:
+            results = bench(options["iterations"], options["concurrency"])
+
+        for result in results:
+            ops = "-" if result["ops"] is None else f"{result['ops']:.1f}"
+            queries = "-" if result["queries"] is None else f"{result['queries']:.2f}"
+            self.stdout.write(
+                f"{result['label']:<40} {ops:>12} ops/sec"
+                f" {queries:>8} queries/op"
+            )
@@ -0,0 +1,39 @@
+"""
+User export command module.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from account.exporting import EXPORT_FIELDS, EXPORT_FORMATS, export_users, parse_fields
+
+
+class Command(BaseCommand):
+    """
+    Streams the users to a file or standard output.
+    ...
+    Methods:
+        handle(*args, **options):
+            Writes the export a chunk at a time.
+    """
+    help = "Exports users as JSON lines or CSV without loading them in memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="jsonl")
+        parser.add_argument(
+            "--fields", help=f"Comma separated columns among {', '.join(EXPORT_FIELDS)}.")
+        parser.add_argument("--chunk-size", type=int)
+        parser.add_argument("--output", help="File to write, defaults to standard output.")
+
+    def handle(self, *args, **options):
+        try:
+            fields = parse_fields(options["fields"])
+        except ValueError as exc:
+            raise CommandError(exc) from exc
+
+        chunks = export_users(options["format"], fields, options["chunk_size"])
+        if options["output"] is None:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending="")
+            return
+
+        with open(options["output"], "w", encoding="utf-8", newline="") as stream:
+            for chunk in chunks:
+                stream.write(chunk)
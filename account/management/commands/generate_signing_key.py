@@ -0,0 +1,41 @@
+"""
+Signing key generation command module.
+"""
+import os
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from account.signing import (
+    KEY_ALGORITHMS, generate_private_key, private_key_pem)
+
+
+class Command(BaseCommand):
+    """
+    Generates a token signing key in the signing keys directory.
+    ...
+    Methods:
+        handle(*args, **options):
+            Writes the <kid>.pem private key file.
+    """
+    help = ("Generates a private key signing tokens, make it the JWT_ACTIVE_KID "
+            "once every process has loaded it to rotate keys.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("kid", help="Key id, e.g. the date of the rotation.")
+        parser.add_argument("--algorithm", choices=KEY_ALGORITHMS, default="ES256")
+        parser.add_argument(
+            "--keys-dir", default=getattr(settings, "ACCOUNT_SIGNING_KEYS", {}).get("KEYS_DIR"))
+
+    def handle(self, *args, **options):
+        if not options["keys_dir"]:
+            raise CommandError("Pass --keys-dir or set JWT_KEYS_DIR.")
+
+        path = Path(options["keys_dir"]) / f"{options['kid']}.pem"
+        if path.exists():
+            raise CommandError(f"{path} already exists.")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pem = private_key_pem(generate_private_key(options["algorithm"]))
+        with os.fdopen(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as file:
+            file.write(pem)
+        self.stdout.write(f"{options['algorithm']} key written to {path}")
@@ -0,0 +1,49 @@
+"""
+User import command module.
+"""
+import os
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from account.importing import IMPORT_FORMATS, UserImporter, read_rows
+
+
+class Command(BaseCommand):
+    """
+    Imports users from a CSV or JSON lines file.
+    ...
+    Methods:
+        handle(*args, **options):
+            Streams the file into the importer and prints the report.
+    """
+    help = ("Imports users from a CSV or JSON lines file, rows carry email, name, "
+            "terms_conditions, is_admin and a password or a password_hash.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, - reads standard input.")
+        parser.add_argument(
+            "--format", choices=IMPORT_FORMATS,
+            help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or os.path.splitext(path)[1].lstrip(".").lower()
+        if file_format not in IMPORT_FORMATS:
+            raise CommandError(f"Unknown format, pass --format {'/'.join(IMPORT_FORMATS)}.")
+
+        importer = UserImporter(batch_size=options["batch_size"])
+        if path == "-":
+            report = importer.import_rows(read_rows(sys.stdin, file_format))
+        else:
+            try:
+                with open(path, encoding="utf-8-sig", newline="") as stream:
+                    report = importer.import_rows(read_rows(stream, file_format))
+            except OSError as exc:
+                raise CommandError(exc) from exc
+
+        for error in report["errors"]:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        self.stdout.write(
+            f"{report['created']} created, {report['failed']} failed"
+            f" in {report['seconds']:.2f}s ({report['rows_per_sec']:.1f} rows/sec)"
+        )
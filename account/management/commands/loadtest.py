@@ -0,0 +1,59 @@
+"""
+Load test command module.
+"""
+import json
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from account.loadtest import ENDPOINTS, LoadTest, compare
+
+
+class Command(BaseCommand):
+    """
+    Load tests the account endpoints of a running local server.
+    ...
+    Methods:
+        handle(*args, **options):
+            Runs the load test, prints its results and compares them with
+            the baseline.
+    """
+    help = ("Drives the account endpoints of a running local server, started with "
+            "raised throttle rates, and compares the results with a baseline.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000/api/user/")
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+        parser.add_argument("--baseline", type=Path,
+                            help="Baseline JSON file the results are compared with.")
+        parser.add_argument("--save-baseline", type=Path,
+                            help="Writes the results to this baseline JSON file.")
+        parser.add_argument("--tolerance", type=float, default=0.25,
+                            help="Allowed throughput drop and p95 growth, 0.25 for 25%%.")
+
+    def handle(self, *args, **options):
+        if not options["iterations"] >= options["concurrency"] >= 1:
+            raise CommandError("--iterations must be at least --concurrency, "
+                               "which must be at least 1.")
+
+        results = LoadTest(
+            options["url"], options["iterations"], options["concurrency"]
+        ).run(options["endpoints"])
+
+        for endpoint, result in results.items():
+            self.stdout.write(
+                f"{endpoint:<28} {result['rps']:>9.1f} req/s"
+                f"  p50 {result['p50']:>8.1f} ms  p95 {result['p95']:>8.1f} ms"
+                f"  p99 {result['p99']:>8.1f} ms  {result['errors']} errors")
+
+        if options["save_baseline"]:
+            options["save_baseline"].write_text(json.dumps(results, indent=2) + "\n")
+            self.stdout.write(f"Baseline written to {options['save_baseline']}")
+
+        failures = [f"{endpoint}: {result['errors']} failed requests"
+                    for endpoint, result in results.items() if result["errors"]]
+        if options["baseline"]:
+            failures += compare(results, json.loads(options["baseline"].read_text()),
+                                options["tolerance"])
+        if failures:
+            raise CommandError("Load test failed:\n" + "\n".join(failures))
@@ -0,0 +1,24 @@
+"""
+Password reset tokens pruning command module.
+"""
+from django.core.management.base import BaseCommand
+from account.reset import prune_reset_tokens
+
+
+class Command(BaseCommand):
+    """
+    Deletes the password reset tokens that have expired or been used.
+    ...
+    Methods:
+        handle(*args, **options):
+            Deletes the rows in batches and prints how many were deleted.
+    """
+    help = ("Deletes expired and used password reset tokens in batches, meant "
+            "to be run periodically, e.g. hourly from cron.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        deleted = prune_reset_tokens(batch_size=options["batch_size"])
+        self.stdout.write(f"{deleted} expired or used reset tokens deleted")
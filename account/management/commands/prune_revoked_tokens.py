@@ -0,0 +1,21 @@
+"""
+Revoked tokens pruning command module.
+"""
+from django.core.management.base import BaseCommand
+from account.revocation import revocation_store
+
+
+class Command(BaseCommand):
+    """
+    Deletes the revoked tokens that have expired.
+    ...
+    Methods:
+        handle(*args, **options):
+            Deletes the expired rows and prints how many were deleted.
+    """
+    help = ("Deletes expired revoked tokens, meant to be run periodically, "
+            "e.g. hourly from cron.")
+
+    def handle(self, *args, **options):
+        deleted = revocation_store.prune()
+        self.stdout.write(f"{deleted} expired revoked tokens deleted")
@@ -0,0 +1,383 @@
+"""
+Request metrics module.
+...
+When the ACCOUNT_METRICS setting is ENABLED, MetricsMiddleware times every
+request and the queries it runs, and the functions decorated with timed,
+password hashing, token signing, email sending, report their duration as a
+phase of the current request. Each request adds to per-route histograms
+and counters, exported in the Prometheus text format by the metrics view,
+and, when SERVER_TIMING is on, its phases are returned in a Server-Timing
+header. That header tells clients how many queries and how long a password
+check a request took, which tells known emails from unknown ones on login,
+so it is off by default and meant for debugging only. The metrics view
+answers only requests carrying the configured bearer TOKEN.
+
+When disabled the middleware removes itself from the chain, no query
+observer is installed and timed functions only check a flag.
+"""
+import asyncio
+import bisect
+import contextvars
+import functools
+import hmac
+import threading
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.decorators import sync_and_async_middleware
+
+DEFAULT_METRICS = {
+    "ENABLED": False,
+    "SERVER_TIMING": False,
+    "TOKEN": None,
+    "BUCKETS": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+}
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Timings of the request being handled, None outside of a request.
+_current = contextvars.ContextVar("account_request_timings", default=None)
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket upper bounds.
+    ...
+    Methods:
+        observe(value):
+            Adds a value.
+
+        quantile(q):
+            Returns the estimated q-quantile.
+    """
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """
+        Adds a value to its bucket.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """
+        Returns the q-quantile interpolated within its bucket, like the
+        Prometheus histogram_quantile function, None when empty.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+
+class RequestTimings:
+    """
+    Phase durations and query counters of one request.
+    """
+    __slots__ = ("phases", "queries", "query_seconds")
+
+    def __init__(self):
+        self.phases = {}
+        self.queries = 0
+        self.query_seconds = 0.0
+
+    def server_timing(self, total):
+        """
+        Returns the Server-Timing header value, durations in milliseconds.
+        """
+        entries = [f"total;dur={total * 1000:.1f}",
+                   f'db;dur={self.query_seconds * 1000:.1f};desc="{self.queries} queries"']
+        entries.extend(f"{phase};dur={seconds * 1000:.1f}"
+                       for phase, seconds in self.phases.items())
+        return ", ".join(entries)
+
+
+class Metrics:
+    """
+    Registry of the request histograms and counters.
+    ...
+    Methods:
+        observe(name, value, **labels):
+            Adds a value to a histogram.
+
+        inc(name, value, **labels):
+            Adds a value to a counter.
+
+        phase(name, seconds):
+            Records the duration of a phase of the current request.
+
+        request(method, route, status_code, seconds, timings):
+            Records a handled request.
+
+        quantiles(name, **labels):
+            Returns the p50, p95 and p99 of a histogram.
+
+        render():
+            Returns the metrics in the Prometheus text format.
+
+        clear():
+            Drops every metric.
+
+        authorized(authorization):
+            Returns whether an Authorization header may read the metrics.
+    """
+
+    def __init__(self, enabled=False, server_timing=False, buckets=DEFAULT_METRICS["BUCKETS"],
+                 token=None):
+        self.enabled = enabled
+        self.server_timing = server_timing
+        self.token = token
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+
+    def observe(self, name, value, **labels):
+        """
+        Adds a value to the histogram with the given name and labels.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def inc(self, name, value=1, **labels):
+        """
+        Adds a value to the counter with the given name and labels.
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def phase(self, name, seconds):
+        """
+        Records the duration of a phase, in the Server-Timing header of the
+        current request if any and in the phase histogram.
+        """
+        timings = _current.get()
+        if timings is not None:
+            timings.phases[name] = timings.phases.get(name, 0.0) + seconds
+        self.observe("account_phase_duration_seconds", seconds, phase=name)
+
+    def request(self, method, route, status_code, seconds, timings):
+        """
+        Records a handled request and the queries it ran.
+        """
+        self.observe("account_request_duration_seconds", seconds, method=method, route=route)
+        self.inc("account_requests_total", method=method, route=route, status=str(status_code))
+        self.inc("account_db_queries_total", timings.queries, route=route)
+        self.inc("account_db_query_seconds_total", timings.query_seconds, route=route)
+
+    def quantiles(self, name, **labels):
+        """
+        Returns the p50, p95 and p99 of the histogram, keyed by quantile.
+        """
+        with self._lock:
+            histogram = self._histograms.get((name, tuple(sorted(labels.items()))))
+            if histogram is None:
+                return dict.fromkeys(QUANTILES)
+            return {q: histogram.quantile(q) for q in QUANTILES}
+
+    def render(self):
+        """
+        Returns the histograms, their p50/p95/p99 and the counters in the
+        Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+            for name in sorted({name for (name, _), _ in histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, labels), histogram in histograms:
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(self.buckets + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{format_labels(labels, le=le)} {cumulative}")
+                    lines.append(f"{name}_sum{format_labels(labels)} {histogram.sum!r}")
+                    lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+
+                lines.append(f"# TYPE {name}_quantile gauge")
+                for (metric, labels), histogram in histograms:
+                    if metric == name:
+                        for q in QUANTILES:
+                            lines.append(f"{name}_quantile{format_labels(labels, quantile=q)} "
+                                         f"{histogram.quantile(q)!r}")
+
+            for name in sorted({name for (name, _), _ in counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (metric, labels), value in counters:
+                    if metric == name:
+                        lines.append(f"{name}{format_labels(labels)} {value!r}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """
+        Drops every histogram and counter.
+        """
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def authorized(self, authorization):
+        """
+        Returns whether the Authorization header carries the bearer token,
+        always False when no token is configured.
+        """
+        if not self.token:
+            return False
+        scheme, _, credentials = (authorization or "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(
+            credentials.encode(), self.token.encode())
+
+
+def format_labels(labels, **extra):
+    """
+    Returns the Prometheus label set of the label pairs.
+    """
+    pairs = list(labels) + [(key, str(value)) for key, value in extra.items()]
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+
+def timed(phase):
+    """
+    Decorator recording the duration of each call of the sync or async
+    function as the given phase when metrics are enabled.
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not metrics.enabled:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    metrics.phase(phase, time.perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics.phase(phase, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def observe_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding each query to the current request.
+    """
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.queries += 1
+        timings.query_seconds += time.perf_counter() - start
+
+
+def install_query_observer(sender, connection, **kwargs):
+    """
+    connection_created receiver installing observe_query on the connection.
+    """
+    # pylint: disable=unused-argument
+    if observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(observe_query)
+
+
+def route_of(request):
+    """
+    Returns the URL pattern of the request, so links carrying ids or tokens
+    share one label.
+    """
+    match = getattr(request, "resolver_match", None)
+    return match.route if match is not None else "unmatched"
+
+
+@sync_and_async_middleware
+def MetricsMiddleware(get_response):  # pylint: disable=invalid-name
+    """
+    Middleware timing each request and counting its queries.
+    """
+    if not metrics.enabled:
+        raise MiddlewareNotUsed
+
+    def finish(request, response, start, timings):
+        seconds = time.perf_counter() - start
+        metrics.request(request.method, route_of(request), response.status_code,
+                        seconds, timings)
+        if metrics.server_timing:
+            response["Server-Timing"] = timings.server_timing(seconds)
+        return response
+
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            timings = RequestTimings()
+            token = _current.set(timings)
+            start = time.perf_counter()
+            try:
+                response = await get_response(request)
+            finally:
+                _current.reset(token)
+            return finish(request, response, start, timings)
+    else:
+        def middleware(request):
+            timings = RequestTimings()
+            token = _current.set(timings)
+            start = time.perf_counter()
+            try:
+                response = get_response(request)
+            finally:
+                _current.reset(token)
+            return finish(request, response, start, timings)
+
+    return middleware
+
+
+def build_metrics():
+    """
+    Builds the metrics registry from the ACCOUNT_METRICS setting.
+    """
+    options = {**DEFAULT_METRICS, **getattr(settings, "ACCOUNT_METRICS", {})}
+    return Metrics(
+        enabled=options["ENABLED"],
+        server_timing=options["SERVER_TIMING"],
+        buckets=options["BUCKETS"],
+        token=options["TOKEN"],
+    )
+
+
+metrics = build_metrics()
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 20:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0004_rename_appuser_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='password_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
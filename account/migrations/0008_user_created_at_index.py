@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 21:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0007_passwordresettoken'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2 on 2026-10-17 21:18
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0008_user_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-created_at'], name='account_user_active_created'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('is_admin', True)), fields=['created_at'], name='account_user_admin_created'),
+        ),
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='account_user_email_lower_uniq'),
+        ),
+    ]
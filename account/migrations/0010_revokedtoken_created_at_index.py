@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-17 22:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0009_user_email_lower_and_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='revokedtoken',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
@@ -2,18 +2,80 @@
 Account models module.
 """
 from django.db import models
+from django.db.models import Q, Value
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser
+from account.cache import password_versions, user_cache
+from account.hashing import hashing_service
+from account.metrics import timed
 
 
-class UserManager(BaseUserManager):
+def email_lookup(email):
+    """
+    Returns the case-insensitive email condition, LOWER(email) = LOWER(%s),
+    which the lowered email index serves.
+    """
+    return Exact(Lower("email"), Lower(Value(email)))
+
+
+class UserQuerySet(models.QuerySet):
+    """
+    User queryset looking emails up case-insensitively.
+    ...
+    Methods:
+        get_by_email(email):
+            Returns the user with the given email.
+
+        aget_by_email(email):
+            Async version of get_by_email.
+
+        filter_emails(emails):
+            Returns the users with any of the given emails.
+    """
+
+    def get_by_email(self, email):
+        """
+        Returns the user with the given email, whatever its case.
+        """
+        return self.get(email_lookup(email))
+
+    async def aget_by_email(self, email):
+        """
+        Async version of get_by_email.
+        """
+        return await self.aget(email_lookup(email))
+
+    def filter_emails(self, emails):
+        """
+        Returns the users with any of the given emails, whatever their case.
+        """
+        return self.alias(email_lower=Lower("email")).filter(
+            email_lower__in=[email.lower() for email in emails])
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
     """
     Manages type of created user.
     ...
     Methods:
+        get_by_natural_key(username):
+            Returns the user with the given email, whatever its case.
+
         create_user(email, name, terms_conditions, password=None, password2=None):
             POST method for user registration.
+
+        acreate_user(email, name, terms_conditions, password=None, password2=None):
+            Async version of create_user.
     """
 
+    def get_by_natural_key(self, username):
+        """
+        Returns the user with the given email, looked up case-insensitively
+        as emails are unique whatever their case.
+        """
+        return self.get_by_email(username)
+
     def create_user(self, email, name, terms_conditions,
                     is_admin=False, password=None, password2=None):
         """
@@ -32,6 +94,24 @@ class UserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    async def acreate_user(self, email, name, terms_conditions,
+                           is_admin=False, password=None, password2=None):
+        """
+        Async version of create_user.
+        """
+        if not email:
+            raise ValueError('User must have an email address')
+
+        user = self.model(
+            email=self.normalize_email(email),
+            name=name,
+            terms_conditions=terms_conditions,
+        )
+
+        await user.aset_password(password)
+        await user.asave(using=self._db)
+        return user
+
     def create_superuser(self, email, name, terms_conditions,
                          is_admin=True, password=None, password2=None):
         """
@@ -64,7 +144,8 @@ class User(AbstractBaseUser):
     terms_conditions = models.BooleanField()
     is_active = models.BooleanField(default=True)
     is_admin = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    password_version = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     objects = UserManager()
@@ -72,9 +153,94 @@ class User(AbstractBaseUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['name', 'terms_conditions']
 
+    class Meta:
+        constraints = [
+            # Emails are looked up case-insensitively, so they are unique so.
+            models.UniqueConstraint(Lower("email"), name="account_user_email_lower_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["-created_at"], condition=Q(is_active=True),
+                         name="account_user_active_created"),
+            models.Index(fields=["created_at"], condition=Q(is_admin=True),
+                         name="account_user_admin_created"),
+        ]
+
     def __str__(self):
         return str(self.email)
 
+    @timed("set_password")
+    def set_password(self, raw_password):
+        """
+        Sets the password, hashed on the hashing service pool, and bumps the
+        password version embedded in tokens.
+        """
+        self.password = hashing_service.make_password(raw_password)
+        self._password = raw_password
+        self.password_version += 1
+        if self.pk is not None:
+            user_cache.invalidate(self)
+
+    def check_password(self, raw_password):
+        """
+        Returns whether the raw password is correct, rehashing it with the
+        current hashing policy when needed. A rehash keeps the password version
+        so tokens issued before it stay valid.
+        """
+        is_correct, must_update = hashing_service.verify_password(
+            raw_password, self.password)
+
+        if is_correct and must_update:
+            self.password = hashing_service.make_password(raw_password)
+            self.save(update_fields=["password"])
+        return is_correct
+
+    @timed("set_password")
+    async def aset_password(self, raw_password):
+        """
+        Async version of set_password.
+        """
+        self.password = await hashing_service.amake_password(raw_password)
+        self._password = raw_password
+        self.password_version += 1
+        if self.pk is not None:
+            user_cache.invalidate(self)
+
+    async def acheck_password(self, raw_password):
+        """
+        Async version of check_password.
+        """
+        is_correct, must_update = await hashing_service.averify_password(
+            raw_password, self.password)
+
+        if is_correct and must_update:
+            self.password = await hashing_service.amake_password(raw_password)
+            await self.asave(update_fields=["password"])
+        return is_correct
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the user, drops its cached entries and publishes its password
+        version, which rejects the tokens issued before a password change.
+        The version of an inactive user is dropped, rejecting all its tokens.
+        """
+        super().save(*args, **kwargs)
+        user_cache.invalidate(self)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not {"password_version", "is_active"} & set(
+                update_fields):
+            return
+        if self.is_active:
+            password_versions.set(self.pk, self.password_version)
+        else:
+            password_versions.invalidate(self.pk)
+
+    def delete(self, *args, **kwargs):
+        """
+        Deletes the user and drops its cached entries.
+        """
+        user_cache.invalidate(self)
+        return super().delete(*args, **kwargs)
+
     def has_perm(self, perm, obj=None):
         """
         Returns whether user has specific permission.
@@ -93,3 +259,28 @@ class User(AbstractBaseUser):
         Return whether user is an admin.
         """
         return self.is_admin
+
+
+class RevokedToken(models.Model):
+    """
+    Revoked token, by JTI claim, kept until the token expires.
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return str(self.jti)
+
+
+class PasswordResetToken(models.Model):
+    """
+    Single use password reset token, stored as the sha256 of the emailed token.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    token_hash = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    used_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return str(self.token_hash)
@@ -3,23 +3,73 @@ User renderer modules.
 """
 import json
 from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Handles the types orjson and json can't, e.g. lazy translations and decimals.
+encode_default = JSONEncoder().default
+
+
+def json_dumps(data):
+    """
+    Serializes data to UTF-8 JSON bytes with the standard library.
+    """
+    return json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def orjson_dumps(data):
+    """
+    Serializes data to UTF-8 JSON bytes with orjson.
+    """
+    return orjson.dumps(data, default=encode_default)
+
+
+dumps = json_dumps if orjson is None else orjson_dumps
 
 
 class UserRenderer(renderers.JSONRenderer):
     """
-    User renderer for user related requests with a render method. 
+    User renderer for user related requests with a render method.
     ...
+    Error responses, told apart by their status code or by having been built
+    by the exception handler, are wrapped in an "errors" envelope.
+
     Methods:
         render(request):
             Renders user related responses.
+
+        is_error(data, renderer_context):
+            Returns whether the data has to be wrapped in an errors envelope.
     """
     charset = "utf-8"
+    dumps = staticmethod(dumps)
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
-        response = ""
-        if "ErrorDetail" in str(data):
-            response = json.dumps({"errors": data})
-        else:
-            response = json.dumps(data)
+        if data is None:
+            return b""
+
+        if self.is_error(data, renderer_context):
+            data = {"errors": data}
+
+        return self.dumps(data)
+
+    @staticmethod
+    def is_error(data, renderer_context):
+        """
+        Returns whether the response is an error not yet wrapped in an
+        errors envelope.
+        """
+        response = (renderer_context or {}).get("response")
+        if response is None:
+            return False
+
+        if not (getattr(response, "exception", False) or response.status_code >= 400):
+            return False
 
-        return response
+        return not (isinstance(data, dict) and data.keys() == {"errors"})
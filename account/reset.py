@@ -0,0 +1,177 @@
+"""
+Password reset module.
+...
+Reset links carry the base64 encoded user id and a random token. Only the
+sha256 of the token is stored, in the PasswordResetToken table, and it
+expires after PASSWORD_RESET_TIMEOUT seconds. A reset consumes the token with
+a single UPDATE through the unique token hash index, which also consumes the
+other outstanding tokens of the user, so a link works once even under
+concurrent requests. The new password is then set with a second UPDATE.
+Expired and used rows are deleted in batches by prune_reset_tokens.
+"""
+import hashlib
+import secrets
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Exists, F, OuterRef, Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes, smart_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+from account.cache import password_versions, user_cache
+from account.hashing import hashing_service
+from account.models import PasswordResetToken, User
+
+# Columns read for the reset email.
+RESET_TOKEN_FIELDS = ("id", "email")
+
+RESET_EMAIL_MESSAGE = "If the given email belongs to a user, a reset link will be sent."
+
+
+def hash_token(token):
+    """
+    Returns the stored digest of a reset token.
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def new_reset_token(user):
+    """
+    Returns a new random token and its unsaved PasswordResetToken row.
+    """
+    token = secrets.token_urlsafe(32)
+    return token, PasswordResetToken(
+        user_id=user.pk,
+        token_hash=hash_token(token),
+        expires_at=timezone.now() + timedelta(seconds=settings.PASSWORD_RESET_TIMEOUT),
+    )
+
+
+def create_reset_token(user):
+    """
+    Stores a new reset token for the user and returns it.
+    """
+    token, row = new_reset_token(user)
+    row.save(force_insert=True)
+    return token
+
+
+async def acreate_reset_token(user):
+    """
+    Async version of create_reset_token.
+    """
+    token, row = new_reset_token(user)
+    await row.asave(force_insert=True)
+    return token
+
+
+def reset_email_data(user, token):
+    """
+    Returns the password reset email data for the given user and token.
+    """
+    uid = urlsafe_base64_encode(force_bytes(user.pk))
+    path = reverse("reset_password", kwargs={"uid": uid, "token": token})
+    link = settings.PASSWORD_RESET_BASE_URL.rstrip("/") + path
+
+    return {
+        "subject": "Password reset.",
+        "body": "Click in the following link to reset your password: " + link,
+        "receiver_email": user.email
+    }
+
+
+def decode_uid(uid):
+    """
+    Returns the user id encoded in a reset link, None if it is malformed.
+    """
+    try:
+        return int(smart_str(urlsafe_base64_decode(uid)))
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+
+
+def consume_queryset(uid, token):
+    """
+    Returns the queryset of the outstanding tokens of the user of the link,
+    empty unless the token of the link is one of them.
+    """
+    user_id = decode_uid(uid)
+    if user_id is None:
+        return PasswordResetToken.objects.none()
+
+    outstanding = PasswordResetToken.objects.filter(
+        user_id=user_id, used_at__isnull=True, expires_at__gt=timezone.now())
+    return outstanding.filter(Exists(outstanding.filter(
+        token_hash=hash_token(token), user_id=OuterRef("user_id"))))
+
+
+def consume_reset_token(uid, token):
+    """
+    Consumes the token of the link and the other outstanding tokens of its
+    user in one UPDATE. Returns the user id, None if the link is not valid.
+    """
+    if not consume_queryset(uid, token).update(used_at=timezone.now()):
+        return None
+    return decode_uid(uid)
+
+
+async def aconsume_reset_token(uid, token):
+    """
+    Async version of consume_reset_token.
+    """
+    if not await consume_queryset(uid, token).aupdate(used_at=timezone.now()):
+        return None
+    return decode_uid(uid)
+
+
+def reset_values(encoded):
+    """
+    Returns the columns set by a reset, the new password hash and version.
+    """
+    return {
+        "password": encoded,
+        "password_version": F("password_version") + 1,
+        "updated_at": timezone.now(),
+    }
+
+
+def reset_done(user_id):
+    """
+    Drops the cached entries of the user after a reset, the new password
+    version is read on the next request and rejects its former tokens.
+    """
+    user_cache.invalidate(User(pk=user_id))
+    password_versions.invalidate(user_id)
+
+
+def reset_password(user_id, raw_password):
+    """
+    Sets the password of the user of a consumed token with one UPDATE.
+    """
+    User.objects.filter(pk=user_id).update(
+        **reset_values(hashing_service.make_password(raw_password)))
+    reset_done(user_id)
+
+
+async def areset_password(user_id, raw_password):
+    """
+    Async version of reset_password.
+    """
+    await User.objects.filter(pk=user_id).aupdate(
+        **reset_values(await hashing_service.amake_password(raw_password)))
+    reset_done(user_id)
+
+
+def prune_reset_tokens(batch_size=1000):
+    """
+    Deletes the expired and used tokens batch_size rows per statement, so no
+    lock is held for long, and returns how many were deleted.
+    """
+    deleted = 0
+    while True:
+        batch = list(PasswordResetToken.objects.filter(
+            Q(expires_at__lte=timezone.now()) | Q(used_at__isnull=False)
+        ).values_list("pk", flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        deleted += PasswordResetToken.objects.filter(pk__in=batch).delete()[0]
@@ -0,0 +1,211 @@
+"""
+Token revocation module.
+...
+Revoked tokens are stored by their JTI claim in the RevokedToken table and
+mirrored in a per-process set, which every authenticated request checks
+without touching the database. Each process loads the rows revoked by the
+others every REFRESH_INTERVAL seconds, fetching only the rows created since
+its last load, less LOAD_OVERLAP seconds so rows committed late by a slow
+transaction are still read, so a revocation is seen everywhere within that
+interval and immediately by the process that made it. Expired entries are
+dropped from the set on load and from the table by the prune_revoked_tokens
+command.
+
+Refresh tokens are single use: redeeming one claims its JTI with a plain
+INSERT, which the unique JTI column lets only one request, in any process,
+win.
+"""
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone as django_timezone
+from rest_framework_simplejwt.settings import api_settings
+from account.models import RevokedToken
+
+DEFAULT_REVOCATION = {
+    "REFRESH_INTERVAL": 30,
+    "LOAD_OVERLAP": 60,
+}
+
+
+class RevocationStore:
+    """
+    Set of revoked JTIs in front of the RevokedToken table.
+    ...
+    Methods:
+        revoke(token):
+            Revokes the given token until it expires.
+
+        claim(token):
+            Revokes the given token, returning whether this call did.
+
+        is_revoked(jti):
+            Returns whether the JTI is revoked.
+
+        refresh():
+            Loads the tokens revoked since the last load.
+
+        arefresh_if_due():
+            Async version of the periodic refresh.
+
+        prune():
+            Deletes the expired rows and returns how many were deleted.
+
+        stats():
+            Returns the set size and check counters.
+    """
+
+    def __init__(self, refresh_interval=30, load_overlap=60):
+        self.refresh_interval = refresh_interval
+        self.load_overlap = load_overlap
+        self._lock = threading.Lock()
+        self._revoked = {}
+        self._since = None
+        self._next_refresh = 0.0
+        self.checks = self.hits = self.refreshes = 0
+
+    def revoke(self, token):
+        """
+        Revokes the token, e.g. a RefreshToken or AccessToken, until its exp
+        claim. Revoking a token twice is a no-op.
+        """
+        jti = token[api_settings.JTI_CLAIM]
+        expires_at = datetime.fromtimestamp(token["exp"], tz=timezone.utc)
+        RevokedToken.objects.bulk_create(
+            [RevokedToken(jti=jti, expires_at=expires_at)], ignore_conflicts=True)
+        with self._lock:
+            self._revoked[jti] = token["exp"]
+
+    def claim(self, token):
+        """
+        Revokes the token with a plain INSERT and returns whether this call
+        revoked it, False when it already was, by this or another process.
+        """
+        jti = token[api_settings.JTI_CLAIM]
+        expires_at = datetime.fromtimestamp(token["exp"], tz=timezone.utc)
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+            claimed = True
+        except IntegrityError:
+            claimed = False
+        with self._lock:
+            self._revoked[jti] = token["exp"]
+        return claimed
+
+    def is_revoked(self, jti):
+        """
+        Returns whether the JTI is revoked, loading the latest revocations
+        first when the refresh interval has elapsed.
+        """
+        if self._due():
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                self.refresh()
+            # Within an event loop the async views call arefresh_if_due().
+
+        with self._lock:
+            self.checks += 1
+            if jti in self._revoked:
+                self.hits += 1
+                return True
+        return False
+
+    def refresh(self):
+        """
+        Loads the unexpired tokens revoked since the last load, the next load
+        being due after the refresh interval.
+        """
+        with self._lock:
+            self._next_refresh = time.monotonic() + self.refresh_interval
+        started = django_timezone.now()
+        self._load(list(self._queryset()), started)
+
+    async def arefresh_if_due(self):
+        """
+        Loads the latest revocations with the async ORM when the refresh
+        interval has elapsed.
+        """
+        if self._due():
+            started = django_timezone.now()
+            self._load([row async for row in self._queryset()], started)
+
+    def prune(self):
+        """
+        Deletes the expired rows and returns how many were deleted.
+        """
+        deleted, _ = RevokedToken.objects.filter(
+            expires_at__lte=django_timezone.now()).delete()
+        self._drop_expired()
+        return deleted
+
+    def clear(self):
+        """
+        Empties the set, the next check loads every unexpired row again.
+        """
+        with self._lock:
+            self._revoked.clear()
+            self._since = None
+            self._next_refresh = 0.0
+            self.checks = self.hits = self.refreshes = 0
+
+    def stats(self):
+        """
+        Returns the number of revoked tokens held and the check counters.
+        """
+        with self._lock:
+            return {
+                "size": len(self._revoked),
+                "checks": self.checks,
+                "hits": self.hits,
+                "refreshes": self.refreshes,
+            }
+
+    def _due(self):
+        with self._lock:
+            if time.monotonic() < self._next_refresh:
+                return False
+            # Claimed by the first caller, the others keep using the set.
+            self._next_refresh = time.monotonic() + self.refresh_interval
+            return True
+
+    def _queryset(self):
+        # Rows are selected by creation time rather than after the last pk
+        # seen, which misses rows whose transaction commits out of pk order.
+        queryset = RevokedToken.objects.filter(expires_at__gt=django_timezone.now())
+        if self._since is not None:
+            queryset = queryset.filter(created_at__gte=self._since)
+        return queryset.values_list("jti", "expires_at")
+
+    def _load(self, rows, started):
+        with self._lock:
+            for jti, expires_at in rows:
+                self._revoked[jti] = expires_at.timestamp()
+            self._since = started - timedelta(seconds=self.load_overlap)
+            self.refreshes += 1
+        self._drop_expired()
+
+    def _drop_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [jti for jti, exp in self._revoked.items() if exp <= now]
+            for jti in expired:
+                del self._revoked[jti]
+
+
+def build_revocation_store():
+    """
+    Builds the revocation store from the ACCOUNT_REVOCATION setting.
+    """
+    options = {**DEFAULT_REVOCATION, **getattr(settings, "ACCOUNT_REVOCATION", {})}
+    return RevocationStore(
+        refresh_interval=options["REFRESH_INTERVAL"],
+        load_overlap=options["LOAD_OVERLAP"],
+    )
+
+
+revocation_store = build_revocation_store()
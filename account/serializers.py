@@ -1,24 +1,53 @@
 """
 Module for users data serialization.
 """
+from django.contrib.auth.password_validation import validate_password
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
-from django.utils.encoding import force_bytes, smart_str
-from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from account.models import User
+from account.reset import (
+    RESET_TOKEN_FIELDS, RESET_EMAIL_MESSAGE, consume_reset_token, create_reset_token,
+    reset_email_data, reset_password)
+from account.revocation import revocation_store
+from account.tokens import UserRefreshToken
 from account.utils import Util
 
 
+DUPLICATE_EMAIL_MESSAGE = "user with this Email already exists."
+
+# The email column's unique index and the case-insensitive constraint, as
+# named by PostgreSQL, and as reported by SQLite.
+DUPLICATE_EMAIL_CONSTRAINTS = ("account_user_email_", "account_user.email")
+
+
+def is_duplicate_email(exc):
+    """
+    Returns whether an IntegrityError violated one of the unique email
+    constraints, rather than another constraint of the INSERT.
+    """
+    diag = getattr(exc.__cause__, "diag", None)
+    constraint = getattr(diag, "constraint_name", None) or str(exc)
+    return any(name in constraint for name in DUPLICATE_EMAIL_CONSTRAINTS)
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """
     Serializes user registration data.
     ...
+    Duplicate emails are not looked up beforehand, the unique email indexes
+    reject them when the user is inserted, so a registration is one INSERT.
+
     Methods:
         validate(attrs):
-            Validates if password and password2 fields are a match.
+            Validates if password and password2 fields are a match and the
+            password against AUTH_PASSWORD_VALIDATORS.
 
         create(validated_data):
-            Creates user with the validated data.
+            Creates user with the validated data, raising a ValidationError
+            if the email is taken. Other IntegrityErrors are raised as is.
     """
     password2 = serializers.CharField(
         style={"input_type": "password"}, write_only=True)
@@ -28,7 +57,9 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         fields = ["email", "name", "password",
                   "password2", "terms_conditions", "is_admin"]
         extra_kwargs = {
-            "password": {"write_only": True}
+            "password": {"write_only": True},
+            # Uniqueness is enforced by the INSERT, see create().
+            "email": {"validators": []},
         }
 
     def validate(self, attrs):
@@ -37,10 +68,22 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         if password != password2:
             raise serializers.ValidationError(
                 "Passwords do not match!")
+
+        # Checked before create() spends a hash on a password to be rejected.
+        try:
+            validate_password(password, User(email=attrs.get("email"), name=attrs.get("name")))
+        except DjangoValidationError as exc:
+            raise serializers.ValidationError({"password": list(exc.messages)}) from exc
         return attrs
 
     def create(self, validated_data):
-        return User.objects.create_user(**validated_data)
+        try:
+            with transaction.atomic():
+                return User.objects.create_user(**validated_data)
+        except IntegrityError as exc:
+            if not is_duplicate_email(exc):
+                raise
+            raise serializers.ValidationError({"email": [DUPLICATE_EMAIL_MESSAGE]}) from exc
 
 
 class UserLoginSerializer(serializers.ModelSerializer):
@@ -60,7 +103,8 @@ class UserPasswordChangeSerializer(serializers.ModelSerializer):
     ...
     Methods:
         validate(attrs):
-            Validates if password and password2 fields are a match.
+            Validates if password and password2 fields are a match, then
+            changes the password and adds the updated user to attrs.
     """
     password = serializers.CharField(
         max_length=255, style={"input_type": "password"}, write_only=True
@@ -85,8 +129,10 @@ class UserPasswordChangeSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Passwords do not match!")
 
-        user.set_password(password)
-        user.save()
+        # The request user may be a cached copy, so the version is bumped in
+        # the database, like a reset, rather than saved from the copy.
+        reset_password(user.pk, password)
+        attrs["user"] = User.objects.get(pk=user.pk)
         return attrs
 
 
@@ -107,38 +153,32 @@ class SendPasswordResetEmailSerializer(serializers.ModelSerializer):
     def validate(self, attrs):
         email = attrs.get("email")
 
-        if not User.objects.filter(email=email).exists():
-            raise serializers.ValidationError(
-                "If the given email belongs to a user, a reset link will be sent.")
-
-        user = User.objects.get(email=email)
-
-        uid = urlsafe_base64_encode(force_bytes(user.id))
-        token = PasswordResetTokenGenerator().make_token(user)
-        link = "http://localhost:8000/api/user/reset/" + uid + token
+        try:
+            user = User.objects.only(*RESET_TOKEN_FIELDS).get_by_email(email)
+        except User.DoesNotExist as exc:
+            raise serializers.ValidationError(RESET_EMAIL_MESSAGE) from exc
 
-        data = {
-            "subject": "Password reset.",
-            "body": "Click in the following link to reset your password: " + link,
-            "receiver_email": user.email
-        }
-
-        Util.send_email(data)
+        Util.send_email(reset_email_data(user, create_reset_token(user)))
 
         return attrs
 
 
-class UserPasswordResetSerializer(serializers.ModelSerializer):
+class UserPasswordResetSerializer(serializers.Serializer):
     """
     Serializes password reset data.
     ...
     Methods:
         validate(attrs):
-            Validates if password and password2 fields are a match.
+            Validates the passwords match and the reset link, then resets the
+            password.
     """
-    class Meta:
-        model = User
-        fields = ["password", "password2"]
+    # pylint: disable=abstract-method
+    password = serializers.CharField(
+        max_length=255, style={"input_type": "password"}, write_only=True
+    )
+    password2 = serializers.CharField(
+        max_length=255, style={"input_type": "password"}, write_only=True
+    )
 
     def validate(self, attrs):
         password = attrs.get("password")
@@ -154,13 +194,34 @@ class UserPasswordResetSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Passwords do not match!")
 
-        user_id = smart_str(urlsafe_base64_encode(uid))
-        user = User.objects.get(id=user_id)
-
-        if not PasswordResetTokenGenerator().check_token(user, token):
+        user_id = consume_reset_token(uid, token)
+        if user_id is None:
             raise serializers.ValidationError("Token has expired.")
-
-        user.set_password(password)
-        user.save()
+        reset_password(user_id, password)
 
         return attrs
+
+
+class RefreshTokenSerializer(serializers.Serializer):
+    """
+    Serializes a refresh token.
+    ...
+    Methods:
+        validate_refresh(value):
+            Validates that the refresh token is valid and not revoked.
+    """
+    # pylint: disable=abstract-method
+    refresh = serializers.CharField()
+
+    def validate_refresh(self, value):
+        """
+        Returns the refresh token, validated and not revoked.
+        """
+        try:
+            token = UserRefreshToken(value)
+        except TokenError as exc:
+            raise serializers.ValidationError(str(exc)) from exc
+
+        if revocation_store.is_revoked(token.get(api_settings.JTI_CLAIM)):
+            raise serializers.ValidationError("Token is revoked")
+        return token
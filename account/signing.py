@@ -0,0 +1,208 @@
+"""
+Token signing keys module.
+...
+Tokens are signed with HS256 and SECRET_KEY unless ACCOUNT_SIGNING_KEYS
+points KEYS_DIR at a directory of PEM private keys, one per kid (the file
+name without .pem). Asymmetric tokens are then signed by the ACTIVE_KID key
+with the algorithm of its type, RS256, ES256 or EdDSA, carry the kid in their
+header and are verified with any key of the directory. The public keys are
+published by the JWKS view so other services verify tokens offline.
+
+Keys are rotated by adding a new key file, making it the ACTIVE_KID and
+deleting the former one once the tokens it signed have expired.
+"""
+import json
+from pathlib import Path
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.backends import TokenBackend
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.state import token_backend as default_token_backend
+
+DEFAULT_SIGNING_KEYS = {
+    "KEYS_DIR": None,
+    "ACTIVE_KID": None,
+}
+
+KEY_ALGORITHMS = ("RS256", "ES256", "EdDSA")
+
+
+def generate_private_key(algorithm):
+    """
+    Returns a new private key signing with the given algorithm.
+    """
+    if algorithm == "RS256":
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if algorithm == "ES256":
+        return ec.generate_private_key(ec.SECP256R1())
+    return ed25519.Ed25519PrivateKey.generate()
+
+
+def private_key_pem(private_key):
+    """
+    Returns the unencrypted PKCS#8 PEM encoding of the private key.
+    """
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+
+
+def key_algorithm(private_key):
+    """
+    Returns the JWT algorithm signing with the given private key.
+    """
+    if isinstance(private_key, rsa.RSAPrivateKey):
+        return "RS256"
+    if isinstance(private_key, ec.EllipticCurvePrivateKey) \
+            and isinstance(private_key.curve, ec.SECP256R1):
+        return "ES256"
+    if isinstance(private_key, ed25519.Ed25519PrivateKey):
+        return "EdDSA"
+    raise ImproperlyConfigured(
+        f"Unsupported signing key type {type(private_key).__name__}, "
+        "use RSA, EC P-256 or Ed25519 keys.")
+
+
+class SigningKey:
+    """
+    Private key with its kid, algorithm and parsed public key.
+    ...
+    Methods:
+        from_pem(kid, pem):
+            Parses a PEM encoded private key.
+
+        to_jwk():
+            Returns the public JWK of the key.
+    """
+    __slots__ = ("kid", "algorithm", "private_key", "public_key", "_algorithm")
+
+    def __init__(self, kid, private_key):
+        self.kid = kid
+        self.algorithm = key_algorithm(private_key)
+        self.private_key = private_key
+        self.public_key = private_key.public_key()
+        self._algorithm = jwt.get_algorithm_by_name(self.algorithm)
+
+    @classmethod
+    def from_pem(cls, kid, pem):
+        """
+        Returns the signing key of a PEM encoded unencrypted private key.
+        """
+        return cls(kid, load_pem_private_key(pem, password=None))
+
+    def to_jwk(self):
+        """
+        Returns the public JWK of the key.
+        """
+        jwk = json.loads(self._algorithm.to_jwk(self.public_key))
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+
+class KeyRingTokenBackend(TokenBackend):
+    """
+    Token backend signing with the active key of a key ring.
+    ...
+    The keys are parsed once, when the backend is built, and looked up by
+    the kid header of each token, so verification does no key parsing.
+
+    Methods:
+        encode(payload):
+            Returns the token signed by the active key.
+
+        decode(token, verify):
+            Returns the payload of a token signed by any key of the ring.
+
+        jwks():
+            Returns the JSON Web Key Set of the public keys.
+    """
+
+    def __init__(self, keys, active_kid, **kwargs):
+        # Validated per key, the base class only knows the HS/RS/ES families.
+        super().__init__("HS256", **kwargs)
+        self.keys = {key.kid: key for key in keys}
+        if active_kid not in self.keys:
+            raise ImproperlyConfigured(f"No signing key with kid {active_kid!r}.")
+        self.active = self.keys[active_kid]
+        self.algorithm = self.active.algorithm
+
+    def encode(self, payload):
+        jwt_payload = payload.copy()
+        if self.audience is not None:
+            jwt_payload["aud"] = self.audience
+        if self.issuer is not None:
+            jwt_payload["iss"] = self.issuer
+
+        return jwt.encode(
+            jwt_payload,
+            self.active.private_key,
+            algorithm=self.active.algorithm,
+            headers={"kid": self.active.kid},
+            json_encoder=self.json_encoder,
+        )
+
+    def decode(self, token, verify=True):
+        try:
+            key = self.keys[jwt.get_unverified_header(token).get("kid")]
+        except (jwt.InvalidTokenError, KeyError) as ex:
+            raise TokenBackendError(_("Token is invalid or expired")) from ex
+
+        try:
+            return jwt.decode(
+                token,
+                key.public_key,
+                algorithms=[key.algorithm],
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.get_leeway(),
+                options={
+                    "verify_aud": self.audience is not None,
+                    "verify_signature": verify,
+                },
+            )
+        except jwt.InvalidTokenError as ex:
+            raise TokenBackendError(_("Token is invalid or expired")) from ex
+
+    def jwks(self):
+        """
+        Returns the JSON Web Key Set of the public keys.
+        """
+        return {"keys": [key.to_jwk() for key in self.keys.values()]}
+
+
+def load_keys(keys_dir):
+    """
+    Returns the signing keys of the .pem files of the directory.
+    """
+    return [SigningKey.from_pem(path.stem, path.read_bytes())
+            for path in sorted(Path(keys_dir).glob("*.pem"))]
+
+
+def build_token_backend():
+    """
+    Builds the token backend from the ACCOUNT_SIGNING_KEYS setting, the
+    SIMPLE_JWT one when no keys directory is set.
+    """
+    options = {**DEFAULT_SIGNING_KEYS, **getattr(settings, "ACCOUNT_SIGNING_KEYS", {})}
+    if not options["KEYS_DIR"]:
+        return default_token_backend
+
+    return KeyRingTokenBackend(
+        load_keys(options["KEYS_DIR"]),
+        options["ACTIVE_KID"],
+        audience=api_settings.AUDIENCE,
+        issuer=api_settings.ISSUER,
+        leeway=api_settings.LEEWAY,
+        json_encoder=api_settings.JSON_ENCODER,
+    )
+
+
+token_backend = build_token_backend()
@@ -0,0 +1,130 @@
+"""
+Module for account app admin tests.
+"""
+from unittest import mock
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from account.admin import EstimatedCountPaginator
+from account.cache import password_versions
+from account.models import User
+
+
+class TestUserAdmin(TestCase):
+    """
+    Tests the user admin.
+    ...
+    Methods:
+        setUp():
+            Creates an admin and two users.
+
+        test_changelist_skips_full_count():
+            Tests that the changelist runs no full table COUNT(*).
+
+        test_search_is_email_prefix():
+            Tests that search matches email prefixes.
+
+        test_deactivate_is_one_update():
+            Tests that deactivating users is a single UPDATE.
+
+        test_activate_keeps_password_version():
+            Tests that activating users keeps their tokens valid.
+
+        test_paginator_uses_estimate():
+            Tests that large unfiltered tables are counted by estimate.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creates an admin, logged in, and two users.
+        """
+        self.admin = User.objects.create_superuser(
+            email="admin@email.com", name="Admin", terms_conditions=True,
+            password="Teste123**")
+        self.users = [
+            User.objects.create_user(
+                email=f"user{i}@email.com", name="Teste", terms_conditions=True,
+                password="Teste123**")
+            for i in range(2)
+        ]
+        self.client.force_login(self.admin)
+        self.url = reverse("admin:account_user_changelist")
+
+    def run_action(self, action):
+        """
+        Runs the action on the two users and returns the UPDATE statements.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {
+                "action": action,
+                "_selected_action": [user.pk for user in self.users],
+            })
+
+        self.assertEqual(response.status_code, 302)
+        return [query["sql"] for query in queries.captured_queries
+                if query["sql"].startswith('UPDATE "account_user"')]
+
+    def test_changelist_skips_full_count(self):
+        """
+        Tests that the changelist of a large table renders without counting it.
+        """
+        with mock.patch("account.admin.estimated_count", return_value=10 ** 6), \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "user0@email.com")
+        self.assertFalse(any("COUNT(*)" in query["sql"]
+                             for query in queries.captured_queries))
+
+    def test_search_is_email_prefix(self):
+        """
+        Tests that searching returns the users whose email starts with the
+        term, whatever its case.
+        """
+        response = self.client.get(self.url, {"q": "USER1"})
+
+        self.assertEqual([user.email for user in response.context["cl"].result_list],
+                         ["user1@email.com"])
+
+    def test_deactivate_is_one_update(self):
+        """
+        Tests that deactivation is one UPDATE bumping the password versions.
+        """
+        version = self.users[0].password_version
+        password_versions.get(self.users[0].pk)
+
+        self.assertEqual(len(self.run_action("deactivate_users")), 1)
+        user = User.objects.get(pk=self.users[0].pk)
+        self.assertFalse(user.is_active)
+        self.assertEqual(user.password_version, version + 1)
+        # The cached version was dropped, and inactive users have none.
+        self.assertIsNone(password_versions.get(user.pk))
+
+    def test_activate_keeps_password_version(self):
+        """
+        Tests that activation is one UPDATE leaving the password versions.
+        """
+        User.objects.filter(pk=self.users[0].pk).update(is_active=False)
+
+        self.assertEqual(len(self.run_action("activate_users")), 1)
+        user = User.objects.get(pk=self.users[0].pk)
+        self.assertTrue(user.is_active)
+        self.assertEqual(user.password_version, self.users[0].password_version)
+
+    def test_paginator_uses_estimate(self):
+        """
+        Tests that the estimate is used above the threshold only, and that
+        filtered counts are capped.
+        """
+        paginator = EstimatedCountPaginator(User.objects.order_by("pk"), 100)
+        self.assertEqual(paginator.count, 3)
+
+        with mock.patch("account.admin.estimated_count", return_value=10 ** 6):
+            paginator = EstimatedCountPaginator(User.objects.order_by("pk"), 100)
+            self.assertEqual(paginator.count, 10 ** 6)
+
+        paginator = EstimatedCountPaginator(User.objects.filter(is_active=True).order_by("pk"), 100)
+        paginator.count_limit = 2
+        self.assertEqual(paginator.count, 2)
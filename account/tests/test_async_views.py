@@ -0,0 +1,203 @@
+"""
+Module for account app async views tests.
+"""
+import json
+from unittest import mock
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from django.urls import include, path, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from account.models import User
+from account.reset import acreate_reset_token
+
+urlpatterns = [
+    path("api/user/", include("account.async_urls")),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TestAsyncViews(TestCase):
+    """
+    Tests the async account views.
+    ...
+    Methods:
+        setUp():
+            Creates a user.
+
+        test_register():
+            Tests successful and duplicate registration.
+
+        test_register_raises_other_integrity_errors():
+            Tests that only email constraints read as a duplicate email.
+
+        test_malformed_json_is_rejected():
+            Tests that a malformed body gets a 400 like the sync views.
+
+        test_array_body_is_rejected():
+            Tests that a JSON array body is rejected like an invalid one.
+
+        test_login():
+            Tests successful and failed login.
+
+        test_password_change():
+            Tests password change with a token.
+
+        test_password_change_requires_token():
+            Tests password change without a token.
+
+        test_password_reset_email():
+            Tests the password reset email request.
+
+        test_password_reset():
+            Tests that a reset link sets the password once.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creates a user.
+        """
+        self.user1 = User.objects.create_user(
+            name="Teste",
+            email="teste@email.com",
+            terms_conditions=True,
+            password="Teste123**"
+        )
+
+    async def post(self, name, data, headers=None):
+        """
+        Posts JSON data to the named URL and returns status and body.
+        """
+        response = await self.async_client.post(
+            reverse(name), data, content_type="application/json", headers=headers)
+        return response.status_code, json.loads(response.content.decode("utf-8"))
+
+    async def login(self):
+        """
+        Logs the user in and returns the access token.
+        """
+        _, body = await self.post("login", {
+            "email": "teste@email.com", "password": "Teste123**"})
+        return body["token"]["access"]
+
+    async def test_register(self):
+        """
+        Tests that a user registers once and a duplicate email is rejected.
+        """
+        data = {
+            "name": "Teste2",
+            "email": "email@example.com",
+            "password": "Teste123@@",
+            "password2": "Teste123@@",
+            "terms_conditions": True
+        }
+        status_code, body = await self.post("register", data)
+        self.assertEqual(status_code, 201)
+        self.assertEqual(body["message"], "Registered!")
+
+        status_code, body = await self.post("register", data)
+        self.assertEqual(status_code, 422)
+        self.assertTrue("errors" in body)
+
+    async def test_register_raises_other_integrity_errors(self):
+        """
+        Tests that an IntegrityError from another constraint is not reported
+        as a taken email.
+        """
+        error = IntegrityError("NOT NULL constraint failed: account_user.name")
+        with mock.patch.object(User.objects, "acreate_user", side_effect=error), \
+                self.assertRaises(IntegrityError):
+            await self.post("register", {
+                "name": "Teste2",
+                "email": "email@example.com",
+                "password": "Teste123@@",
+                "password2": "Teste123@@",
+                "terms_conditions": True
+            })
+
+    async def test_malformed_json_is_rejected(self):
+        """
+        Tests that a malformed JSON body is a 400 parse error, as in the sync
+        views, rather than a server error.
+        """
+        for name in ("register", "login", "send_reset_password_email"):
+            status_code, body = await self.post(name, '{"email": ')
+            self.assertEqual(status_code, 400, name)
+            self.assertTrue(body["errors"]["detail"].startswith("JSON parse error"))
+
+    async def test_array_body_is_rejected(self):
+        """
+        Tests that a JSON array body passes the email throttles and is
+        rejected by the serializers.
+        """
+        for name, status_code in (("login", 401), ("send_reset_password_email", 200)):
+            response = await self.async_client.post(
+                reverse(name), "[1]", content_type="application/json")
+            self.assertEqual(response.status_code, status_code, name)
+
+    async def test_login(self):
+        """
+        Tests that valid credentials log in and invalid ones don't.
+        """
+        status_code, body = await self.post("login", {
+            "email": "teste@email.com", "password": "Teste123**"})
+        self.assertEqual(status_code, 200)
+        self.assertTrue("token" in body)
+
+        status_code, body = await self.post("login", {
+            "email": "teste@email.com", "password": "wrong_password"})
+        self.assertEqual(status_code, 401)
+        self.assertTrue("errors" in body)
+
+    async def test_password_change(self):
+        """
+        Tests that an authenticated user changes the password.
+        """
+        token = await self.login()
+        status_code, body = await self.post("password_change", {
+            "password": "Newpassword123**",
+            "password2": "Newpassword123**"
+        }, headers={"Authorization": "Bearer " + token})
+
+        self.assertEqual(status_code, 200)
+        self.assertEqual(body["message"], "Password was changed successfully.")
+        user = await User.objects.aget(pk=self.user1.pk)
+        self.assertTrue(await user.acheck_password("Newpassword123**"))
+
+    async def test_password_change_requires_token(self):
+        """
+        Tests that password change is rejected without a token.
+        """
+        status_code, _ = await self.post("password_change", {
+            "password": "Newpassword123**",
+            "password2": "Newpassword123**"
+        })
+        self.assertEqual(status_code, 401)
+
+    async def test_password_reset_email(self):
+        """
+        Tests that a reset email is requested.
+        """
+        status_code, body = await self.post("send_reset_password_email", {
+            "email": "teste@email.com"})
+
+        self.assertEqual(status_code, 200)
+        self.assertEqual(body["message"],
+                         "If the given email belongs to a user, a reset link will be sent.")
+
+    async def test_password_reset(self):
+        """
+        Tests that a reset link sets the password and can't be used again.
+        """
+        uid = urlsafe_base64_encode(force_bytes(self.user1.pk))
+        token = await acreate_reset_token(self.user1)
+        url = reverse("reset_password", kwargs={"uid": uid, "token": token})
+        data = {"password": "Newpassword123**", "password2": "Newpassword123**"}
+
+        response = await self.async_client.post(url, data, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        response = await self.async_client.post(url, data, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
+
+        user = await User.objects.aget(pk=self.user1.pk)
+        self.assertTrue(await user.acheck_password("Newpassword123**"))
@@ -0,0 +1,153 @@
+"""
+Module for account app authentication tests.
+"""
+from django.db.models import F
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from account.authentication import StatelessJWTAuthentication
+from account.cache import PasswordVersionCache, password_versions
+from account.models import User
+from account.revocation import revocation_store
+from account.tokens import ClaimsUser
+from account.views import get_tokens_for_user
+
+
+class TestStatelessJWTAuthentication(TestCase):
+    """
+    Tests the claims based JWT authentication.
+    ...
+    Methods:
+        setUp():
+            Creates a user and an access token for it.
+
+        test_authenticate_makes_no_queries():
+            Tests that authentication does not hit the database.
+
+        test_full_user_is_fetched_lazily():
+            Tests that the User row is only fetched when needed.
+
+        test_inactive_user_is_rejected():
+            Tests that a token for an inactive user is rejected.
+
+        test_deactivated_user_is_rejected():
+            Tests that tokens issued before a deactivation are rejected.
+
+        test_password_change_rejects_older_tokens():
+            Tests that tokens issued before a password change are rejected.
+
+        test_password_version_is_read_once():
+            Tests that the password version is read from the database on a miss.
+
+        test_password_version_expires_locally():
+            Tests that a version changed by another process is read again.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creates a user and an access token for it.
+        """
+        self.factory = APIRequestFactory()
+        self.user1 = User.objects.create_user(
+            name="Teste",
+            email="teste@email.com",
+            terms_conditions=True,
+            password="Teste123**"
+        )
+        self.token = get_tokens_for_user(self.user1)["access"]
+        # Load the revoked tokens now rather than during a counted request.
+        revocation_store.refresh()
+
+    def authenticate(self, token):
+        """
+        Authenticates a request carrying the given access token.
+        """
+        request = self.factory.get(
+            "/", HTTP_AUTHORIZATION="Bearer " + token)
+        return StatelessJWTAuthentication().authenticate(request)
+
+    def test_authenticate_makes_no_queries(self):
+        """
+        Tests that the user is built from claims without any query.
+        """
+        with self.assertNumQueries(0):
+            user, _ = self.authenticate(self.token)
+
+        self.assertIsInstance(user, ClaimsUser)
+        self.assertEqual(user.pk, self.user1.pk)
+        self.assertEqual(user.email, self.user1.email)
+        self.assertFalse(user.is_admin)
+        self.assertEqual(user.password_version, self.user1.password_version)
+
+    def test_full_user_is_fetched_lazily(self):
+        """
+        Tests that the User row is fetched once, only when needed.
+        """
+        user, _ = self.authenticate(self.token)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.name, "Teste")
+            self.assertTrue(user.check_password("Teste123**"))
+
+    def test_inactive_user_is_rejected(self):
+        """
+        Tests that a token issued for an inactive user is rejected.
+        """
+        self.user1.is_active = False
+        token = get_tokens_for_user(self.user1)["access"]
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+    def test_deactivated_user_is_rejected(self):
+        """
+        Tests that a token issued while the user was active is rejected once
+        the user is deactivated and saved, with warm and cold caches.
+        """
+        self.authenticate(self.token)
+        self.user1.is_active = False
+        self.user1.save()
+
+        for _ in range(2):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(self.token)
+            password_versions.clear()
+
+    def test_password_change_rejects_older_tokens(self):
+        """
+        Tests that every token issued before a password change is rejected
+        and the ones issued after it are accepted.
+        """
+        self.user1.set_password("Teste123@@")
+        self.user1.save()
+
+        with self.assertRaises(AuthenticationFailed) as raised:
+            self.authenticate(self.token)
+        self.assertEqual(raised.exception.detail["code"], "password_changed")
+
+        user, _ = self.authenticate(get_tokens_for_user(self.user1)["access"])
+        self.assertEqual(user.pk, self.user1.pk)
+
+    def test_password_version_is_read_once(self):
+        """
+        Tests that a cold cache reads the version with one query and fills it.
+        """
+        password_versions.clear()
+        with self.assertNumQueries(1):
+            self.authenticate(self.token)
+        with self.assertNumQueries(0):
+            self.authenticate(self.token)
+
+    def test_password_version_expires_locally(self):
+        """
+        Tests that a version bumped without this process knowing, as by
+        another worker, is read again once the local entry expired.
+        """
+        versions = PasswordVersionCache(local_timeout=5)
+        versions.timer = lambda: 100.0
+        version = versions.get(self.user1.pk)
+        User.objects.filter(pk=self.user1.pk).update(password_version=F("password_version") + 1)
+
+        self.assertEqual(versions.get(self.user1.pk), version)
+        versions.timer = lambda: 105.0
+        self.assertEqual(versions.get(self.user1.pk), version + 1)
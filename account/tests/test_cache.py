@@ -0,0 +1,188 @@
+"""
+Module for account app user cache tests.
+"""
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+from account.authentication import StatelessJWTAuthentication
+from account.cache import TokenCache, UserCache, token_cache, user_cache
+from account.models import User
+from account.signing import token_backend
+from account.views import get_tokens_for_user
+
+
+class TestUserCache(TestCase):
+    """
+    Tests the user lookup cache.
+    ...
+    Methods:
+        setUp():
+            Creates a user and an empty cache.
+
+        test_lookups_are_cached():
+            Tests that repeated lookups don't hit the database.
+
+        test_save_invalidates_user():
+            Tests that saving a user drops its cached entries.
+
+        test_least_recently_used_user_is_evicted():
+            Tests that the LRU keeps at most maxsize users.
+
+        test_shared_cache_is_used_across_instances():
+            Tests that users are shared through the Django cache.
+
+        test_local_entries_expire():
+            Tests that a user changed by another process is read again.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creates a user and an empty cache.
+        """
+        cache.clear()
+        self.user_cache = UserCache(maxsize=2)
+        self.user1 = User.objects.create_user(
+            name="Teste",
+            email="teste@email.com",
+            terms_conditions=True,
+            password="Teste123**"
+        )
+
+    def test_lookups_are_cached(self):
+        """
+        Tests that repeated lookups by id and email only query once.
+        """
+        with self.assertNumQueries(1):
+            self.user_cache.get_by_id(self.user1.pk)
+            self.user_cache.get_by_id(self.user1.pk)
+            user = self.user_cache.get_by_email("teste@email.com")
+
+        self.assertEqual(user, self.user1)
+        self.assertEqual(self.user_cache.stats()["hits"], 2)
+        self.assertEqual(self.user_cache.stats()["misses"], 1)
+
+    def test_save_invalidates_user(self):
+        """
+        Tests that saving a user drops its entries from the module cache.
+        """
+        user_cache.clear()
+        user_cache.get_by_id(self.user1.pk)
+        self.user1.name = "Changed"
+        self.user1.save()
+
+        with self.assertNumQueries(1):
+            user = user_cache.get_by_email("teste@email.com")
+
+        self.assertEqual(user.name, "Changed")
+
+    def test_least_recently_used_user_is_evicted(self):
+        """
+        Tests that the least recently used user is evicted.
+        """
+        user2 = User.objects.create_user(
+            name="Teste2", email="teste2@email.com",
+            terms_conditions=True, password="Teste123**")
+        user3 = User.objects.create_user(
+            name="Teste3", email="teste3@email.com",
+            terms_conditions=True, password="Teste123**")
+
+        for user in (self.user1, user2, user3):
+            self.user_cache.get_by_id(user.pk)
+
+        self.assertEqual(self.user_cache.stats()["size"], 2)
+        with self.assertNumQueries(1):
+            self.user_cache.get_by_id(self.user1.pk)
+
+    def test_shared_cache_is_used_across_instances(self):
+        """
+        Tests that a user cached by one process is found by another.
+        """
+        UserCache(cache_alias="default").get_by_id(self.user1.pk)
+        other = UserCache(cache_alias="default")
+
+        with self.assertNumQueries(0):
+            user = other.get_by_email("teste@email.com")
+
+        self.assertEqual(user, self.user1)
+        self.assertEqual(other.stats()["shared_hits"], 1)
+
+    def test_local_entries_expire(self):
+        """
+        Tests that a user deactivated without this process knowing, as by
+        another worker, is read again once the local entry expired.
+        """
+        user_cache = UserCache(local_timeout=5)
+        user_cache.timer = lambda: 100.0
+        user_cache.get_by_email("teste@email.com")
+        User.objects.filter(pk=self.user1.pk).update(is_active=False)
+
+        self.assertTrue(user_cache.get_by_email("teste@email.com").is_active)
+        user_cache.timer = lambda: 105.0
+        with self.assertNumQueries(1):
+            self.assertFalse(user_cache.get_by_email("teste@email.com").is_active)
+
+
+class TestTokenCache(TestCase):
+    """
+    Tests the validated token cache.
+    ...
+    Methods:
+        test_token_is_verified_once():
+            Tests that authenticating a reused token skips its verification.
+
+        test_token_expires_with_exp_claim():
+            Tests that entries are dropped once the token expired.
+
+        test_least_recently_used_token_is_evicted():
+            Tests that the LRU keeps at most maxsize tokens.
+    """
+
+    def test_token_is_verified_once(self):
+        """
+        Tests that the second request with a token doesn't decode it again.
+        """
+        user = User.objects.create_user(
+            name="Teste", email="teste@email.com",
+            terms_conditions=True, password="Teste123**")
+        access = get_tokens_for_user(user)["access"]
+        token_cache.clear()
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION="Bearer " + access)
+        authentication = StatelessJWTAuthentication()
+
+        with mock.patch.object(token_backend, "decode", wraps=token_backend.decode) as decode:
+            authentication.authenticate(request)
+            authentication.authenticate(request)
+
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(token_cache.stats()["hits"], 1)
+
+    def test_token_expires_with_exp_claim(self):
+        """
+        Tests that a token is not returned past its exp claim.
+        """
+        tokens = TokenCache(maxsize=2)
+        tokens.set("raw", {"exp": 100})
+
+        with mock.patch.object(TokenCache, "timer", return_value=99):
+            self.assertEqual(tokens.get("raw"), {"exp": 100})
+        with mock.patch.object(TokenCache, "timer", return_value=100):
+            self.assertIsNone(tokens.get("raw"))
+        self.assertEqual(tokens.stats()["expirations"], 1)
+        self.assertEqual(tokens.stats()["size"], 0)
+
+    def test_least_recently_used_token_is_evicted(self):
+        """
+        Tests that the least recently used token is evicted.
+        """
+        tokens = TokenCache(maxsize=2)
+        exp = time.time() + 60
+        for raw in ("first", "second"):
+            tokens.set(raw, {"exp": exp})
+        tokens.get("first")
+        tokens.set("third", {"exp": exp})
+
+        self.assertIsNone(tokens.get("second"))
+        self.assertIsNotNone(tokens.get("first"))
+        self.assertEqual(tokens.stats()["evictions"], 1)
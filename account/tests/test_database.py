@@ -0,0 +1,65 @@
+"""
+Module for account app database tuning tests.
+"""
+import tempfile
+from pathlib import Path
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, override_settings
+
+
+class TestSQLiteTuning(SimpleTestCase):
+    """
+    Tests the pragmas applied to new SQLite connections.
+    ...
+    Methods:
+        test_file_database_uses_wal():
+            Tests WAL, synchronous and busy timeout on a file database.
+
+        test_journal_mode_setting():
+            Tests that ACCOUNT_SQLITE overrides the journal mode.
+    """
+
+    def connect(self, path):
+        """
+        Returns a new connection to a SQLite file with a 2 second timeout.
+        """
+        handler = ConnectionHandler({"default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": path,
+            "OPTIONS": {"timeout": 2},
+        }})
+        connection = handler["default"]
+        self.addCleanup(connection.close)
+        return connection
+
+    def pragma(self, connection, name):
+        """
+        Returns the value of the given pragma.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_file_database_uses_wal(self):
+        """
+        Tests that a file database is switched to WAL with synchronous NORMAL
+        and the busy timeout of its OPTIONS.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            connection = self.connect(str(Path(directory) / "db.sqlite3"))
+
+            self.assertEqual(self.pragma(connection, "journal_mode"), "wal")
+            self.assertEqual(self.pragma(connection, "synchronous"), 1)
+            self.assertEqual(self.pragma(connection, "busy_timeout"), 2000)
+            connection.close()
+
+    @override_settings(ACCOUNT_SQLITE={"JOURNAL_MODE": "DELETE"})
+    def test_journal_mode_setting(self):
+        """
+        Tests that the journal mode comes from the ACCOUNT_SQLITE setting.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            connection = self.connect(str(Path(directory) / "db.sqlite3"))
+
+            self.assertEqual(self.pragma(connection, "journal_mode"), "delete")
+            connection.close()
@@ -0,0 +1,132 @@
+"""
+Module for account app user export tests.
+"""
+import csv
+import io
+import json
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from account.exporting import export_users
+from account.models import User
+from account.views import get_tokens_for_user
+
+
+class TestUserExport(TestCase):
+    """
+    Tests the streaming user export.
+    ...
+    Methods:
+        setUp():
+            Creates an admin and a regular user.
+
+        test_export_reads_only_requested_columns():
+            Tests that only the requested columns are selected.
+
+        test_admin_streams_csv():
+            Tests that an admin streams the users as CSV.
+
+        test_csv_formulas_are_escaped():
+            Tests that cells starting a formula are quoted.
+
+        test_unknown_field_is_rejected():
+            Tests that the password can't be requested.
+
+        test_regular_user_is_forbidden():
+            Tests that regular users can't export users.
+
+        test_command_writes_jsonl():
+            Tests the export_users command.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creates an admin and a regular user.
+        """
+        self.client = APIClient()
+        self.url = reverse("export_users")
+        self.admin = User.objects.create_superuser(
+            name="Admin", email="admin@example.com", terms_conditions=True,
+            password="Teste123**")
+        self.user1 = User.objects.create_user(
+            name="Teste", email="teste@email.com", terms_conditions=True,
+            password="Teste123**")
+
+    def authenticate(self, user):
+        """
+        Sets the access token of the user on the client.
+        """
+        access = get_tokens_for_user(user)["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access)
+
+    def test_export_reads_only_requested_columns(self):
+        """
+        Tests that the query selects only the requested columns, never the
+        password, and that each chunk is one string.
+        """
+        with self.assertNumQueries(1) as queries:
+            chunks = list(export_users("jsonl", ("id", "email"), chunk_size=1))
+
+        self.assertNotIn("password", queries.captured_queries[0]["sql"])
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(json.loads(chunks[1]), {"id": self.user1.pk,
+                                                 "email": "teste@email.com"})
+
+    def test_admin_streams_csv(self):
+        """
+        Tests that an admin gets a streamed CSV with a header line.
+        """
+        self.authenticate(self.admin)
+        response = self.client.get(self.url, {"type": "csv", "fields": "email,is_admin"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        content = b"".join(response.streaming_content).decode("utf-8")
+        self.assertEqual(list(csv.reader(io.StringIO(content))), [
+            ["email", "is_admin"],
+            ["admin@example.com", "True"],
+            ["teste@email.com", "False"],
+        ])
+
+    def test_csv_formulas_are_escaped(self):
+        """
+        Tests that names a spreadsheet would evaluate are prefixed with a
+        quote in the CSV export and left as they are in JSON lines.
+        """
+        User.objects.filter(pk=self.user1.pk).update(name='=HYPERLINK("http://x")')
+        User.objects.filter(pk=self.admin.pk).update(name="@SUM(A1)")
+
+        content = "".join(export_users("csv", ("name",)))
+        self.assertEqual(list(csv.reader(io.StringIO(content))), [
+            ["name"], ["'@SUM(A1)"], ["'=HYPERLINK(\"http://x\")"]])
+        lines = "".join(export_users("jsonl", ("name",))).splitlines()
+        self.assertEqual(json.loads(lines[1])["name"], '=HYPERLINK("http://x")')
+
+    def test_unknown_field_is_rejected(self):
+        """
+        Tests that the password can't be requested.
+        """
+        self.authenticate(self.admin)
+        response = self.client.get(self.url, {"fields": "email,password"})
+
+        self.assertEqual(response.status_code, 422)
+
+    def test_regular_user_is_forbidden(self):
+        """
+        Tests that a non admin user gets a 403.
+        """
+        self.authenticate(self.user1)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_command_writes_jsonl(self):
+        """
+        Tests that the command writes a JSON line per user.
+        """
+        out = io.StringIO()
+        call_command("export_users", "--fields", "email", stdout=out)
+
+        self.assertEqual(
+            [json.loads(line) for line in out.getvalue().splitlines()],
+            [{"email": "admin@example.com"}, {"email": "teste@email.com"}])
@@ -0,0 +1,76 @@
+"""
+Module for account app password hashers tests.
+"""
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.test import TestCase, override_settings
+from account.models import User
+
+FAST_PBKDF2 = {"PBKDF2_ITERATIONS": 1000}
+SCRYPT_FIRST = [
+    "account.hashers.ScryptPasswordHasher",
+    "account.hashers.PBKDF2PasswordHasher",
+]
+
+
+class TestPasswordHashers(TestCase):
+    """
+    Tests the password hashing policy.
+    ...
+    Methods:
+        test_cost_is_read_from_settings():
+            Tests that the hasher uses the configured cost.
+
+        test_password_is_rehashed_when_cost_changes():
+            Tests that login rehashes a password with an outdated cost.
+
+        test_password_is_rehashed_when_algorithm_changes():
+            Tests that login rehashes a password with the preferred hasher.
+    """
+
+    def create_user(self):
+        """
+        Creates a user with the default password.
+        """
+        return User.objects.create_user(
+            name="Teste",
+            email="teste@email.com",
+            terms_conditions=True,
+            password="Teste123**"
+        )
+
+    @override_settings(ACCOUNT_PASSWORD_HASHING=FAST_PBKDF2)
+    def test_cost_is_read_from_settings(self):
+        """
+        Tests that the hasher uses the configured number of iterations.
+        """
+        self.assertTrue(make_password("Teste123**").startswith("pbkdf2_sha256$1000$"))
+
+    def test_password_is_rehashed_when_cost_changes(self):
+        """
+        Tests that login upgrades a hash made with an outdated cost, keeping
+        the password version.
+        """
+        with self.settings(ACCOUNT_PASSWORD_HASHING=FAST_PBKDF2):
+            user = self.create_user()
+
+        with self.settings(ACCOUNT_PASSWORD_HASHING={"PBKDF2_ITERATIONS": 2000}):
+            self.assertIsNotNone(
+                authenticate(email="teste@email.com", password="Teste123**"))
+
+        rehashed = User.objects.get(pk=user.pk)
+        self.assertTrue(rehashed.password.startswith("pbkdf2_sha256$2000$"))
+        self.assertEqual(rehashed.password_version, user.password_version)
+
+    @override_settings(ACCOUNT_PASSWORD_HASHING=FAST_PBKDF2)
+    def test_password_is_rehashed_when_algorithm_changes(self):
+        """
+        Tests that login rehashes a password with the preferred hasher.
+        """
+        user = self.create_user()
+
+        with self.settings(PASSWORD_HASHERS=SCRYPT_FIRST):
+            self.assertTrue(user.check_password("Teste123**"))
+
+        self.assertTrue(
+            User.objects.get(pk=user.pk).password.startswith("scrypt$"))
@@ -0,0 +1,85 @@
+"""
+Module for account app hashing service tests.
+"""
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from django.test import SimpleTestCase, override_settings
+from account.hashing import HashingService, hash_password
+
+FAST_PBKDF2 = {"PBKDF2_ITERATIONS": 1000}
+
+
+@override_settings(ACCOUNT_PASSWORD_HASHING=FAST_PBKDF2)
+class TestHashingService(SimpleTestCase):
+    """
+    Tests the password hashing service.
+    ...
+    Methods:
+        test_password_is_hashed_and_verified():
+            Tests hashing and verifying through the pool.
+
+        test_async_hashing():
+            Tests the async hashing methods.
+
+        test_queue_depth_is_tracked():
+            Tests that hashes waiting for a worker are counted.
+
+        test_executor_matches_hasher():
+            Tests that the pool kind follows the preferred hasher.
+    """
+
+    def test_password_is_hashed_and_verified(self):
+        """
+        Tests that a password hashed on the pool verifies.
+        """
+        service = HashingService(max_workers=2)
+        encoded = service.make_password("Teste123**")
+
+        self.assertEqual(service.verify_password("Teste123**", encoded), (True, False))
+        self.assertEqual(service.verify_password("wrong", encoded), (False, False))
+        self.assertEqual(service.stats()["completed"], 3)
+
+    def test_async_hashing(self):
+        """
+        Tests that the async methods hash and verify on the pool.
+        """
+        service = HashingService(max_workers=2)
+
+        async def hash_and_verify():
+            encoded = await service.amake_password("Teste123**")
+            return await service.averify_password("Teste123**", encoded)
+
+        self.assertEqual(asyncio.run(hash_and_verify()), (True, False))
+
+    def test_queue_depth_is_tracked(self):
+        """
+        Tests that hashes beyond max_workers wait and are counted.
+        """
+        service = HashingService(max_workers=1)
+        release = threading.Event()
+        # pylint: disable=protected-access
+        futures = [service._submit(release.wait, 5)]
+        futures += [service._submit(hash_password, "Teste123**") for _ in range(2)]
+
+        self.assertEqual(service.stats()["queue_depth"], 2)
+        release.set()
+        for future in futures:
+            future.result()
+
+        stats = service.stats()
+        self.assertEqual(stats["in_flight"], 0)
+        self.assertEqual(stats["peak_queue_depth"], 2)
+
+    def test_executor_matches_hasher(self):
+        """
+        Tests that GIL releasing hashers use threads and others processes.
+        """
+        service = HashingService(max_workers=1)
+        self.assertIsInstance(service.executor(), ThreadPoolExecutor)
+
+        with self.settings(PASSWORD_HASHERS=[
+                "django.contrib.auth.hashers.MD5PasswordHasher"]):
+            executor = service.executor()
+            self.assertIsInstance(executor, ProcessPoolExecutor)
+            executor.shutdown()
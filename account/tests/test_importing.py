@@ -0,0 +1,186 @@
+"""
+Module for account app user import tests.
+"""
+import io
+import json
+import tempfile
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+from account.importing import UserImporter, read_rows
+from account.models import User
+from account.views import get_tokens_for_user
+
+
+def user_rows(count, start=0):
+    """
+    Returns count rows of user data with passwords.
+    """
+    return [{
+        "email": f"user{index}@example.com",
+        "name": f"User {index}",
+        "terms_conditions": True,
+        "password": "Teste123**",
+    } for index in range(start, start + count)]
+
+
+class TestUserImporter(TestCase):
+    """
+    Tests the bulk user importer.
+    ...
+    Methods:
+        test_valid_rows_are_created():
+            Tests that the valid rows are created and the others reported.
+
+        test_chunk_queries_do_not_grow_with_rows():
+            Tests that a chunk is validated and written in constant queries.
+
+        test_password_hash_is_stored_as_is():
+            Tests that pre-hashed passwords skip hashing.
+
+        test_command_imports_csv():
+            Tests the import_users command on a CSV file.
+
+        test_jsonl_invalid_lines_are_reported():
+            Tests that undecodable JSON lines are reported as invalid rows.
+    """
+
+    def test_valid_rows_are_created(self):
+        """
+        Tests that valid rows are created and duplicated or invalid rows are
+        reported by row number.
+        """
+        rows = user_rows(3) + [
+            {**user_rows(1)[0], "name": "Duplicate"},
+            {"email": "invalid", "name": "Invalid", "terms_conditions": True,
+             "password": "Teste123**"},
+            {"email": "nopassword@example.com", "name": "No password",
+             "terms_conditions": True},
+        ]
+
+        report = UserImporter(batch_size=2).import_rows(rows)
+
+        self.assertEqual(report["created"], 3)
+        self.assertEqual(report["failed"], 3)
+        self.assertEqual([error["row"] for error in report["errors"]], [4, 5, 6])
+        user = User.objects.get(email="user0@example.com")
+        self.assertTrue(user.check_password("Teste123**"))
+        self.assertEqual(user.password_version, 1)
+
+    def test_chunk_queries_do_not_grow_with_rows(self):
+        """
+        Tests that one email lookup and one INSERT, in a savepoint, are made
+        per chunk.
+        """
+        importer = UserImporter(batch_size=100)
+        with self.assertNumQueries(4):
+            importer.import_chunk(user_rows(2))
+        with self.assertNumQueries(4):
+            importer.import_chunk(user_rows(50, start=2))
+
+        self.assertEqual(User.objects.count(), 52)
+
+    def test_password_hash_is_stored_as_is(self):
+        """
+        Tests that a password_hash of a configured hasher is stored unchanged
+        and an unknown one is rejected.
+        """
+        encoded = make_password("Legacy123**")
+        report = UserImporter().import_rows([
+            {"email": "legacy@example.com", "name": "Legacy",
+             "terms_conditions": True, "password_hash": encoded},
+            {"email": "unknown@example.com", "name": "Unknown",
+             "terms_conditions": True, "password_hash": "md4$x$y"},
+        ])
+
+        self.assertEqual(report["created"], 1)
+        self.assertEqual(report["errors"][0]["row"], 2)
+        user = User.objects.get(email="legacy@example.com")
+        self.assertEqual(user.password, encoded)
+        self.assertTrue(user.check_password("Legacy123**"))
+
+    def test_command_imports_csv(self):
+        """
+        Tests that the command streams a CSV file, blank cells being missing.
+        """
+        with tempfile.NamedTemporaryFile("w", suffix=".csv") as file:
+            file.write("email,name,terms_conditions,password,password_hash\n"
+                       "csv1@example.com,Csv 1,true,Teste123**,\n"
+                       "csv2@example.com,Csv 2,false,Teste123**,\n"
+                       "csv3@example.com,Csv 3,true,,\n")
+            file.flush()
+            out, err = io.StringIO(), io.StringIO()
+            call_command("import_users", file.name, stdout=out, stderr=err)
+
+        self.assertIn("2 created, 1 failed", out.getvalue())
+        self.assertIn("row 3:", err.getvalue())
+        self.assertFalse(User.objects.get(email="csv2@example.com").terms_conditions)
+
+    def test_jsonl_invalid_lines_are_reported(self):
+        """
+        Tests that undecodable JSON lines are reported as invalid rows.
+        """
+        stream = io.StringIO(json.dumps(user_rows(1)[0]) + "\n{oops\n\n")
+        report = UserImporter().import_rows(read_rows(stream, "jsonl"))
+
+        self.assertEqual(report["created"], 1)
+        self.assertEqual(report["errors"][0]["row"], 2)
+
+
+class TestUserImportView(TestCase):
+    """
+    Tests the user import view.
+    ...
+    Methods:
+        setUp():
+            Creates an admin and a regular user.
+
+        test_admin_imports_users():
+            Tests that an admin imports a JSON list of users.
+
+        test_regular_user_is_forbidden():
+            Tests that regular users can't import users.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creates an admin and a regular user.
+        """
+        self.client = APIClient()
+        self.url = reverse("import_users")
+        self.admin = User.objects.create_superuser(
+            name="Admin", email="admin@example.com", terms_conditions=True,
+            password="Teste123**")
+        self.user1 = User.objects.create_user(
+            name="Teste", email="teste@email.com", terms_conditions=True,
+            password="Teste123**")
+
+    def authenticate(self, user):
+        """
+        Sets the access token of the user on the client.
+        """
+        access = get_tokens_for_user(user)["access"]
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + access)
+
+    def test_admin_imports_users(self):
+        """
+        Tests that an admin imports a JSON list and gets the report.
+        """
+        self.authenticate(self.admin)
+        response = self.client.post(self.url, user_rows(3), format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 3)
+        self.assertTrue(User.objects.filter(email="user2@example.com").exists())
+
+    def test_regular_user_is_forbidden(self):
+        """
+        Tests that a non admin user gets a 403.
+        """
+        self.authenticate(self.user1)
+        response = self.client.post(self.url, user_rows(1), format="json")
+
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(User.objects.filter(email="user0@example.com").exists())
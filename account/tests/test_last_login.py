@@ -0,0 +1,153 @@
+"""
+Module for account app last login tests.
+"""
+import threading
+from unittest import mock
+from django.test import TestCase
+from django.urls import reverse
+from account.last_login import LastLoginRecorder, last_logins
+from account.models import User
+
+
+class TestLastLoginRecorder(TestCase):
+    """
+    Tests the coalescing of last_login writes.
+    ...
+    Methods:
+        setUp():
+            Creates a user.
+
+        test_login_records_last_login():
+            Tests that the login view writes last_login when enabled.
+
+        test_last_login_is_off_by_default():
+            Tests that logins write nothing unless a mode is set.
+
+        test_granularity_skips_recent_logins():
+            Tests that a user is written once per granularity.
+
+        test_buffer_flushes_with_one_update():
+            Tests that buffered logins are written with one UPDATE.
+
+        test_buffer_flushes_without_traffic():
+            Tests that the background thread flushes with no further login.
+
+        test_always_writes_every_login():
+            Tests that no login is coalesced in always mode.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creates a user and clears the process wide recorder.
+        """
+        self.user = User.objects.create_user(
+            name="Teste",
+            email="teste@email.com",
+            terms_conditions=True,
+            password="Teste123**"
+        )
+        self.other = User.objects.create_user(
+            name="Outro",
+            email="outro@email.com",
+            terms_conditions=True,
+            password="Teste123**"
+        )
+        last_logins.clear()
+
+    def stored(self, user):
+        """
+        Returns the last_login stored for the user.
+        """
+        return User.objects.values_list("last_login", flat=True).get(pk=user.pk)
+
+    def login(self):
+        """
+        Logs the user in and returns the response.
+        """
+        return self.client.post(reverse("login"), {
+            "email": self.user.email, "password": "Teste123**"})
+
+    def test_login_records_last_login(self):
+        """
+        Tests that a successful login stores last_login when a mode is set.
+        """
+        with mock.patch.object(last_logins, "mode", "granularity"):
+            response = self.login()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(self.stored(self.user))
+        self.assertEqual(last_logins.stats()["logins"], 1)
+
+    def test_last_login_is_off_by_default(self):
+        """
+        Tests that by default a login adds no write.
+        """
+        with self.assertNumQueries(1):
+            response = self.login()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(self.stored(self.user))
+
+    def test_granularity_skips_recent_logins(self):
+        """
+        Tests that logins within the granularity issue no query, and that a
+        value written by another process within it is kept.
+        """
+        recorder = LastLoginRecorder(mode="granularity", granularity=3600)
+        with self.assertNumQueries(1):
+            recorder.record(self.user)
+        first = self.stored(self.user)
+
+        with self.assertNumQueries(0):
+            for _ in range(3):
+                recorder.record(self.user)
+        LastLoginRecorder(mode="granularity", granularity=3600).record(self.user)
+
+        self.assertEqual(self.stored(self.user), first)
+        self.assertEqual(recorder.stats(),
+                         {"logins": 4, "writes": 1, "coalesced": 3, "pending": 0})
+
+    def test_buffer_flushes_with_one_update(self):
+        """
+        Tests that the logins of several users are written by one UPDATE
+        once the flush interval elapses.
+        """
+        recorder = LastLoginRecorder(mode="buffer", flush_interval=60)
+        with self.assertNumQueries(0):
+            for user in (self.user, self.other, self.user):
+                recorder.record(user)
+        self.assertIsNone(self.stored(self.user))
+        self.assertEqual(recorder.stats()["pending"], 2)
+
+        with mock.patch("account.last_login.time.monotonic", return_value=10 ** 9), \
+                self.assertNumQueries(1):
+            recorder.record(self.other)
+
+        self.assertIsNotNone(self.stored(self.user))
+        self.assertIsNotNone(self.stored(self.other))
+        self.assertEqual(recorder.stats(),
+                         {"logins": 4, "writes": 1, "coalesced": 3, "pending": 0})
+
+    def test_buffer_flushes_without_traffic(self):
+        """
+        Tests that a buffered login is flushed by the background thread once
+        the interval elapses, without waiting for the next login.
+        """
+        recorder = LastLoginRecorder(mode="buffer", flush_interval=0.01, background=True)
+        flushed = threading.Event()
+
+        with mock.patch.object(recorder, "flush", side_effect=flushed.set):
+            recorder.record(self.user)
+            self.assertTrue(flushed.wait(timeout=5))
+            recorder.stop()
+
+    def test_always_writes_every_login(self):
+        """
+        Tests that always mode issues one UPDATE per login.
+        """
+        recorder = LastLoginRecorder(mode="always")
+        with self.assertNumQueries(2):
+            recorder.record(self.user)
+            recorder.record(self.user)
+
+        self.assertEqual(recorder.stats()["coalesced"], 0)
@@ -0,0 +1,81 @@
+"""
+Module for account app load test tests.
+"""
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import LiveServerTestCase, SimpleTestCase, override_settings
+from account.loadtest import ENDPOINTS, LoadTest, compare, percentile
+
+UNTHROTTLED = {**settings.REST_FRAMEWORK, "DEFAULT_THROTTLE_RATES": dict.fromkeys(
+    settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"])}
+
+
+class TestLoadTestResults(SimpleTestCase):
+    """
+    Tests the result computations.
+    ...
+    Methods:
+        test_percentile():
+            Tests nearest-rank percentiles.
+
+        test_compare_flags_regressions():
+            Tests the baseline comparison.
+
+        test_command_rejects_too_few_iterations():
+            Tests that runs without samples are refused.
+    """
+
+    def test_percentile(self):
+        """
+        Tests nearest-rank percentiles of 1..100.
+        """
+        samples = list(range(100, 0, -1))
+
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 95), 95)
+        self.assertEqual(percentile(samples, 100), 100)
+
+    def test_compare_flags_regressions(self):
+        """
+        Tests that throughput drops and p95 growth beyond the tolerance fail.
+        """
+        baseline = {"login": {"rps": 100.0, "p95": 50.0}}
+
+        self.assertEqual(compare({"login": {"rps": 80.0, "p95": 60.0}}, baseline), [])
+        self.assertEqual(compare({"register": {"rps": 1.0, "p95": 1e6}}, baseline), [])
+        self.assertEqual(len(compare({"login": {"rps": 70.0, "p95": 70.0}}, baseline)), 2)
+
+    def test_command_rejects_too_few_iterations(self):
+        """
+        Tests that no iterations, or fewer than the threads, are refused
+        before any request is sent.
+        """
+        for iterations, concurrency in ((0, 1), (0, 0), (2, 4)):
+            with self.assertRaises(CommandError):
+                call_command("loadtest", iterations=iterations, concurrency=concurrency)
+            with self.assertRaises(ValueError):
+                LoadTest("http://127.0.0.1:1/", iterations, concurrency)
+
+
+@override_settings(REST_FRAMEWORK=UNTHROTTLED)
+class TestLoadTest(LiveServerTestCase):
+    """
+    Tests the load test against a live server.
+    ...
+    Methods:
+        test_every_endpoint_succeeds():
+            Tests that each endpoint is driven without errors.
+    """
+
+    def test_every_endpoint_succeeds(self):
+        """
+        Tests that the five endpoints are driven without failed requests.
+        """
+        # The live server threads share the in-memory SQLite connection, on
+        # which concurrent transactions, such as registrations, would nest.
+        results = LoadTest(self.live_server_url + "/api/user/", iterations=4,
+                           concurrency=1).run()
+
+        self.assertEqual(list(results), list(ENDPOINTS))
+        for endpoint, result in results.items():
+            self.assertEqual((result["requests"], result["errors"]), (4, 0), endpoint)
@@ -0,0 +1,284 @@
+"""
+Module for account app mail queue tests.
+"""
+import smtplib
+import socketserver
+import threading
+from unittest import mock
+from django.core import mail
+from django.core.mail.backends import smtp
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import SimpleTestCase, override_settings
+from account.mail import MailQueue, PooledSMTPBackend, smtp_pool
+from account.utils import Util
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Minimal SMTP session accepting every message.
+    """
+
+    def reply(self, line):
+        """
+        Writes a reply line to the client.
+        """
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply("220 localhost ready")
+        for raw in self.rfile:
+            command = raw.decode("ascii").strip().upper()
+            if command.startswith("EHLO"):
+                self.reply("250 localhost")
+            elif command.startswith("RCPT") and any(
+                    address.upper() in command for address in self.server.refused):
+                self.reply("550 no such user")
+            elif command == "DATA":
+                self.reply("354 end with .")
+                for line in self.rfile:
+                    if line in (b".\r\n", b".\n"):
+                        break
+                self.server.messages += 1
+                self.reply("250 queued")
+                if self.server.drop_after_message:
+                    return
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:
+                self.reply("250 ok")
+
+
+class SMTPServer(socketserver.ThreadingTCPServer):
+    """
+    Local SMTP stand-in counting connections and messages.
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SMTPHandler)
+        self.connections = 0
+        self.messages = 0
+        self.drop_after_message = False
+        self.refused = set()
+
+
+class FlakyBackend(EmailBackend):
+    """
+    Locmem backend that fails the first send of every message.
+    """
+    attempts = {}
+
+    def send_messages(self, messages):
+        for message in messages:
+            attempt = FlakyBackend.attempts.get(message.subject, 0)
+            FlakyBackend.attempts[message.subject] = attempt + 1
+            if attempt == 0:
+                raise ConnectionError("SMTP server unavailable")
+        return super().send_messages(messages)
+
+
+class TestMailQueue(SimpleTestCase):
+    """
+    Tests the background mail queue.
+    ...
+    Methods:
+        test_queued_emails_are_delivered():
+            Tests that queued emails are sent by the worker.
+
+        test_failed_email_is_retried():
+            Tests that a failed email is sent again.
+
+        test_email_is_dropped_after_max_retries():
+            Tests that an email is given up after max_retries.
+    """
+
+    def build_data(self, subject):
+        """
+        Returns the data of a reset email with the given subject.
+        """
+        return {
+            "subject": subject,
+            "body": "Reset link",
+            "receiver_email": "teste@email.com",
+        }
+
+    def test_queued_emails_are_delivered(self):
+        """
+        Tests that queued emails are sent by the worker.
+        """
+        mail_queue = MailQueue(batch_size=5)
+        for index in range(12):
+            mail_queue.enqueue(Util.build_email(self.build_data(str(index))))
+
+        self.assertTrue(mail_queue.flush(timeout=5))
+        self.assertEqual(len(mail.outbox), 12)
+        self.assertEqual(mail_queue.stats()["sent"], 12)
+
+    @override_settings(EMAIL_BACKEND="account.tests.test_mail.FlakyBackend")
+    def test_failed_email_is_retried(self):
+        """
+        Tests that a failed email is sent on its next attempt.
+        """
+        mail_queue = MailQueue(backoff=0.01)
+        with self.assertLogs("account.mail", "ERROR"):
+            mail_queue.enqueue(Util.build_email(self.build_data("retried")))
+            self.assertTrue(mail_queue.flush(timeout=5))
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail_queue.stats()["retried"], 1)
+
+    @override_settings(EMAIL_BACKEND="account.tests.test_mail.FlakyBackend")
+    def test_email_is_dropped_after_max_retries(self):
+        """
+        Tests that an email is dropped once it runs out of retries.
+        """
+        mail_queue = MailQueue(max_retries=0)
+        with self.assertLogs("account.mail", "ERROR"):
+            mail_queue.enqueue(Util.build_email(self.build_data("dropped")))
+            self.assertTrue(mail_queue.flush(timeout=5))
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(mail_queue.stats()["failed"], 1)
+
+
+class TestPooledSMTPBackend(SimpleTestCase):
+    """
+    Tests the pooled SMTP backend against a local SMTP server.
+    ...
+    Methods:
+        setUp():
+            Starts the local SMTP server.
+
+        test_connection_is_reused():
+            Tests that consecutive sends share one connection.
+
+        test_dropped_connection_is_reopened():
+            Tests that a message is resent on a new connection.
+
+        test_failed_connection_is_not_pooled():
+            Tests that a connection a send failed on is closed.
+
+        test_batch_continues_after_failed_message():
+            Tests that the next message is sent on a new connection.
+
+        test_refused_recipient_keeps_connection():
+            Tests that a refused recipient doesn't discard the session.
+    """
+
+    def setUp(self) -> None:
+        """
+        Starts the local SMTP server and empties the pool.
+        """
+        smtp_pool.clear()
+        self.server = SMTPServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(smtp_pool.clear)
+
+    def build_backend(self):
+        """
+        Returns a backend pointing to the local SMTP server.
+        """
+        return PooledSMTPBackend(
+            host="127.0.0.1", port=self.server.server_address[1],
+            username="", password="", use_tls=False)
+
+    def build_emails(self, count):
+        """
+        Returns the given number of reset emails.
+        """
+        return [Util.build_email({
+            "subject": "Password reset.",
+            "body": "Reset link",
+            "receiver_email": f"teste{index}@email.com",
+        }) for index in range(count)]
+
+    def test_connection_is_reused(self):
+        """
+        Tests that separate backend instances share one warm connection.
+        """
+        reused = smtp_pool.stats()["reused"]
+        for email in self.build_emails(3):
+            self.assertEqual(self.build_backend().send_messages([email]), 1)
+
+        self.assertEqual(self.server.messages, 3)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(smtp_pool.stats()["reused"] - reused, 2)
+
+    def test_dropped_connection_is_reopened(self):
+        """
+        Tests that a message failing on a dropped connection is resent.
+        """
+        self.server.drop_after_message = True
+        reconnects = smtp_pool.stats()["reconnects"]
+        for email in self.build_emails(2):
+            self.assertEqual(self.build_backend().send_messages([email]), 1)
+
+        self.assertEqual(self.server.messages, 2)
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual(smtp_pool.stats()["reconnects"] - reconnects, 1)
+
+    def test_failed_connection_is_not_pooled(self):
+        """
+        Tests that a connection is discarded after an error that isn't a
+        disconnection, and that the next message opens a new one.
+        """
+        discarded = smtp_pool.stats()["discarded"]
+        backend = self.build_backend()
+        backend.fail_silently = True
+        error = smtplib.SMTPDataError(451, b"Local error")
+        with mock.patch.object(smtp.EmailBackend, "_send", side_effect=error):
+            self.assertEqual(backend.send_messages(self.build_emails(1)), 0)
+
+        self.assertEqual(smtp_pool.stats()["idle"], 0)
+        self.assertEqual(smtp_pool.stats()["discarded"] - discarded, 1)
+        self.assertEqual(self.build_backend().send_messages(self.build_emails(1)), 1)
+        self.assertEqual(self.server.connections, 2)
+
+    def test_batch_continues_after_failed_message(self):
+        """
+        Tests that when the first of two messages fails, the connection is
+        discarded and the second is sent on a new one.
+        """
+        send = smtp.EmailBackend._send
+        failed = []
+
+        def fail_first(backend, message):
+            if not failed:
+                failed.append(message)
+                raise smtplib.SMTPDataError(451, b"Local error")
+            return send(backend, message)
+
+        backend = self.build_backend()
+        backend.fail_silently = True
+        with mock.patch.object(smtp.EmailBackend, "_send", autospec=True,
+                               side_effect=fail_first):
+            self.assertEqual(backend.send_messages(self.build_emails(2)), 1)
+
+        self.assertEqual(self.server.messages, 1)
+        self.assertEqual(self.server.connections, 2)
+
+    def test_refused_recipient_keeps_connection(self):
+        """
+        Tests that a message to a refused recipient fails alone, and the
+        next message is sent on the same connection.
+        """
+        self.server.refused.add("teste0@email.com")
+        discarded = smtp_pool.stats()["discarded"]
+        backend = self.build_backend()
+        backend.fail_silently = True
+
+        self.assertEqual(backend.send_messages(self.build_emails(2)), 1)
+        self.assertEqual(self.server.messages, 1)
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(smtp_pool.stats()["discarded"], discarded)
+
+        backend.fail_silently = False
+        with self.assertRaises(smtplib.SMTPRecipientsRefused):
+            backend.send_messages(self.build_emails(1))
+        self.assertIsNotNone(backend.connection)
+        self.assertEqual(smtp_pool.stats()["discarded"], discarded)
@@ -0,0 +1,165 @@
+"""
+Module for account app request metrics tests.
+"""
+from unittest import mock
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+from account.metrics import Histogram, metrics, observe_query
+from account.models import User
+
+
+class TestHistogram(SimpleTestCase):
+    """
+    Tests the histogram quantiles.
+    ...
+    Methods:
+        test_quantiles_are_interpolated():
+            Tests p50/p95/p99 within the buckets.
+    """
+
+    def test_quantiles_are_interpolated(self):
+        """
+        Tests that quantiles are interpolated within their bucket.
+        """
+        histogram = Histogram((0.1, 0.2, 0.4))
+        for value in [0.05] * 50 + [0.15] * 45 + [0.3] * 5:
+            histogram.observe(value)
+
+        self.assertAlmostEqual(histogram.quantile(0.5), 0.1)
+        self.assertAlmostEqual(histogram.quantile(0.95), 0.2)
+        self.assertAlmostEqual(histogram.quantile(0.99), 0.36)
+        self.assertIsNone(Histogram((1,)).quantile(0.5))
+
+
+class TestMetricsMiddleware(TestCase):
+    """
+    Tests the request instrumentation.
+    ...
+    Methods:
+        setUp():
+            Creates a user and clears the metrics.
+
+        test_login_is_instrumented():
+            Tests the Server-Timing header and the route histogram.
+
+        test_server_timing_is_off_by_default():
+            Tests that clients get no timings unless enabled.
+
+        test_metrics_view():
+            Tests the Prometheus text export.
+
+        test_metrics_view_requires_token():
+            Tests that the export needs the bearer token.
+
+        test_disabled_metrics():
+            Tests that nothing is recorded or exported when disabled.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creates a user and clears the metrics.
+        """
+        self.user = User.objects.create_user(
+            name="Teste",
+            email="teste@email.com",
+            terms_conditions=True,
+            password="Teste123**"
+        )
+        metrics.clear()
+        self.addCleanup(metrics.clear)
+
+    def enabled_client(self):
+        """
+        Returns a client whose handler includes the middleware, with the
+        query observer installed on the test connection.
+        """
+        patcher = mock.patch.object(metrics, "enabled", True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        connection.execute_wrappers.append(observe_query)
+        self.addCleanup(connection.execute_wrappers.remove, observe_query)
+        return Client()
+
+    def login(self, client):
+        """
+        Logs the user in and returns the response.
+        """
+        return client.post(reverse("login"), {
+            "email": self.user.email, "password": "Teste123**"})
+
+    def test_login_is_instrumented(self):
+        """
+        Tests that a login reports its phases and queries and is added to
+        the histogram of its route.
+        """
+        client = self.enabled_client()
+        with mock.patch.object(metrics, "server_timing", True):
+            response = self.login(client)
+
+        self.assertEqual(response.status_code, 200)
+        timing = response["Server-Timing"]
+        for entry in ("total;dur=", "db;dur=", "authenticate;dur=", "tokens;dur="):
+            self.assertIn(entry, timing)
+        self.assertNotIn('desc="0 queries"', timing)
+        quantiles = metrics.quantiles("account_request_duration_seconds",
+                                      method="POST", route="api/user/login/")
+        self.assertIsNotNone(quantiles[0.99])
+
+    def test_server_timing_is_off_by_default(self):
+        """
+        Tests that the query counts and phases, which tell known emails from
+        unknown ones, are not sent to clients by default.
+        """
+        response = self.login(self.enabled_client())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)
+
+    def test_metrics_view(self):
+        """
+        Tests that the histograms, quantiles and counters are exported.
+        """
+        client = self.enabled_client()
+        self.login(client)
+        with mock.patch.object(metrics, "token", "scrape-token"):
+            response = client.get(reverse("metrics"),
+                                  HTTP_AUTHORIZATION="Bearer scrape-token")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn("# TYPE account_request_duration_seconds histogram", body)
+        self.assertIn('account_request_duration_seconds_bucket{method="POST",'
+                      'route="api/user/login/",le="+Inf"} 1', body)
+        self.assertIn('account_request_duration_seconds_quantile{method="POST",'
+                      'route="api/user/login/",quantile="0.99"}', body)
+        self.assertIn('account_requests_total{method="POST",route="api/user/login/",'
+                      'status="200"} 1', body)
+        self.assertIn('account_phase_duration_seconds_count{phase="authenticate"} 1', body)
+
+    def test_metrics_view_requires_token(self):
+        """
+        Tests that the export is refused without a configured token, and
+        with a missing or wrong one.
+        """
+        client = self.enabled_client()
+        url = reverse("metrics")
+        self.assertEqual(client.get(url, HTTP_AUTHORIZATION="Bearer ").status_code, 401)
+
+        with mock.patch.object(metrics, "token", "scrape-token"):
+            response = client.get(url)
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response["WWW-Authenticate"], 'Bearer realm="metrics"')
+            response = client.get(url, HTTP_AUTHORIZATION="Bearer wrong")
+            self.assertEqual(response.status_code, 401)
+
+    def test_disabled_metrics(self):
+        """
+        Tests that disabled metrics add no header and are not exported.
+        """
+        response = self.login(Client())
+
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(metrics.render(), "\n")
+        self.assertEqual(Client().get(reverse("metrics")).status_code, 404)
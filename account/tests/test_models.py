@@ -1,8 +1,11 @@
 """
 Module for account app models tests.
 """
+from unittest import skipUnless
+from django.contrib.auth import authenticate
+from django.db import IntegrityError, connection, transaction
 from django.test import TestCase
-from account.models import User
+from account.models import User, email_lookup
 
 
 class TestModels(TestCase):
@@ -54,3 +57,65 @@ class TestModels(TestCase):
         """
         created_superuser = User.objects.get(email="testesuper@email.com")
         self.assertTrue(created_superuser.is_admin)
+
+
+@skipUnless(connection.vendor == "sqlite", "query plans are SQLite's")
+class TestUserIndexes(TestCase):
+    """
+    Tests that the hot user queries are served by indexes.
+    ...
+    Methods:
+        test_email_lookup_is_case_insensitive():
+            Tests that emails are found whatever their case.
+
+        test_email_is_unique_case_insensitively():
+            Tests that an email differing only by case is rejected.
+
+        test_email_lookup_uses_lowered_index():
+            Tests the plan of the email lookup.
+
+        test_active_users_by_creation_use_partial_index():
+            Tests the plan of the active users listing.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            name="Teste",
+            email="Teste@email.com",
+            terms_conditions=True,
+            password="Teste123**"
+        )
+
+    def test_email_lookup_is_case_insensitive(self):
+        """
+        Tests that the manager and authenticate() ignore the email case.
+        """
+        self.assertEqual(User.objects.get_by_email("teste@EMAIL.com"), self.user)
+        self.assertEqual(User.objects.get_by_natural_key("TESTE@email.com"), self.user)
+        self.assertEqual(authenticate(email="teste@email.com", password="Teste123**"),
+                         self.user)
+
+    def test_email_is_unique_case_insensitively(self):
+        """
+        Tests that the lowered email unique index rejects case variants.
+        """
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create(name="Teste", email="teste@email.com",
+                                terms_conditions=True)
+
+    def test_email_lookup_uses_lowered_index(self):
+        """
+        Tests that SQLite searches the lowered email index.
+        """
+        plan = User.objects.filter(email_lookup("teste@email.com")).explain()
+
+        self.assertIn("SEARCH account_user USING INDEX account_user_email_lower_uniq", plan)
+
+    def test_active_users_by_creation_use_partial_index(self):
+        """
+        Tests that the newest active users are read from the partial index.
+        """
+        plan = User.objects.filter(is_active=True).order_by("-created_at")[:10].explain()
+
+        self.assertIn("USING INDEX account_user_active_created", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
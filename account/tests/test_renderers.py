@@ -0,0 +1,67 @@
+"""
+Module for account app renderers tests.
+"""
+import json
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.response import Response
+from account.renderers import UserRenderer, json_dumps, orjson_dumps
+
+
+class TestUserRenderer(SimpleTestCase):
+    """
+    Tests the user renderer.
+    ...
+    Methods:
+        test_error_status_is_wrapped():
+            Tests that error responses get the errors envelope.
+
+        test_wrapped_errors_are_not_wrapped_again():
+            Tests that an existing envelope is kept.
+
+        test_success_mentioning_error_detail_is_not_wrapped():
+            Tests that success bodies are never wrapped.
+
+        test_encoders_agree():
+            Tests that the orjson and stdlib encoders produce the same JSON.
+    """
+
+    def render(self, data, status_code):
+        """
+        Renders data for a response with the given status code.
+        """
+        response = Response(data, status=status_code)
+        rendered = UserRenderer().render(data, renderer_context={"response": response})
+        self.assertIsInstance(rendered, bytes)
+        return json.loads(rendered)
+
+    def test_error_status_is_wrapped(self):
+        """
+        Tests that serializer errors of an error response are wrapped.
+        """
+        errors = {"email": [ErrorDetail("This field is required.", code="required")]}
+        self.assertEqual(
+            self.render(errors, status.HTTP_422_UNPROCESSABLE_ENTITY),
+            {"errors": {"email": ["This field is required."]}})
+
+    def test_wrapped_errors_are_not_wrapped_again(self):
+        """
+        Tests that an errors envelope built by a view is kept as is.
+        """
+        errors = {"errors": {"non_field_errors": ["Invalid Email or Password!"]}}
+        self.assertEqual(self.render(errors, status.HTTP_401_UNAUTHORIZED), errors)
+
+    def test_success_mentioning_error_detail_is_not_wrapped(self):
+        """
+        Tests that a success body containing the text ErrorDetail is kept.
+        """
+        data = {"message": "ErrorDetail"}
+        self.assertEqual(self.render(data, status.HTTP_200_OK), data)
+
+    def test_encoders_agree(self):
+        """
+        Tests that the orjson and stdlib encoders produce the same JSON.
+        """
+        data = {"errors": {"email": [ErrorDetail("Inválido", code="invalid")]}, "n": 1}
+        self.assertEqual(json.loads(orjson_dumps(data)), json.loads(json_dumps(data)))
@@ -0,0 +1,186 @@
+"""
+Module for account app token revocation tests.
+"""
+import io
+from datetime import timedelta
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.settings import api_settings
+from account.cache import user_cache
+from account.models import RevokedToken, User
+from account.reset import reset_password
+from account.revocation import RevocationStore, revocation_store
+from account.tokens import UserRefreshToken
+from account.views import get_tokens_for_user
+
+
+class TestTokenRevocation(TestCase):
+    """
+    Tests token refresh, logout and the revocation store.
+    ...
+    Methods:
+        setUp():
+            Creates a user and its tokens.
+
+        test_refresh_rotates_token():
+            Tests that a refresh token can only be used once.
+
+        test_refresh_token_redeemed_elsewhere_is_rejected():
+            Tests that a refresh token claimed by another process is rejected.
+
+        test_refresh_rejects_user_deactivated_elsewhere():
+            Tests that refresh reads is_active from the database.
+
+        test_refresh_rejects_token_issued_before_password_change():
+            Tests that a password change or reset invalidates refresh tokens.
+
+        test_logout_revokes_tokens():
+            Tests that logout revokes the access and refresh tokens.
+
+        test_store_loads_other_revocations_periodically():
+            Tests that rows revoked elsewhere are loaded once per interval.
+
+        test_store_loads_rows_committed_out_of_order():
+            Tests that a row with a lower pk committed late is loaded.
+
+        test_prune_deletes_expired_tokens():
+            Tests the prune_revoked_tokens command.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creates a user and its tokens.
+        """
+        revocation_store.clear()
+        self.client = APIClient()
+        self.user1 = User.objects.create_user(
+            name="Teste", email="teste@email.com", terms_conditions=True,
+            password="Teste123**")
+        self.tokens = get_tokens_for_user(self.user1)
+
+    def test_refresh_rotates_token(self):
+        """
+        Tests that refreshing returns a new pair and revokes the used token.
+        """
+        url = reverse("token_refresh")
+        response = self.client.post(url, {"refresh": self.tokens["refresh"]})
+
+        self.assertEqual(response.status_code, 200)
+        new_refresh = response.json()["token"]["refresh"]
+        self.assertNotEqual(new_refresh, self.tokens["refresh"])
+
+        response = self.client.post(url, {"refresh": self.tokens["refresh"]})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(
+            self.client.post(url, {"refresh": new_refresh}).status_code, 200)
+
+    def test_refresh_token_redeemed_elsewhere_is_rejected(self):
+        """
+        Tests that a refresh token redeemed by another process, not yet
+        loaded here, gets no second pair.
+        """
+        refresh = UserRefreshToken(self.tokens["refresh"])
+        revocation_store.refresh()
+        self.assertTrue(RevocationStore().claim(refresh))
+        self.assertFalse(revocation_store.is_revoked(refresh[api_settings.JTI_CLAIM]))
+
+        response = self.client.post(reverse("token_refresh"),
+                                    {"refresh": self.tokens["refresh"]})
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(RevocationStore().claim(refresh))
+
+    def test_refresh_rejects_user_deactivated_elsewhere(self):
+        """
+        Tests that a user cached as active, then deactivated by another
+        process, can't refresh.
+        """
+        user_cache.get_by_id(self.user1.pk)
+        User.objects.filter(pk=self.user1.pk).update(is_active=False)
+
+        response = self.client.post(reverse("token_refresh"),
+                                    {"refresh": self.tokens["refresh"]})
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_rejects_token_issued_before_password_change(self):
+        """
+        Tests that a refresh token issued before a password change, or a
+        password reset, gets no new pair.
+        """
+        url = reverse("token_refresh")
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.tokens["access"])
+        response = self.client.post(reverse("password_change"), {
+            "password": "Teste123@@", "password2": "Teste123@@"})
+        self.assertEqual(response.status_code, 200)
+        self.client.credentials()
+        self.assertEqual(
+            self.client.post(url, {"refresh": self.tokens["refresh"]}).status_code, 401)
+
+        tokens = get_tokens_for_user(User.objects.get(pk=self.user1.pk))
+        reset_password(self.user1.pk, "Teste123##")
+        self.assertEqual(
+            self.client.post(url, {"refresh": tokens["refresh"]}).status_code, 401)
+
+    def test_logout_revokes_tokens(self):
+        """
+        Tests that after logout the access token is rejected without a query.
+        """
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer " + self.tokens["access"])
+        response = self.client.post(reverse("logout"), {"refresh": self.tokens["refresh"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(RevokedToken.objects.count(), 2)
+
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse("password_change"), {
+                "password": "Teste123@@", "password2": "Teste123@@"})
+        self.assertEqual(response.status_code, 401)
+
+    def test_store_loads_other_revocations_periodically(self):
+        """
+        Tests that a token revoked by another process is loaded on the first
+        check and that the next checks within the interval make no query.
+        """
+        RevokedToken.objects.create(
+            jti="revoked-elsewhere", expires_at=timezone.now() + timedelta(hours=1))
+        store = RevocationStore(refresh_interval=60)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(store.is_revoked("revoked-elsewhere"))
+        with self.assertNumQueries(0):
+            self.assertFalse(store.is_revoked("not-revoked"))
+        self.assertEqual(store.stats()["refreshes"], 1)
+
+    def test_store_loads_rows_committed_out_of_order(self):
+        """
+        Tests that a row inserted before the last load, with a lower pk, but
+        committed after it is loaded by the next refresh.
+        """
+        expires_at = timezone.now() + timedelta(hours=1)
+        RevokedToken.objects.create(pk=100, jti="committed-first", expires_at=expires_at)
+        store = RevocationStore()
+        store.refresh()
+
+        late = RevokedToken.objects.create(pk=50, jti="committed-late", expires_at=expires_at)
+        RevokedToken.objects.filter(pk=late.pk).update(
+            created_at=timezone.now() - timedelta(seconds=5))
+        self.assertFalse(store.is_revoked("committed-late"))
+        store.refresh()
+        self.assertTrue(store.is_revoked("committed-late"))
+
+    def test_prune_deletes_expired_tokens(self):
+        """
+        Tests that only the expired rows are deleted.
+        """
+        RevokedToken.objects.create(
+            jti="expired", expires_at=timezone.now() - timedelta(seconds=1))
+        RevokedToken.objects.create(
+            jti="unexpired", expires_at=timezone.now() + timedelta(hours=1))
+
+        out = io.StringIO()
+        call_command("prune_revoked_tokens", stdout=out)
+
+        self.assertIn("1 expired revoked tokens deleted", out.getvalue())
+        self.assertEqual(list(RevokedToken.objects.values_list("jti", flat=True)),
+                         ["unexpired"])
@@ -0,0 +1,96 @@
+"""
+Module for account app token signing tests.
+"""
+import jwt
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework_simplejwt.exceptions import TokenBackendError
+from account.signing import KeyRingTokenBackend, SigningKey, generate_private_key
+
+
+class TestJWKSView(SimpleTestCase):
+    """
+    Tests the JWKS view.
+    ...
+    Methods:
+        test_no_keys_are_published_with_hs256():
+            Tests that the shared secret is never published.
+    """
+
+    def test_no_keys_are_published_with_hs256(self):
+        """
+        Tests that an empty key set is returned for HS256 tokens.
+        """
+        response = self.client.get(reverse("jwks"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"keys": []})
+        self.assertIn("max-age", response["Cache-Control"])
+
+
+class TestKeyRingTokenBackend(SimpleTestCase):
+    """
+    Tests the asymmetric key ring token backend.
+    ...
+    Methods:
+        setUp():
+            Creates an old and a new signing key.
+
+        test_tokens_carry_active_kid():
+            Tests that tokens are signed by the active key.
+
+        test_rotated_key_still_verifies():
+            Tests that tokens of the former active key stay valid.
+
+        test_unknown_kid_is_rejected():
+            Tests that tokens of an unknown key are rejected.
+
+        test_jwks_has_public_keys_only():
+            Tests that no private key material is published.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creates an ES256 key and an EdDSA key replacing it.
+        """
+        self.old_key = SigningKey("2026-01", generate_private_key("ES256"))
+        self.new_key = SigningKey("2026-02", generate_private_key("EdDSA"))
+
+    def test_tokens_carry_active_kid(self):
+        """
+        Tests that the token header names the active key and algorithm.
+        """
+        backend = KeyRingTokenBackend([self.old_key, self.new_key], "2026-02")
+        token = backend.encode({"user_id": 1})
+
+        self.assertEqual(jwt.get_unverified_header(token),
+                         {"alg": "EdDSA", "kid": "2026-02", "typ": "JWT"})
+        self.assertEqual(backend.decode(token)["user_id"], 1)
+
+    def test_rotated_key_still_verifies(self):
+        """
+        Tests that a token signed before the rotation is still verified.
+        """
+        token = KeyRingTokenBackend([self.old_key], "2026-01").encode({"user_id": 1})
+        backend = KeyRingTokenBackend([self.old_key, self.new_key], "2026-02")
+
+        self.assertEqual(backend.decode(token)["user_id"], 1)
+
+    def test_unknown_kid_is_rejected(self):
+        """
+        Tests that a token signed by a key not in the ring is rejected.
+        """
+        token = KeyRingTokenBackend([self.old_key], "2026-01").encode({"user_id": 1})
+
+        with self.assertRaises(TokenBackendError):
+            KeyRingTokenBackend([self.new_key], "2026-02").decode(token)
+
+    def test_jwks_has_public_keys_only(self):
+        """
+        Tests that the key set lists both keys without private parameters.
+        """
+        jwks = KeyRingTokenBackend([self.old_key, self.new_key], "2026-02").jwks()
+
+        self.assertEqual([key["kid"] for key in jwks["keys"]], ["2026-01", "2026-02"])
+        for key in jwks["keys"]:
+            self.assertNotIn("d", key)
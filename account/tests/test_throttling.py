@@ -0,0 +1,163 @@
+"""
+Module for account app throttling tests.
+"""
+from unittest import mock
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from account.mail import mail_queue
+from account.models import User
+from account.throttling import LoginEmailThrottle, throttle_stats
+
+REST_FRAMEWORK = dict(settings.REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={
+    "login_ip": "100/min",
+    "login_email": "2/min",
+    "password_reset_ip": "100/hour",
+    "password_reset_email": "1/hour",
+})
+
+
+@override_settings(REST_FRAMEWORK=REST_FRAMEWORK)
+class TestThrottling(TestCase):
+    """
+    Tests the login and password reset throttles.
+    ...
+    Methods:
+        setUp():
+            Creates a user and empties the counters.
+
+        test_login_is_throttled_per_email():
+            Tests that excess logins are rejected before any query or hash.
+
+        test_password_reset_email_is_throttled():
+            Tests that excess reset requests send no email.
+
+        test_body_without_email_object():
+            Tests that a JSON body that is not an object isn't an error.
+
+        test_forwarded_for_is_not_trusted():
+            Tests that rotating X-Forwarded-For doesn't reset the IP window.
+
+        test_ip_rejected_logins_spare_email_window():
+            Tests that logins rejected per IP don't count per email.
+
+        test_previous_window_is_weighted():
+            Tests that the previous window counts for the part still covered.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creates a user and empties the throttle counters.
+        """
+        cache.clear()
+        throttle_stats.clear()
+        self.client = Client()
+        self.user1 = User.objects.create_user(
+            name="Teste",
+            email="teste@email.com",
+            terms_conditions=True,
+            password="Teste123**"
+        )
+
+    def test_login_is_throttled_per_email(self):
+        """
+        Tests that logins over the email rate get a 429 without a query or a
+        password hash, whatever the case of the email.
+        """
+        url = reverse("login")
+        for _ in range(2):
+            response = self.client.post(url, {"email": "teste@email.com",
+                                              "password": "wrong"})
+            self.assertEqual(response.status_code, 401)
+
+        with self.assertNumQueries(0), \
+                mock.patch("account.models.hashing_service.verify_password") as verify:
+            response = self.client.post(url, {"email": "TESTE@email.com",
+                                              "password": "Teste123**"})
+
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        verify.assert_not_called()
+        self.assertEqual(throttle_stats.stats(), {"rejected": 1, "hashes_avoided": 1})
+
+    def test_password_reset_email_is_throttled(self):
+        """
+        Tests that reset requests over the email rate send no email.
+        """
+        url = reverse("send_reset_password_email")
+        self.assertEqual(
+            self.client.post(url, {"email": self.user1.email}).status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.client.post(url, {"email": self.user1.email})
+
+        self.assertEqual(response.status_code, 429)
+        mail_queue.flush(timeout=5)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(throttle_stats.stats()["emails_avoided"], 1)
+
+    def test_body_without_email_object(self):
+        """
+        Tests that a JSON array body is only counted per IP and rejected by
+        the serializers, not a server error in the email throttles.
+        """
+        for name, status_code in (("login", 401), ("send_reset_password_email", 200)):
+            response = self.client.post(reverse(name), "[1]", content_type="application/json")
+            self.assertEqual(response.status_code, status_code, name)
+
+    @override_settings(REST_FRAMEWORK=dict(REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={
+        **REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], "login_ip": "1/min"}))
+    def test_forwarded_for_is_not_trusted(self):
+        """
+        Tests that a client sending a different X-Forwarded-For header on
+        each request is still counted by its address.
+        """
+        url = reverse("login")
+        for index, status_code in enumerate((401, 429, 429)):
+            response = self.client.post(url, {"email": f"user{index}@email.com",
+                                              "password": "wrong"},
+                                        HTTP_X_FORWARDED_FOR=f"10.1.0.{index}")
+            self.assertEqual(response.status_code, status_code)
+
+    @override_settings(REST_FRAMEWORK=dict(REST_FRAMEWORK, DEFAULT_THROTTLE_RATES={
+        **REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"], "login_ip": "1/min"}))
+    def test_ip_rejected_logins_spare_email_window(self):
+        """
+        Tests that an IP over its rate doesn't use up the email window, so
+        the owner of the email still logs in from another IP.
+        """
+        url = reverse("login")
+        self.client.post(url, {"email": "teste@email.com", "password": "wrong"})
+        for _ in range(3):
+            response = self.client.post(url, {"email": "teste@email.com",
+                                              "password": "wrong"})
+            self.assertEqual(response.status_code, 429)
+
+        response = self.client.post(url, {"email": "teste@email.com",
+                                          "password": "Teste123**"},
+                                    REMOTE_ADDR="10.0.0.2")
+        self.assertEqual(response.status_code, 200)
+
+    def test_previous_window_is_weighted(self):
+        """
+        Tests that two requests at the end of a window still count for three
+        quarters of them a quarter into the next window.
+        """
+        def request():
+            return mock.Mock(data={"email": "teste@email.com"})
+        throttle = LoginEmailThrottle()
+
+        with mock.patch.object(LoginEmailThrottle, "timer", return_value=59.0):
+            self.assertTrue(throttle.allow_request(request(), None))
+            self.assertTrue(throttle.allow_request(request(), None))
+            self.assertFalse(throttle.allow_request(request(), None))
+
+        with mock.patch.object(LoginEmailThrottle, "timer", return_value=75.0):
+            # 2 * 0.75 previous + 0 current requests
+            self.assertTrue(throttle.allow_request(request(), None))
+            # 2 * 0.75 previous + 1 current requests
+            self.assertFalse(throttle.allow_request(request(), None))
+            # Until 2 * 0.5 previous + 1 current requests, halfway through.
+            self.assertEqual(throttle.wait(), 15.0)
@@ -2,9 +2,25 @@
 Module for account app views tests.
 """
 import json
+from io import StringIO
+from datetime import timedelta
+from unittest import mock
+from django.core import mail
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.models import F
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from account.models import User
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from account.cache import user_cache
+from account.hashing import hashing_service
+from account.mail import mail_queue
+from account.models import PasswordResetToken, User
+from account.reset import create_reset_token
+from account.tokens import UserAccessToken
 
 
 class TestRegisterView(TestCase):
@@ -20,6 +36,18 @@ class TestRegisterView(TestCase):
 
         test_unsuccessful_user_register_post():
             Tests unsuccessful register post.
+
+        test_register_is_one_insert():
+            Tests that registering writes the user with one INSERT only.
+
+        test_duplicate_email_register_post():
+            Tests that a taken email, in any case, is rejected.
+
+        test_other_integrity_errors_are_raised():
+            Tests that only email constraints read as a duplicate email.
+
+        test_weak_password_is_not_hashed():
+            Tests that a weak password is rejected before hashing.
     """
 
     def setUp(self) -> None:
@@ -62,6 +90,71 @@ class TestRegisterView(TestCase):
         self.assertEqual(response.status_code, 422)
         self.assertTrue("errors" in response_body)
 
+    def register(self, email="email@example.com", password="Teste123@@"):
+        """
+        Posts a registration and returns the response.
+        """
+        return self.client.post(self.register_url, {
+            "name": "Teste",
+            "email": email,
+            "password": password,
+            "password2": password,
+            "terms_conditions": "True"
+        })
+
+    def test_register_is_one_insert(self):
+        """
+        Tests that no duplicate email SELECT precedes the INSERT, the
+        statements left being its savepoint.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.register()
+
+        self.assertEqual(response.status_code, 201)
+        statements = [query["sql"].split()[0] for query in queries.captured_queries]
+        self.assertEqual([sql for sql in statements
+                          if sql not in ("SAVEPOINT", "RELEASE")], ["INSERT"])
+
+    def test_duplicate_email_register_post(self):
+        """
+        Tests that the unique constraint rejects a taken email, whatever its
+        case, with the 422 email error, and the connection stays usable.
+        """
+        self.assertEqual(self.register().status_code, 201)
+
+        for email in ("email@example.com", "EMAIL@example.com"):
+            response = self.register(email)
+
+            response_body = json.loads(response.content.decode("utf-8"))
+            self.assertEqual(response.status_code, 422)
+            self.assertEqual(response_body["errors"]["email"],
+                             ["user with this Email already exists."])
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_other_integrity_errors_are_raised(self):
+        """
+        Tests that an IntegrityError from another constraint is not reported
+        as a taken email.
+        """
+        error = IntegrityError("NOT NULL constraint failed: account_user.name")
+        with mock.patch.object(User.objects, "create_user", side_effect=error), \
+                self.assertRaises(IntegrityError):
+            self.register()
+
+    def test_weak_password_is_not_hashed(self):
+        """
+        Tests that AUTH_PASSWORD_VALIDATORS reject a weak password with a 422
+        password error, without hashing it or querying the database.
+        """
+        with mock.patch("account.models.hashing_service.make_password") as make, \
+                self.assertNumQueries(0):
+            response = self.register(password="12345678")
+
+        response_body = json.loads(response.content.decode("utf-8"))
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("password", response_body["errors"])
+        make.assert_not_called()
+
 
 class TestLoginView(TestCase):
     """
@@ -148,6 +241,9 @@ class TestPasswordChangeView(TestCase):
 
         test_unsuccessful_password_change():
             Tests unsuccessful password change post.
+
+        test_password_change_ignores_stale_cached_user():
+            Tests that the change bumps the stored password version.
     """
 
     def setUp(self) -> None:
@@ -192,6 +288,21 @@ class TestPasswordChangeView(TestCase):
         self.assertEqual(response_body["message"],
                          "Password was changed successfully.")
 
+        # Tokens issued before the change are rejected, the returned ones work.
+        response = self.client.post(self.change_password_url, {
+            "password": "Newpassword123**",
+            "password2": "Newpassword123**"
+        }, content_type="application/json",
+            **headers)
+        self.assertEqual(response.status_code, 401)
+
+        response = self.client.post(self.change_password_url, {
+            "password": "Newpassword123**",
+            "password2": "Newpassword123**"
+        }, content_type="application/json",
+            HTTP_AUTHORIZATION="Bearer " + response_body["token"]["access"])
+        self.assertEqual(response.status_code, 200)
+
     def test_unsuccessful_password_change(self):
         """
         Tests if user is unable to change passwords that don't match.
@@ -210,6 +321,31 @@ class TestPasswordChangeView(TestCase):
         self.assertTrue("errors" in response_body)
 
 
+    def test_password_change_ignores_stale_cached_user(self):
+        """
+        Tests that a change made through a cached copy of the user bumps the
+        password version in the database and leaves the other columns as
+        changed elsewhere.
+        """
+        user_cache.get_by_id(self.user1.pk)
+        User.objects.filter(pk=self.user1.pk).update(
+            name="Renamed", password_version=F("password_version") + 1)
+
+        response = self.client.post(self.change_password_url, {
+            "password": "Newpassword123**",
+            "password2": "Newpassword123**"
+        }, content_type="application/json",
+            HTTP_AUTHORIZATION="Bearer " + self.token)
+
+        user = User.objects.get(pk=self.user1.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user.password_version, 3)
+        self.assertEqual(user.name, "Renamed")
+        self.assertTrue(user.check_password("Newpassword123**"))
+        access = UserAccessToken(json.loads(response.content.decode("utf-8"))["token"]["access"])
+        self.assertEqual(access["pwv"], 3)
+
+
 class TestPasswordResetEmailView(TestCase):
     """
     Tests password reset email views.
@@ -223,6 +359,12 @@ class TestPasswordResetEmailView(TestCase):
 
         test_unsuccessful_password_reset_email():
             Tests unsuccessful password email post.
+
+        test_password_reset_email_makes_two_queries():
+            Tests that the reset email costs a SELECT and an INSERT.
+
+        test_password_reset_email_link():
+            Tests that the emailed link is the reset route.
     """
 
     def setUp(self) -> None:
@@ -260,3 +402,178 @@ class TestPasswordResetEmailView(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response_body["message"],
                          "If the given email belongs to a user, a reset link will be sent.")
+
+    def test_password_reset_email_makes_two_queries(self):
+        """
+        Tests that the user is fetched for the reset email with one SELECT
+        and its token stored with one INSERT.
+        """
+        with self.assertNumQueries(2) as queries:
+            response = self.client.post(self.reset_password_url, {
+                "email": self.user1.email
+            })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(queries.captured_queries[1]["sql"].startswith("INSERT"))
+        mail_queue.flush(timeout=5)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.user1.email])
+
+    def test_password_reset_email_link(self):
+        """
+        Tests that the emailed link resets the password, the token being
+        stored only hashed.
+        """
+        self.client.post(self.reset_password_url, {"email": self.user1.email})
+        mail_queue.flush(timeout=5)
+        link = mail.outbox[0].body.split()[-1]
+        path = link[len("http://localhost:8000"):]
+
+        self.assertTrue(link.startswith("http://localhost:8000/api/user/reset-password/"))
+        self.assertFalse(PasswordResetToken.objects.filter(
+            token_hash=path.rstrip("/").split("/")[-1]).exists())
+        response = self.client.post(path, {
+            "password": "Newpassword123**", "password2": "Newpassword123**"})
+        self.assertEqual(response.status_code, 200)
+
+
+class TestPasswordResetView(TestCase):
+    """
+    Tests password reset views.
+    ...
+    Methods:
+        setUp():
+            Creates a user and its reset link.
+
+        test_successful_password_reset():
+            Tests that the link sets the password once.
+
+        test_password_reset_makes_two_queries():
+            Tests that the reset is two UPDATEs.
+
+        test_expired_token_is_rejected():
+            Tests that tokens past PASSWORD_RESET_TIMEOUT get a 401.
+
+        test_reset_consumes_other_tokens():
+            Tests that a reset invalidates the other links of the user.
+
+        test_prune_reset_tokens():
+            Tests that expired and used tokens are deleted.
+
+        test_password_reset_hashes_once():
+            Tests that the reset costs one password hash.
+
+        test_malformed_links_are_rejected():
+            Tests that bad uids and tokens get a 401.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creates a user and its reset link.
+        """
+        self.client = Client()
+        self.user1 = User.objects.create_user(
+            name="Teste",
+            email="teste@email.com",
+            terms_conditions=True,
+            password="Teste123**"
+        )
+        self.data = {"password": "Newpassword123**", "password2": "Newpassword123**"}
+
+    def reset_url(self, uid=None, token=None):
+        """
+        Returns the reset link of the user, or the given uid and token.
+        """
+        return reverse("reset_password", kwargs={
+            "uid": uid or urlsafe_base64_encode(force_bytes(self.user1.pk)),
+            "token": token or create_reset_token(self.user1),
+        })
+
+    def test_successful_password_reset(self):
+        """
+        Tests that the password is reset, its version bumped, and that the
+        link can't be used twice.
+        """
+        url = self.reset_url()
+        response = self.client.post(url, self.data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["message"], "Password has been successfully reset.")
+
+        user = User.objects.get(pk=self.user1.pk)
+        self.assertTrue(user.check_password("Newpassword123**"))
+        self.assertEqual(user.password_version, self.user1.password_version + 1)
+        self.assertEqual(self.client.post(url, self.data).status_code, 401)
+
+    def test_password_reset_makes_two_queries(self):
+        """
+        Tests that the token is consumed with one UPDATE and the password set
+        with another, without reading the user.
+        """
+        url = self.reset_url()
+        with self.assertNumQueries(2) as queries:
+            self.client.post(url, self.data)
+
+        consume, update = (query["sql"] for query in queries.captured_queries)
+        self.assertIn("account_passwordresettoken", consume.split("SET")[0])
+        self.assertTrue(update.startswith('UPDATE "account_user"'))
+
+    def test_expired_token_is_rejected(self):
+        """
+        Tests that a token past its expiry is rejected.
+        """
+        url = self.reset_url()
+        PasswordResetToken.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(self.client.post(url, self.data).status_code, 401)
+        self.assertTrue(User.objects.get(pk=self.user1.pk).check_password("Teste123**"))
+
+    def test_reset_consumes_other_tokens(self):
+        """
+        Tests that an older link can't be used once a newer one was.
+        """
+        older, newer = self.reset_url(), self.reset_url()
+
+        self.assertEqual(self.client.post(newer, self.data).status_code, 200)
+        self.assertEqual(self.client.post(older, self.data).status_code, 401)
+
+    def test_prune_reset_tokens(self):
+        """
+        Tests that the command deletes the used and expired tokens only.
+        """
+        self.client.post(self.reset_url(), self.data)
+        self.reset_url()
+        PasswordResetToken.objects.filter(used_at__isnull=True).update(
+            expires_at=timezone.now() - timedelta(seconds=1))
+        self.reset_url()
+
+        out = StringIO()
+        call_command("prune_reset_tokens", "--batch-size", "1", stdout=out)
+
+        self.assertIn("2 expired or used", out.getvalue())
+        self.assertEqual(PasswordResetToken.objects.count(), 1)
+
+    def test_password_reset_hashes_once(self):
+        """
+        Tests that a reset hashes the new password once and verifies none,
+        its only expensive step.
+        """
+        url = self.reset_url()
+        with mock.patch("account.reset.hashing_service.make_password",
+                        wraps=hashing_service.make_password) as make, \
+                mock.patch("account.models.hashing_service.verify_password") as verify:
+            response = self.client.post(url, self.data)
+
+        self.assertEqual(response.status_code, 200)
+        make.assert_called_once_with(self.data["password"])
+        verify.assert_not_called()
+
+    def test_malformed_links_are_rejected(self):
+        """
+        Tests that malformed uids, unknown users and bad tokens get a 401.
+        """
+        unknown = urlsafe_base64_encode(force_bytes(self.user1.pk + 1))
+        for url in (self.reset_url(uid="%%%"), self.reset_url(uid="bm90LWFuLWlk"),
+                    self.reset_url(uid=unknown), self.reset_url(token="1-bad")):
+            response = self.client.post(url, self.data)
+            self.assertEqual(response.status_code, 401, url)
+            self.assertIn("errors", response.json())
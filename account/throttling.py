@@ -0,0 +1,223 @@
+"""
+Account throttling module.
+...
+Sliding window throttles for the login and password reset views. Each
+identity keeps two counters in the Django cache, the current and the previous
+fixed window, and the request rate is estimated by weighting the previous
+window with the part of it still covered by the sliding window. Checking a
+request costs one cache get_many and no database access, so abusive requests
+are rejected before any password is hashed or email is sent.
+
+The counters live in the default Django cache, which is per process with
+the locmem backend, so a deployment running several processes must point
+CACHES at a shared backend such as Redis or memcached for the rates to hold.
+"""
+import hashlib
+import threading
+import time
+from collections.abc import Mapping
+from django.core.cache import cache as default_cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+class ThrottleStats:
+    """
+    Per-process counters of the requests rejected by the throttles.
+    ...
+    Methods:
+        record(avoids):
+            Counts a rejected request and the work it avoided.
+
+        stats():
+            Returns the counters.
+
+        clear():
+            Resets the counters.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rejected = 0
+        self.avoided = {}
+
+    def record(self, avoids):
+        """
+        Counts a rejected request and the work, e.g. "hashes", it avoided.
+        """
+        with self.lock:
+            self.rejected += 1
+            if avoids:
+                self.avoided[avoids] = self.avoided.get(avoids, 0) + 1
+
+    def stats(self):
+        """
+        Returns the rejected requests and the avoided work, e.g. hashes_avoided.
+        """
+        with self.lock:
+            stats = {"rejected": self.rejected}
+            for avoids, count in self.avoided.items():
+                stats[f"{avoids}_avoided"] = count
+            return stats
+
+    def clear(self):
+        """
+        Resets the counters.
+        """
+        with self.lock:
+            self.rejected = 0
+            self.avoided = {}
+
+
+throttle_stats = ThrottleStats()
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Throttle allowing a number of requests per sliding window.
+    ...
+    The rate is read from DEFAULT_THROTTLE_RATES under the throttle scope, a
+    None rate disables the throttle. Only allowed requests are counted, so a
+    client backing off regains access once its estimated rate drops. A
+    request already rejected by an earlier throttle of the view is not
+    counted either: with the IP throttle first, requests flooding from one
+    IP don't use up the email window and lock its owner out.
+
+    Methods:
+        allow_request(request, view):
+            Returns whether the request is within the rate.
+
+        retry_in(current, previous, elapsed):
+            Returns the seconds until the estimated rate drops below the limit.
+
+        wait():
+            Returns the seconds to wait before the next request is allowed.
+    """
+    cache = default_cache
+    timer = time.time
+    scope = None
+    avoids = None
+
+    def __init__(self):
+        try:
+            rate = api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError as exc:
+            raise ImproperlyConfigured(
+                f"No default throttle rate set for '{self.scope}' scope") from exc
+        self.num_requests, self.duration = self.parse_rate(rate)
+        self.retry_after = None
+
+    @staticmethod
+    def parse_rate(rate):
+        """
+        Returns the number of requests and the window seconds of a rate such
+        as "5/min".
+        """
+        if rate is None:
+            return None, None
+        num, period = rate.split("/")
+        return int(num), {"s": 1, "m": 60, "h": 3600, "d": 86400}[period[0]]
+
+    def allow_request(self, request, view):
+        if self.num_requests is None:
+            return True
+
+        ident = self.get_ident(request)
+        if ident is None:
+            return True
+
+        now = self.timer()
+        window, elapsed = divmod(now, self.duration)
+        current_key = f"throttle:{self.scope}:{ident}:{int(window)}"
+        previous_key = f"throttle:{self.scope}:{ident}:{int(window) - 1}"
+        counts = self.cache.get_many([current_key, previous_key])
+        current = counts.get(current_key, 0)
+        previous = counts.get(previous_key, 0)
+
+        weight = 1 - elapsed / self.duration
+        rejected = getattr(request, "_throttle_recorded", False) is True
+        if previous * weight + current >= self.num_requests:
+            self.retry_after = self.retry_in(current, previous, elapsed)
+            if not rejected:
+                request._throttle_recorded = True  # pylint: disable=protected-access
+                throttle_stats.record(self.avoids)
+            return False
+
+        if rejected:
+            return True
+
+        # The counter outlives its window to be read as the previous one.
+        self.cache.add(current_key, 0, timeout=2 * self.duration)
+        try:
+            self.cache.incr(current_key)
+        except ValueError:
+            # The key expired in between, start the window over.
+            self.cache.set(current_key, 1, timeout=2 * self.duration)
+        return True
+
+    def retry_in(self, current, previous, elapsed):
+        """
+        Returns the seconds until the estimated rate drops below the limit.
+        """
+        if current >= self.num_requests or not previous:
+            return self.duration - elapsed
+        # previous * (1 - t / duration) + current < num_requests
+        covered = (1 - (self.num_requests - current) / previous) * self.duration
+        return max(covered - elapsed, 0)
+
+    def wait(self):
+        return self.retry_after
+
+
+class EmailThrottleMixin:
+    """
+    Counts requests against a digest of the email in the request data, so
+    one address can't be targeted from many IPs.
+    """
+
+    def get_ident(self, request):
+        """
+        Returns the sha1 of the lowered email, or None when there is none,
+        as when the body is not a JSON object.
+        """
+        data = getattr(request, "data", None)
+        if not isinstance(data, Mapping):
+            return None
+        email = data.get("email")
+        if not isinstance(email, str) or not email:
+            return None
+        return hashlib.sha1(email.strip().lower().encode("utf-8")).hexdigest()
+
+
+class LoginIPThrottle(SlidingWindowThrottle):
+    """
+    Throttles login attempts per client IP.
+    """
+    scope = "login_ip"
+    avoids = "hashes"
+
+
+class LoginEmailThrottle(EmailThrottleMixin, SlidingWindowThrottle):
+    """
+    Throttles login attempts per email, locking the account out of password
+    guessing while the rate is exceeded.
+    """
+    scope = "login_email"
+    avoids = "hashes"
+
+
+class PasswordResetIPThrottle(SlidingWindowThrottle):
+    """
+    Throttles password reset emails per client IP.
+    """
+    scope = "password_reset_ip"
+    avoids = "emails"
+
+
+class PasswordResetEmailThrottle(EmailThrottleMixin, SlidingWindowThrottle):
+    """
+    Throttles password reset emails per email.
+    """
+    scope = "password_reset_email"
+    avoids = "emails"
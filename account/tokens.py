@@ -0,0 +1,131 @@
+"""
+Account tokens module.
+"""
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from account.cache import user_cache
+from account.signing import token_backend
+
+
+class KeyRingTokenMixin:
+    """
+    Signs and verifies tokens with the account.signing token backend.
+    """
+
+    def get_token_backend(self):
+        """
+        Returns the account.signing token backend.
+        """
+        return token_backend
+
+
+class UserAccessToken(KeyRingTokenMixin, AccessToken):
+    """
+    Access token signed with the account signing keys.
+    """
+
+
+class UserRefreshToken(KeyRingTokenMixin, RefreshToken):
+    """
+    Refresh token that carries the user claims needed by stateless authentication.
+    ...
+    Methods:
+        for_user(user):
+            Builds a refresh token with the user claims.
+    """
+    access_token_class = UserAccessToken
+
+    @classmethod
+    def for_user(cls, user):
+        """
+        Returns a refresh token for the given user with the account claims set.
+        The access token derived from it inherits the same claims.
+        """
+        token = super().for_user(user)
+        token["email"] = user.email
+        token["is_admin"] = user.is_admin
+        token["is_active"] = user.is_active
+        token["pwv"] = user.password_version
+        return token
+
+
+class ClaimsUser:
+    """
+    Lightweight user built from the claims of a validated access token.
+    ...
+    The account.models.User row is only fetched when an attribute that is not
+    backed by a claim is accessed, e.g. set_password() or save().
+
+    Methods:
+        get_user():
+            Returns the full User instance, fetching it once if needed.
+    """
+    __slots__ = ("token", "id", "email", "is_admin", "is_active",
+                 "password_version", "_user")
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, token):
+        self.token = token
+        self.id = token[api_settings.USER_ID_CLAIM]
+        self.email = token.get("email", "")
+        self.is_admin = token.get("is_admin", False)
+        self.is_active = token.get("is_active", True)
+        self.password_version = token.get("pwv", 0)
+        self._user = None
+
+    def __str__(self):
+        return str(self.email)
+
+    def __eq__(self, other):
+        return getattr(other, "pk", None) == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __getattr__(self, attr):
+        """
+        Falls back to the full User instance for attributes not found in claims.
+        """
+        return getattr(self.get_user(), attr)
+
+    @property
+    def pk(self):
+        """
+        Returns the user primary key.
+        """
+        return self.id
+
+    @property
+    def is_staff(self):
+        """
+        Return whether user is an admin.
+        """
+        return self.is_admin
+
+    def has_perm(self, perm, obj=None):
+        """
+        Returns whether user has specific permission.
+        """
+        return self.is_admin
+
+    def has_module_perms(self, app_label):
+        """
+        Returns whether user can view the specified app.
+        """
+        return True
+
+    def get_username(self):
+        """
+        Returns the user email.
+        """
+        return self.email
+
+    def get_user(self):
+        """
+        Returns the full User instance, fetching it once if needed.
+        """
+        if self._user is None:
+            self._user = user_cache.get_by_id(self.id)
+        return self._user
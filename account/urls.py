@@ -3,7 +3,9 @@ Module that holds account app URLs.
 """
 from django.urls import path
 from .views import (UserRegistrationView, UserLoginView,
-                    UserPasswordChangeView, SendPasswordResetEmailView, UserPasswordResetView)
+                    UserPasswordChangeView, SendPasswordResetEmailView, UserPasswordResetView,
+                    UserImportView, UserExportView, UserTokenRefreshView, UserLogoutView,
+                    JWKSView, MetricsView)
 
 urlpatterns = [
     path("register/", UserRegistrationView.as_view(), name="register"),
@@ -13,5 +15,11 @@ urlpatterns = [
     path("send-reset-password-email/", SendPasswordResetEmailView.as_view(),
          name="send_reset_password_email"),
     path("reset-password/<uid>/<token>/",
-         UserPasswordResetView.as_view(), name="reset_password")
+         UserPasswordResetView.as_view(), name="reset_password"),
+    path("token/refresh/", UserTokenRefreshView.as_view(), name="token_refresh"),
+    path("logout/", UserLogoutView.as_view(), name="logout"),
+    path("jwks/", JWKSView.as_view(), name="jwks"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+    path("import/", UserImportView.as_view(), name="import_users"),
+    path("export/", UserExportView.as_view(), name="export_users"),
 ]
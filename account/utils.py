@@ -3,7 +3,10 @@ Utils module.
 """
 
 import os
-from django.core.mail import EmailMessage
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from account.mail import mail_queue
+from account.metrics import timed
 
 
 class Util:
@@ -13,16 +16,49 @@ class Util:
     Methods:
         send_email(data):
             Sends out the reset email link.
+
+        send_mass(datas):
+            Sends out several emails over one connection.
+
+        build_email(data):
+            Builds the EmailMessage for the given data.
     """
     @staticmethod
+    @timed("send_email")
     def send_email(data):
         """
         Sends the email with the reset password link to the user.
+        The email is queued for background delivery unless the mail queue is
+        disabled in the ACCOUNT_EMAIL_QUEUE setting.
+        """
+        email = Util.build_email(data)
+        if getattr(settings, "ACCOUNT_EMAIL_QUEUE", {}).get("ENABLED", True):
+            mail_queue.enqueue(email)
+        else:
+            email.send()
+
+    @staticmethod
+    def send_mass(datas):
+        """
+        Sends several emails, queued like send_email or, when the mail queue is
+        disabled, over a single connection. Returns the number of emails
+        queued or sent.
+        """
+        emails = [Util.build_email(data) for data in datas]
+        if getattr(settings, "ACCOUNT_EMAIL_QUEUE", {}).get("ENABLED", True):
+            for email in emails:
+                mail_queue.enqueue(email)
+            return len(emails)
+        return get_connection().send_messages(emails)
+
+    @staticmethod
+    def build_email(data):
+        """
+        Builds the EmailMessage for the given data.
         """
-        email = EmailMessage(
+        return EmailMessage(
             subject=data["subject"],
             body=data["body"],
             from_email=os.environ.get("EMAIL_FROM"),
             to=[data["receiver_email"]]
         )
-        email.send()
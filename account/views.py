@@ -1,23 +1,39 @@
 """
 Account views module.
 """
+import io
+import os
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, serializers
-from rest_framework.permissions import IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from django.contrib.auth import authenticate
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from account.serializers import (
     UserRegistrationSerializer, UserLoginSerializer, UserPasswordChangeSerializer,
-    SendPasswordResetEmailSerializer, UserPasswordResetSerializer)
+    SendPasswordResetEmailSerializer, UserPasswordResetSerializer, RefreshTokenSerializer)
+from .exporting import EXPORT_FORMATS, export_users, parse_fields
+from .importing import IMPORT_FORMATS, UserImporter, read_rows
+from .last_login import last_logins
+from .metrics import metrics, timed
 from .renderers import UserRenderer
+from .revocation import revocation_store
+from .signing import token_backend
+from .throttling import (
+    LoginIPThrottle, LoginEmailThrottle, PasswordResetIPThrottle,
+    PasswordResetEmailThrottle)
+from .models import User
+from .tokens import UserRefreshToken
 
 
+@timed("tokens")
 def get_tokens_for_user(user):
     """
     Helper function for user token generation.
     """
-    refresh = RefreshToken.for_user(user)
+    refresh = UserRefreshToken.for_user(user)
     return {
         "refresh": str(refresh),
         "access": str(refresh.access_token),
@@ -46,7 +62,10 @@ class UserRegistrationView(APIView):
         except serializers.ValidationError:
             return Response(serializer.errors, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
 
-        user = serializer.save()
+        try:
+            user = serializer.save()
+        except serializers.ValidationError as exc:
+            return Response(exc.detail, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
         token = get_tokens_for_user(user)
         return Response({"token": token, "message": "Registered!"},
                         status=status.HTTP_201_CREATED)
@@ -61,6 +80,7 @@ class UserLoginView(APIView):
             POST method for user Login.
     """
     renderer_classes = [UserRenderer]
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
 
     def post(self, request):
         """
@@ -80,6 +100,7 @@ class UserLoginView(APIView):
             return Response({"errors": {"non_field_errors": ["Invalid Email or Password!"]}},
                             status=status.HTTP_401_UNAUTHORIZED)
 
+        last_logins.record(user)
         token = get_tokens_for_user(user)
         return Response({"token": token, "message": "Logged in!"}, status=status.HTTP_200_OK)
 
@@ -106,7 +127,9 @@ class UserPasswordChangeView(APIView):
         except serializers.ValidationError:
             return Response(serializer.errors, status=status.HTTP_401_UNAUTHORIZED)
 
-        return Response({"message": "Password was changed successfully."},
+        # The change rejects the request token, hand out tokens for the new password.
+        token = get_tokens_for_user(serializer.validated_data["user"])
+        return Response({"token": token, "message": "Password was changed successfully."},
                         status=status.HTTP_200_OK)
 
 
@@ -119,6 +142,7 @@ class SendPasswordResetEmailView(APIView):
             POST method for password change.
     """
     renderer_classes = [UserRenderer]
+    throttle_classes = [PasswordResetIPThrottle, PasswordResetEmailThrottle]
 
     def post(self, request):
         """
@@ -128,7 +152,7 @@ class SendPasswordResetEmailView(APIView):
         try:
             serializer.is_valid(raise_exception=True)
         except serializers.ValidationError:
-            return Response(serializer.errors, status=status.HTTP_200_OK)
+            return Response({"errors": serializer.errors}, status=status.HTTP_200_OK)
 
         return Response({
             "message": "If the given email belongs to a user, a reset link will be sent."
@@ -160,3 +184,194 @@ class UserPasswordResetView(APIView):
 
         return Response({"message": "Password has been successfully reset."},
                         status=status.HTTP_200_OK)
+
+
+class UserTokenRefreshView(APIView):
+    """
+    Token refresh class with a post method.
+    ...
+    Methods:
+        post(request):
+            POST method for token refresh.
+    """
+    renderer_classes = [UserRenderer]
+    authentication_classes = []
+
+    def post(self, request):
+        """
+        POST method exchanging a refresh token for a new token pair. The
+        refresh token is rotated, it is revoked once used, and the claims
+        are read again from the user. Tokens issued before a password change
+        or reset are rejected.
+        """
+        serializer = RefreshTokenSerializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except serializers.ValidationError:
+            return Response(serializer.errors, status=status.HTTP_401_UNAUTHORIZED)
+
+        refresh = serializer.validated_data["refresh"]
+        # Read from the database, not the user cache, so a user deactivated
+        # by another process can't refresh.
+        user = User.objects.filter(pk=refresh[jwt_settings.USER_ID_CLAIM]).first()
+
+        if user is None or not user.is_active:
+            return Response({"errors": {"non_field_errors": ["User is inactive"]}},
+                            status=status.HTTP_401_UNAUTHORIZED)
+
+        if refresh.get("pwv", 0) != user.password_version:
+            return Response({"errors": {"refresh": ["Password has changed"]}},
+                            status=status.HTTP_401_UNAUTHORIZED)
+
+        # Concurrent requests, in any process, may all pass the revocation
+        # check: only the one inserting the JTI gets a new pair.
+        if not revocation_store.claim(refresh):
+            return Response({"errors": {"refresh": ["Token is revoked"]}},
+                            status=status.HTTP_401_UNAUTHORIZED)
+        token = get_tokens_for_user(user)
+        return Response({"token": token, "message": "Token refreshed!"},
+                        status=status.HTTP_200_OK)
+
+
+class UserLogoutView(APIView):
+    """
+    User logout class with a post method.
+    ...
+    Methods:
+        post(request):
+            POST method for user logout.
+    """
+    renderer_classes = [UserRenderer]
+
+    def post(self, request):
+        """
+        POST method revoking the refresh token and, when the request is
+        authenticated, its access token.
+        """
+        serializer = RefreshTokenSerializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except serializers.ValidationError:
+            return Response(serializer.errors, status=status.HTTP_401_UNAUTHORIZED)
+
+        revocation_store.revoke(serializer.validated_data["refresh"])
+        if request.auth is not None:
+            revocation_store.revoke(request.auth)
+        return Response({"message": "Logged out!"}, status=status.HTTP_200_OK)
+
+
+class JWKSView(APIView):
+    """
+    JSON Web Key Set class with a get method.
+    ...
+    Methods:
+        get(request):
+            GET method for the token verification keys.
+    """
+    renderer_classes = [UserRenderer]
+    authentication_classes = []
+
+    def get(self, request):
+        """
+        GET method returning the public keys verifying the tokens, none when
+        tokens are signed with the shared HS256 secret.
+        """
+        jwks = getattr(token_backend, "jwks", None)
+        response = Response(jwks() if jwks else {"keys": []}, status=status.HTTP_200_OK)
+        response["Cache-Control"] = "public, max-age=300"
+        return response
+
+
+class MetricsView(View):
+    """
+    Prometheus metrics class with a get method.
+    ...
+    It is not found unless ACCOUNT_METRICS is enabled and only answers
+    requests carrying its bearer TOKEN, as set in the scrape configuration.
+
+    Methods:
+        get(request):
+            GET method for the metrics in the Prometheus text format.
+    """
+
+    def get(self, request):
+        """
+        GET method returning the request histograms and counters.
+        """
+        if not metrics.enabled:
+            raise Http404
+        if not metrics.authorized(request.headers.get("Authorization")):
+            response = HttpResponse(status=401)
+            response["WWW-Authenticate"] = 'Bearer realm="metrics"'
+            return response
+        return HttpResponse(metrics.render(),
+                            content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class UserImportView(APIView):
+    """
+    Admin only bulk user import class with a post method.
+    ...
+    Methods:
+        post(request):
+            POST method for user import.
+    """
+    renderer_classes = [UserRenderer]
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        """
+        POST method for user import, taking a JSON list of users or a .csv or
+        .jsonl file uploaded as "file".
+        """
+        upload = request.FILES.get("file")
+        if upload is not None:
+            file_format = os.path.splitext(upload.name)[1].lstrip(".").lower()
+            if file_format not in IMPORT_FORMATS:
+                return Response(
+                    {"file": [f"Expected a {' or '.join(IMPORT_FORMATS)} file."]},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+            rows = read_rows(io.TextIOWrapper(upload, encoding="utf-8-sig"), file_format)
+        elif isinstance(request.data, list):
+            rows = request.data
+        else:
+            return Response(
+                {"non_field_errors": ["Expected a list of users or a file."]},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        report = UserImporter().import_rows(rows)
+        return Response(report, status=status.HTTP_201_CREATED if report["created"]
+                        else status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+
+class UserExportView(APIView):
+    """
+    Admin only streaming user export class with a get method.
+    ...
+    Methods:
+        get(request):
+            GET method for user export.
+    """
+    renderer_classes = [UserRenderer]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        """
+        GET method streaming the users as JSON lines, or CSV with ?type=csv,
+        with the columns given as ?fields=id,email or all exportable ones.
+        """
+        file_format = request.query_params.get("type", "jsonl")
+        if file_format not in EXPORT_FORMATS:
+            return Response(
+                {"type": [f"Expected one of {', '.join(EXPORT_FORMATS)}."]},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        try:
+            fields = parse_fields(request.query_params.get("fields"))
+        except ValueError as exc:
+            return Response({"fields": [str(exc)]},
+                            status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+        response = StreamingHttpResponse(
+            export_users(file_format, fields), content_type=EXPORT_FORMATS[file_format])
+        response["Content-Disposition"] = f'attachment; filename="users.{file_format}"'
+        return response
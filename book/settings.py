@@ -13,7 +13,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 from pathlib import Path
 from datetime import timedelta
 import os
-from decouple import config
+from decouple import Choices, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'account.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -59,6 +60,36 @@ MIDDLEWARE = [
 
 AUTH_USER_MODEL = "account.User"
 
+AUTHENTICATION_BACKENDS = [
+    'account.backends.CachedModelBackend',
+]
+
+# User lookup cache, CACHE_ALIAS names a CACHES entry to share it across processes.
+# Entries are kept per process for LOCAL_TIMEOUT seconds, the longest a change
+# made by another process, such as a new password, goes unseen here.
+ACCOUNT_USER_CACHE = {
+    'MAXSIZE': 1024,
+    'CACHE_ALIAS': None,
+    'TIMEOUT': 300,
+    'LOCAL_TIMEOUT': config('USER_CACHE_LOCAL_TIMEOUT', default=5, cast=int),
+}
+
+# Validated access tokens kept per process until they expire, 0 disables it
+ACCOUNT_TOKEN_CACHE = {
+    'MAXSIZE': config('TOKEN_CACHE_MAXSIZE', default=4096, cast=int),
+}
+
+# Current password version per user, checked against the token claim on every
+# request. Without CACHE_ALIAS each process reads it again from the database
+# after LOCAL_TIMEOUT seconds, so tokens issued before a password change are
+# rejected everywhere within that delay. CACHE_ALIAS must name a cache shared
+# by every process, e.g. Redis, never the per-process locmem default.
+ACCOUNT_PASSWORD_VERSIONS = {
+    'CACHE_ALIAS': config('PASSWORD_VERSIONS_CACHE', default=None),
+    'TIMEOUT': 86400,
+    'LOCAL_TIMEOUT': config('PASSWORD_VERSIONS_LOCAL_TIMEOUT', default=5, cast=int),
+}
+
 ROOT_URLCONF = 'book.urls'
 
 TEMPLATES = [
@@ -79,22 +110,101 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'book.wsgi.application'
 
+ASGI_APPLICATION = 'book.asgi.application'
+
+# Serve the account API with the async views of account.async_urls,
+# meant for ASGI deployments
+ACCOUNT_ASYNC_VIEWS = config("ASYNC_VIEWS", default=False, cast=bool)
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# "sqlite" for a single node, "postgres" for several app servers, through the
+# psycopg driver pinned in requirements.txt.
+DB_PROFILE = config('DB_PROFILE', default='sqlite', cast=Choices(['sqlite', 'postgres']))
+
+# Seconds a connection is kept open across requests, 0 closes it after each
+# request. Keep 0 under ASGI and pool with pgbouncer instead.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=60, cast=int)
+
+if DB_PROFILE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='book'),
+            'USER': config('DB_USER', default='book'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default=5432, cast=int),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            # Required behind a transaction pooling pgbouncer.
+            'DISABLE_SERVER_SIDE_CURSORS': config(
+                'DB_DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool),
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+            },
+        }
     }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'OPTIONS': {
+                # Seconds a writer waits for the database lock.
+                'timeout': config('SQLITE_BUSY_TIMEOUT', default=5, cast=float),
+            },
+        }
+    }
+
+# How logins write last_login: "always", "granularity" (at most once per
+# GRANULARITY seconds per user), "buffer" (bulk UPDATE every FLUSH_INTERVAL
+# seconds) or "off". Off by default: it adds writes the logins never made,
+# enable it when last_login is needed, preferably with "buffer".
+ACCOUNT_LAST_LOGIN = {
+    'MODE': config('LAST_LOGIN_MODE', default='off',
+                   cast=Choices(['always', 'granularity', 'buffer', 'off'])),
+    'GRANULARITY': config('LAST_LOGIN_GRANULARITY', default=3600, cast=int),
+    'FLUSH_INTERVAL': config('LAST_LOGIN_FLUSH_INTERVAL', default=60, cast=int),
+}
+
+# Per-route latency histograms, query counts and Server-Timing headers,
+# exported at api/user/metrics/. The middleware is skipped when disabled.
+ACCOUNT_METRICS = {
+    'ENABLED': config('METRICS_ENABLED', default=False, cast=bool),
+    # Exposes query counts and password check durations to every client,
+    # which tell known emails from unknown ones: for debugging only.
+    'SERVER_TIMING': config('METRICS_SERVER_TIMING', default=False, cast=bool),
+    # Bearer token the Prometheus scraper sends, the view is closed without it.
+    'TOKEN': config('METRICS_TOKEN', default=None),
+}
+
+ACCOUNT_SQLITE = {
+    'JOURNAL_MODE': config('SQLITE_JOURNAL_MODE', default='WAL'),
+    'SYNCHRONOUS': config('SQLITE_SYNCHRONOUS', default='NORMAL'),
 }
 
 # JWT Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+        'account.authentication.StatelessJWTAuthentication',
+    ),
+    # Sliding window rates of the login and password reset throttles. Their
+    # counters are kept in the default cache, which must be shared, e.g. Redis,
+    # when several processes serve requests: locmem counts per process.
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': config('THROTTLE_LOGIN_IP', default='60/min'),
+        'login_email': config('THROTTLE_LOGIN_EMAIL', default='10/min'),
+        'password_reset_ip': config('THROTTLE_PASSWORD_RESET_IP', default='20/hour'),
+        'password_reset_email': config('THROTTLE_PASSWORD_RESET_EMAIL', default='5/hour'),
+    },
+    # Proxies in front of the app whose X-Forwarded-For entries are trusted.
+    # With 0 the throttles identify clients by REMOTE_ADDR, as the header can
+    # be set to anything by the client to get a fresh per IP window.
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
 
 # Password validation
@@ -115,6 +225,57 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing
+# The first hasher hashes new passwords, the others only verify existing
+# hashes until they are upgraded on the next login. Argon2 and BCrypt need the
+# argon2-cffi and bcrypt packages.
+
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2_sha256': 'account.hashers.PBKDF2PasswordHasher',
+    'argon2': 'account.hashers.Argon2PasswordHasher',
+    'bcrypt_sha256': 'account.hashers.BCryptSHA256PasswordHasher',
+    'scrypt': 'account.hashers.ScryptPasswordHasher',
+}
+PASSWORD_HASHER = config("PASSWORD_HASHER", default="pbkdf2_sha256")
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+]
+
+ACCOUNT_PASSWORD_HASHING = {
+    'PBKDF2_ITERATIONS': config("PBKDF2_ITERATIONS", default=600000, cast=int),
+    'ARGON2_TIME_COST': config("ARGON2_TIME_COST", default=2, cast=int),
+    'ARGON2_MEMORY_COST': config("ARGON2_MEMORY_COST", default=102400, cast=int),
+    'ARGON2_PARALLELISM': config("ARGON2_PARALLELISM", default=8, cast=int),
+    'BCRYPT_ROUNDS': config("BCRYPT_ROUNDS", default=12, cast=int),
+    'SCRYPT_WORK_FACTOR': config("SCRYPT_WORK_FACTOR", default=2 ** 14, cast=int),
+    'SCRYPT_BLOCK_SIZE': config("SCRYPT_BLOCK_SIZE", default=8, cast=int),
+    'SCRYPT_PARALLELISM': config("SCRYPT_PARALLELISM", default=1, cast=int),
+}
+
+# Bounded pool running password hashing off the request thread,
+# MAX_WORKERS defaults to the number of cores
+ACCOUNT_HASHING_POOL = {
+    'ENABLED': True,
+    'MAX_WORKERS': config("HASHING_MAX_WORKERS", default=None, cast=lambda v: v and int(v)),
+}
+
+# Seconds between loads of the tokens revoked by other processes, each load
+# reading again the last LOAD_OVERLAP seconds for rows committed late
+ACCOUNT_REVOCATION = {
+    'REFRESH_INTERVAL': config('REVOCATION_REFRESH_INTERVAL', default=30, cast=int),
+    'LOAD_OVERLAP': config('REVOCATION_LOAD_OVERLAP', default=60, cast=int),
+}
+
+# Rows validated and written per chunk by the bulk user import
+ACCOUNT_IMPORT = {
+    'BATCH_SIZE': config('IMPORT_BATCH_SIZE', default=500, cast=int),
+}
+
+# Rows fetched per cursor round trip by the streaming user export
+ACCOUNT_EXPORT = {
+    'CHUNK_SIZE': config('EXPORT_CHUNK_SIZE', default=2000, cast=int),
+}
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -139,13 +300,28 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Email Configuration
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+EMAIL_BACKEND = "account.mail.PooledSMTPBackend"
 EMAIL_HOST = "smtp.gmail.com"
 EMAIL_PORT = 587
 EMAIL_HOST_USER = config("EMAIL_USER")
 EMAIL_HOST_PASSWORD = config("EMAIL_PASS")
 EMAIL_USE_TLS = True
 
+# Background delivery of outbound emails, see account.mail.MailQueue
+ACCOUNT_EMAIL_QUEUE = {
+    'ENABLED': True,
+    'WORKERS': 1,
+    'BATCH_SIZE': 20,
+    'MAX_RETRIES': 3,
+    'BACKOFF': 2.0,
+}
+
+# Warm SMTP connections kept by account.mail.PooledSMTPBackend
+ACCOUNT_SMTP_POOL = {
+    'MAXSIZE': 4,
+    'MAX_IDLE': 60.0,
+}
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=20),
@@ -155,13 +331,23 @@ SIMPLE_JWT = {
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
     'USER_AUTHENTICATION_RULE': 'rest_framework_simplejwt.authentication.default_user_authentication_rule',
-    'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
+    'AUTH_TOKEN_CLASSES': ('account.tokens.UserAccessToken',),
     'TOKEN_TYPE_CLAIM': 'token_type',
-    'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.Tokenuser',
+    'TOKEN_USER_CLASS': 'account.tokens.ClaimsUser',
     'JTI_CLAIM': 'jtin',
 }
 
-PASSWORD_RESET_TIMEOUT = 900
+# Directory of PEM private keys named <kid>.pem signing tokens with RS256,
+# ES256 or EdDSA instead of HS256, ACTIVE_KID names the key signing new tokens
+ACCOUNT_SIGNING_KEYS = {
+    'KEYS_DIR': config('JWT_KEYS_DIR', default=None),
+    'ACTIVE_KID': config('JWT_ACTIVE_KID', default=None),
+}
+
+PASSWORD_RESET_TIMEOUT = config('PASSWORD_RESET_TIMEOUT', default=900, cast=int)
+
+# Origin prepended to the reset-password route in reset emails.
+PASSWORD_RESET_BASE_URL = config('PASSWORD_RESET_BASE_URL', default='http://localhost:8000')
 
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",